@@ -3,7 +3,7 @@
 """
 
 import aiohttp
-from typing import Union, Callable, List, Tuple, Any
+from typing import Union, Callable, List, Tuple, Any, Pattern, Optional
 import traceback
 
 import asyncio
@@ -24,6 +24,8 @@ from .types import (
     BotCommandScopeAllPrivateChats,
     BotCommandScopeChatAdministrators,
     User,
+    Chat,
+    ChatMember,
     PollOption,
     InputFile,
     ChatAction,
@@ -31,7 +33,12 @@ from .types import (
     Request,
     File,
     PollAnswer,
-    InlineKeyboardButton
+    InlineKeyboardButton,
+    InputMedia,
+    InputMediaPhoto,
+    InputMediaVideo,
+    InputMediaAudio,
+    InputMediaDocument
 )
 
 from ..exception import Telegram
@@ -40,6 +47,8 @@ import re
 
 from concurrent.futures import ThreadPoolExecutor
 
+from contextlib import ExitStack
+
 import json
 
 from ..state import StatesGroup, State, FSMContext
@@ -50,6 +59,32 @@ import inspect
 
 from io import BytesIO
 
+import mmap
+
+from ..middleware import BaseMiddleware, FunctionMiddleware
+
+from .. import methods
+
+from ..identity import parse_bot_id, MeCache
+
+from ..cache import ResponseCache
+
+from ..downloads import DownloadCache
+
+from ..dispatcher import route_update, maybe_await, get_priority, compile_pattern, Priority, DEFAULT_PRIORITIES
+
+from ..journal import UpdateJournal
+
+from ..update_queue import AsyncUpdateQueue
+
+from ..coalesce import AsyncEditCoalescer
+
+from ..router import Router, include_router
+
+from ..callback_data import CallbackData, CallbackDataFilter, as_filter
+
+from . import types
+
 __all__ = [
     'ParseMode',
     'Message',
@@ -68,62 +103,147 @@ __all__ = [
     'User',
     'PollOption',
     'InputFile',
+    'InputMediaPhoto',
+    'InputMediaVideo',
+    'InputMediaAudio',
+    'InputMediaDocument',
     'ChatAction',
     'Poll',
     'AsyncBot',
-    'File'
+    'File',
+    'BaseMiddleware',
+    'UpdateJournal',
+    'AsyncUpdateQueue',
+    'Priority',
+    'Router',
+    'CallbackData'
 ]
 
 class AsyncBot:
     """
     Класс для управления ботом асинхронно.
     """
-    offset = 0
-    _message_handlers = []
-    _callback_query_handlers = []
-    _next_step_handlers = []
-    _poll_handlers = []
-    _poll_answer_handlers = []
-    _query_next_step_handlers = []
-    __loop__ = asyncio.new_event_loop()
-    __session__: aiohttp.ClientSession = aiohttp.ClientSession(connector=aiohttp.TCPConnector(keepalive_timeout=30, loop=__loop__), loop=__loop__)
-    __request__: Request = Request(log_level=logging.DEBUG, loop=__loop__)
     __executor__: ThreadPoolExecutor = None
 
-    def __init__(self, token: str, log_level: int=logging.DEBUG, thread_max_workers: int=15):
+    def __init__(self, token: str, log_level: int=logging.INFO, thread_max_workers: int=15, log_sample_rate: float=1.0, session: aiohttp.ClientSession=None, api_url: str=methods.API_URL, me_cache: Union[str, MeCache]=None, response_cache: ResponseCache=None, download_cache: Union[str, DownloadCache]=None):
         """
-        Инициализирует AsyncBot с заданным токеном.
+        Инициализирует AsyncBot с заданным токеном.Сетевые ресурсы создаются при первом запросе внутри работающего цикла событий,
+        поэтому несколько ботов могут работать в одном цикле.Для корректного завершения используйте `async with AsyncBot(...) as bot:` или `await bot.close()`.
 
         Args:
             token (str): Токен для аутентификации запросов к API Telegram.
             log_level (int): Уровень логирования.
+            log_sample_rate (float): Доля запросов к API, которые пишутся в лог на уровне DEBUG.
+            session (aiohttp.ClientSession, optional): Общая сессия (пул соединений) для нескольких ботов, бот её не закрывает.
+            api_url (str, optional): Адрес сервера Bot API (например, локального telegram-bot-api или эмулятора).
+            me_cache (Union[str, MeCache], optional): Папка (или MeCache) для кэша getMe на диске.
+            response_cache (ResponseCache, optional): Кэш ответов getMe, getFile, getChat, getChatMember (по умолчанию выключен).
+            download_cache (Union[str, DownloadCache], optional): Папка (или DownloadCache) для скачанных файлов.Без неё одновременные скачивания одного файла всё равно объединяются.
+
+        Raises:
+            Telegram: Токен имеет неверный формат.
         """
         from ..utils import handle_reply_markup
 
         self.handle_reply_markup = handle_reply_markup
         
         self.token = token
+        self.api_url = api_url.rstrip('/')
+        self.id: int = parse_bot_id(token)
+        self.me_cache: Optional[MeCache] = MeCache(me_cache) if isinstance(me_cache, str) else me_cache
+        self.download_cache: DownloadCache = DownloadCache(download_cache) if isinstance(download_cache, str) else download_cache or DownloadCache(None)
+
+        self.offset = 0
+        self._message_handlers: List[dict] = []
+        self._callback_query_handlers: List[dict] = []
+        self._next_step_handlers: List[tuple] = []
+        self._query_next_step_handlers: List[tuple] = []
+        self._poll_handlers: List[dict] = []
+        self._poll_answer_handlers: List[dict] = []
+        self._routers: List[Router] = []
+
+        self._middlewares: List[BaseMiddleware] = []
+        self.update_queue: AsyncUpdateQueue = None
+        self.priorities: dict = dict(DEFAULT_PRIORITIES)
+        self.edit_coalescer = AsyncEditCoalescer(self.__send_edit__)
 
         self.__executor__ = ThreadPoolExecutor(thread_max_workers)
+        self.__request__: Request = Request(log_level, log_sample_rate=log_sample_rate, session=session, cache=response_cache)
+        self.__loop__: asyncio.AbstractEventLoop = None
+
+        self._me: Optional[User] = None
+        self._me_fresh = False
+        self._me_task: Optional[asyncio.Task] = None
+
+        if self.me_cache is not None:
+            user, self._me_fresh = self.me_cache.load(self.id)
+
+            if user is not None:
+                self._me = User(user)
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(log_level)
 
-        self.__request__.logger.setLevel(log_level)
-
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.WARNING)
 
         self.logger.addHandler(console_handler)
-        
+
+    @property
+    def me(self) -> Optional[User]:
+        """
+        Информация о боте (getMe) из кэша на диске или фонового запроса, который запускает start.
+        None, пока ответа нет - для гарантированного ответа используйте `await bot.get_me()`.
+        """
+        return self._me
+
+    @me.setter
+    def me(self, user: User) -> None:
+        self._me = user
+
+    async def start(self) -> None:
+        """
+        Привязывает бота к текущему циклу событий и запрашивает информацию о боте (`bot.me`) в фоне, не дожидаясь ответа.
+        Если в кэше на диске есть свежая запись, getMe не запрашивается.Вызывается автоматически в polling.
+        """
+        self.__loop__ = asyncio.get_running_loop()
+
+        if self._me_fresh or (self._me_task is not None and not self._me_task.done()):
+            return
+
+        self._me_task = self.__loop__.create_task(self.__fetch_me__())
+
+    async def __fetch_me__(self) -> None:
         try:
-            self.me: User = self.__loop__.run_until_complete(self.get_me())
-        except (TimeoutError, ConnectionError) as e:
-            traceback.print_exc()
+            user = await self.get_me()
         except Exception as e:
-            raise Telegram('The token is incorrectly set.')
+            self.logger.warning('getMe failed: %s', e)
+            return
+
+        self._me = user
+        self._me_fresh = True
+
+        if self.me_cache is not None:
+            await self.__loop__.run_in_executor(self.__executor__, self.me_cache.save, self.id, dict(vars(user)))
+
+        self.logger.debug('The bot is launched with user name @%s', user.username)
+
+    async def close(self) -> None:
+        """
+        Закрывает сетевую сессию бота и пул потоков.
+        """
+        if self._me_task is not None:
+            self._me_task.cancel()
+
+        await self.__request__.close()
+        self.__executor__.shutdown(wait=False)
+
+    async def __aenter__(self) -> 'AsyncBot':
+        await self.start()
+        return self
 
-        self.logger.debug(f'The bot is launched with user name @{self.me.username}')
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
     async def get_me(self) -> User:
         """
@@ -132,9 +252,8 @@ class AsyncBot:
         Returns:
             User: Объект, представляющий бота.
         """
-        
-        response = await self.__request__.get(f'https://api.telegram.org/bot{self.token}/getMe')
-        return User((await response.json())['result'])
+        response = await self.__call_api__(methods.GET_ME.build({}))
+        return User(response['result'])
 
     async def set_my_commands(self, commands: List[BotCommand], scope: Union[BotCommandScopeChat, BotCommandScopeDefault, BotCommandScopeChatMember, BotCommandScopeAllGroupChats, BotCommandScopeAllPrivateChats, BotCommandScopeChatAdministrators, BotCommandScopeAllChatAdministrators]=None, language_code: str=None) -> bool:
         """
@@ -148,22 +267,8 @@ class AsyncBot:
         Returns:
             bool: Возвращает True, если команды успешно установлены.
         """
-        parameters = {
-            'commands': [{"command": cmd.command, "description": cmd.description} for cmd in commands]
-        }
-
-        if scope:
-            parameters['scope'] = {"type": scope.type}
-            if hasattr(scope, 'chat_id'):
-                parameters['scope'].update({"chat_id": scope.chat_id})
-            if hasattr(scope, 'user_id'):
-                parameters['scope'].update({"user_id": scope.user_id})
-
-        if language_code:
-            parameters['language_code'] = language_code
-        
-        response = await self.__request__.get(f'https://api.telegram.org/bot{self.token}/setMyCommands', json=parameters)
-        return (await response.json())['ok'] if response is not None else False
+        response = await self.__call_api__(methods.SET_MY_COMMANDS.build(locals()))
+        return response['ok']
 
     async def send_message(self, chat_id: Union[int, str], text: Union[int, float, str], reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, parse_mode: str=None, reply_to_message_id: int=None, disable_web_page_preview: bool=False) -> Message:
         """
@@ -179,30 +284,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            'chat_id': chat_id,
-            'text': text,
-            "link_preview_options": {
-                "is_disabled": disable_web_page_preview
-            }
-        }
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendMessage', json=parameters)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_MESSAGE.build(locals()))
+        return Message(response['result'], self)
 
     async def send_photo(self, chat_id: Union[int, str], photo: Union[InputFile], caption: Union[int, float, str]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, parse_mode: str=None, photo_name: str=None, reply_to_message_id: int=None) -> Message:
         """
@@ -220,55 +303,92 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            'chat_id': chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
+        response = await self.__call_api__(methods.SEND_PHOTO.build(locals()))
+        return Message(response['result'], self)
 
-        if photo_name is not None:
-            try:
-                _type = re.search('.*?\.(\w+)', photo_name).group(1)
-                name = photo_name
-            except AttributeError:
-                name = 'image.png'
-                _type = 'png'
-        else:
-            if hasattr(photo.file, 'name'):
-                name = photo.file.name
-                _type = re.search(r'.*?\.(\w+)', photo.file.name).group(1)
-            else:
-                name = 'image.png'
-                _type = 'png'
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
+
+    async def send_media_group(self, chat_id: Union[int, str], media: List[InputMedia], reply_to_message_id: int=None, disable_notification: bool=False, upload_chat_id: Union[int, str]=None) -> List[Message]:
+        """
+        Отправляет альбом из 2-10 фото, видео, документов или аудио одним запросом.Файлы передаются потоком, не читаясь в память целиком.
+
+        Args:
+            chat_id (Union[int, str]): Идентификатор чата.
+            media (List[InputMedia]): InputMediaPhoto, InputMediaVideo, InputMediaDocument или InputMediaAudio с InputFile, file_id или URL.
+            reply_to_message_id (int, optional): Если указан, альбом будет отправлен как ответ на указанное сообщение.
+            disable_notification (bool, optional): Отправить без звука.
+            upload_chat_id (Union[int, str], optional): Чат (например, закрытый канал), куда файлы сначала загружаются параллельно (см. upload_media).
+                Тогда время загрузки альбома определяется самым большим файлом, а не суммой всех.
+
+        Returns:
+            List[Message]: Сообщения альбома.
+        """
+        if not 2 <= len(media) <= 10:
+            raise ValueError('В альбоме должно быть от 2 до 10 файлов.')
+
+        if upload_chat_id is not None:
+            media = await self.upload_media(upload_chat_id, media)
 
         data = aiohttp.FormData()
+        data.add_field('chat_id', str(chat_id))
 
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.dumps(parameters[param]))
-                continue
-            data.add_field(param, str(parameters[param]))
+        if reply_to_message_id is not None:
+            data.add_field('reply_to_message_id', str(reply_to_message_id))
+
+        if disable_notification:
+            data.add_field('disable_notification', 'true')
+
+        items = []
+
+        with ExitStack() as stack:
+            for indx, item in enumerate(media):
+                if isinstance(item.media, str):
+                    items.append(item.to_dict())
+                    continue
 
-        data.add_field('photo', photo.file, filename=name, content_type=f'image/{_type}')
+                name = f'file{indx}'
+                data.add_field(name, stack.enter_context(item.media.stream()), filename=item.media.name or name)
+                items.append(item.to_dict(name))
 
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendPhoto', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+            data.add_field('media', json.dumps(items, ensure_ascii=False))
 
-    def message(self, _filters: Callable[[Message], any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[List[str], Tuple[str], str]=None, state: State=None) -> Callable:
+            response = await self.__request__.post(methods.method_url(self.api_url, self.token, 'sendMediaGroup'), data=data)
+
+        return [Message(message, self) for message in (await response.json())['result']] if response is not None else None
+
+    async def upload_media(self, chat_id: Union[int, str], media: List[InputMedia]) -> List[InputMedia]:
+        """
+        Параллельно загружает файлы из media в чат chat_id и возвращает копии InputMedia с file_id вместо файлов.
+        Полученные InputMedia можно отправлять в любые чаты без повторной загрузки.
+
+        Args:
+            chat_id (Union[int, str]): Чат для загрузки, например закрытый канал.
+            media (List[InputMedia]): Файлы.
+
+        Returns:
+            List[InputMedia]: Те же файлы с file_id.
+        """
+        uploads = [item for item in media if not isinstance(item.media, str)]
+        file_ids = iter(await asyncio.gather(*(self.__upload_media__(chat_id, item) for item in uploads)))
+
+        return [item if isinstance(item.media, str) else item.with_media(next(file_ids)) for item in media]
+
+    async def __upload_media__(self, chat_id: Union[int, str], item: InputMedia) -> str:
+        """
+        Загружает один файл и возвращает его file_id.
+        """
+        with item.media.stream() as stream:
+            data = aiohttp.FormData()
+            data.add_field('chat_id', str(chat_id))
+            data.add_field('disable_notification', 'true')
+            data.add_field(item.type, stream, filename=item.media.name or item.type)
+
+            response = await self.__request__.post(methods.method_url(self.api_url, self.token, f'send{item.type.capitalize()}'), data=data)
+
+        result = (await response.json())['result'][item.type]
+
+        return (result[-1] if isinstance(result, list) else result)['file_id']
+
+    def message(self, _filters: Callable[[Message], any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[List[str], Tuple[str], str]=None, state: State=None, priority: int=None, regexp: Union[str, Pattern]=None, text_pattern: str=None) -> Callable:
         """
         Декоратор для обработки входящих сообщений.
 
@@ -278,15 +398,21 @@ class AsyncBot:
             commands (Union[str, List[str]], optional): Команды, на которые должен реагировать обработчик.
             allowed_chat_type (Union[List[str], Tuple[str], str], optional): Типы чатов, в которых активен обработчик.
             state (State, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
+            regexp (Union[str, Pattern], optional): Регулярное выражение для текста (или подписи) сообщения, проверяется с начала текста.
+                Совпадение передаётся в обработчик параметром `match`, именованные группы - параметрами с их именами.
+            text_pattern (str, optional): Шаблон всего текста в стиле fnmatch ('привет*'), вместо regexp.
 
         Returns:
             Callable: Функция-обертка, которая регистрирует обработчик сообщений.
         """
+        pattern = compile_pattern(regexp, text_pattern)
+
         def wrapper(func):
-            self._message_handlers.append({'func': func, 'filters': _filters, 'content_types': content_types, 'commands': commands, 'allowed_chat_type': allowed_chat_type, 'state': state})
+            self._message_handlers.append({'func': func, 'filters': _filters, 'content_types': content_types, 'commands': commands, 'allowed_chat_type': allowed_chat_type, 'state': state, 'priority': priority, 'regexp': pattern})
         return wrapper
 
-    def message_handler(self, _filters: Callable[[Message], any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[List[str], Tuple[str], str]=None, state: State=None) -> Callable:
+    def message_handler(self, _filters: Callable[[Message], any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[List[str], Tuple[str], str]=None, state: State=None, priority: int=None, regexp: Union[str, Pattern]=None, text_pattern: str=None) -> Callable:
         """
         Декоратор для обработки входящих сообщений, предназначенный для миграции из aiogram2 в EasyGram.
 
@@ -296,15 +422,21 @@ class AsyncBot:
             commands (Union[str, List[str]], optional): Команды, на которые должен реагировать обработчик.
             allowed_chat_type (Union[List[str], Tuple[str], str], optional): Типы чатов, в которых активен обработчик.
             state (State, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
+            regexp (Union[str, Pattern], optional): Регулярное выражение для текста (или подписи) сообщения, проверяется с начала текста.
+                Совпадение передаётся в обработчик параметром `match`, именованные группы - параметрами с их именами.
+            text_pattern (str, optional): Шаблон всего текста в стиле fnmatch ('привет*'), вместо regexp.
 
         Returns:
             Callable: Функция-обертка, которая регистрирует обработчик сообщений.
         """
+        pattern = compile_pattern(regexp, text_pattern)
+
         def wrapper(func):
-            self._message_handlers.append({'func': func, 'filters': _filters, 'content_types': content_types, 'commands': commands, 'allowed_chat_type': allowed_chat_type, 'state': state})
+            self._message_handlers.append({'func': func, 'filters': _filters, 'content_types': content_types, 'commands': commands, 'allowed_chat_type': allowed_chat_type, 'state': state, 'priority': priority, 'regexp': pattern})
         return wrapper
 
-    def callback_query(self, _filters: Callable[[CallbackQuery], any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None) -> Callable:
+    def callback_query(self, _filters: Callable[[CallbackQuery], any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, callback_data: Union[CallbackData, CallbackDataFilter]=None) -> Callable:
         """
         Декоратор для обработки callback-запросов от InlineKeyboardMarkup.
 
@@ -312,15 +444,20 @@ class AsyncBot:
             _filters (Callable[[CallbackQuery], any], optional): Функция фильтрации запросов.
             allowed_chat_type (Union[str, List[str], Tuple[str]], optional): Типы чатов, в которых активен обработчик.
             state (State, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
+            callback_data (Union[CallbackData, CallbackDataFilter], optional): Фабрика callback_data или `factory.filter(...)`.
+                Обработчик ищется по префиксу, поля передаются в обработчик параметрами с их именами.
 
         Returns:
             Callable: Функция-обертка, которая регистрирует обработчик запросов.
         """
+        callback_filter = as_filter(callback_data)
+
         def wrapper(func):
-            self._callback_query_handlers.append({'func': func, 'filters': _filters, 'allowed_chat_type': allowed_chat_type, 'state': state})
+            self._callback_query_handlers.append({'func': func, 'filters': _filters, 'allowed_chat_type': allowed_chat_type, 'state': state, 'priority': priority, 'callback_data': callback_filter})
         return wrapper
 
-    def callback_query_handler(self, _filters: Callable[[CallbackQuery], any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None) -> Callable:
+    def callback_query_handler(self, _filters: Callable[[CallbackQuery], any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, callback_data: Union[CallbackData, CallbackDataFilter]=None) -> Callable:
         """
         Декоратор для обработки callback-запросов от InlineKeyboardMarkup, предназначенный для миграции из aiogram2 в EasyGram.
 
@@ -328,43 +465,51 @@ class AsyncBot:
             _filters (Callable[[CallbackQuery], any], optional): Функция фильтрации запросов.
             allowed_chat_type (Union[str, List[str], Tuple[str]], optional): Типы чатов, в которых активен обработчик.
             state (State, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
+            callback_data (Union[CallbackData, CallbackDataFilter], optional): Фабрика callback_data или `factory.filter(...)`.
+                Обработчик ищется по префиксу, поля передаются в обработчик параметрами с их именами.
 
         Returns:
             Callable: Функция-обертка, которая регистрирует обработчик запросов.
         """
+        callback_filter = as_filter(callback_data)
+
         def wrapper(func):
-            self._callback_query_handlers.append({'func': func, 'filters': _filters, 'allowed_chat_type': allowed_chat_type, 'state': state})
+            self._callback_query_handlers.append({'func': func, 'filters': _filters, 'allowed_chat_type': allowed_chat_type, 'state': state, 'priority': priority, 'callback_data': callback_filter})
         return wrapper
     
-    def poll_handler(self, _filters: Callable[[Poll], any]=None) -> Callable:
+    def poll_handler(self, _filters: Callable[[Poll], any]=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки опросов, предназначенный для миграции из pyTelegramBotAPI в EasyGram.
 
         Args:
             _filters (Callable[[Poll], any], optional): Функция фильтрации опросов.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
         """
 
         def wrapper(func):
-            self._poll_handlers.append({'func': func, 'filters': _filters})
+            self._poll_handlers.append({'func': func, 'filters': _filters, 'priority': priority})
         return wrapper
     
-    def poll(self, _filters: Callable[[Poll], any]=None) -> Callable:
+    def poll(self, _filters: Callable[[Poll], any]=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки опросов, предназначенный для миграции из pyTelegramBotAPI в EasyGram.
 
         Args:
             _filters (Callable[[Poll], any], optional): Функция фильтрации опросов.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
         """
 
         def wrapper(func):
-            self._poll_handlers.append({'func': func, 'filters': _filters})
+            self._poll_handlers.append({'func': func, 'filters': _filters, 'priority': priority})
         return wrapper
     
-    def poll_answer_handler(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None) -> Callable:
+    def poll_answer_handler(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки ответов на опросы.
         :param _filters: лямбда
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
         :return: Callable
         """
 
@@ -372,16 +517,18 @@ class AsyncBot:
             self._poll_answer_handlers.append({
                 'func': func,
                 'filters': _filters,
-                'state': state
+                'state': state,
+                'priority': priority
             })
         
         return wrapper
 
-    def poll_answer(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None) -> Callable:
+    def poll_answer(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки ответов на опросы.
         :param _filters: лямбда
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
         :return: Callable
         """
 
@@ -389,7 +536,8 @@ class AsyncBot:
             self._poll_answer_handlers.append({
                 'func': func,
                 'filters': _filters,
-                'state': state
+                'state': state,
+                'priority': priority
             })
         
         return wrapper
@@ -406,14 +554,8 @@ class AsyncBot:
         Returns:
             bool: Возвращает True, если ответ был успешно отправлен.
         """
-        parameters = {
-            'callback_query_id': chat_id,
-            'text': str(text),
-            'show_alert': show_alert
-        }
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/answerCallbackQuery', json=parameters)
-        return (await response.json())['ok'] if response is not None else False
+        response = await self.__call_api__(methods.ANSWER_CALLBACK_QUERY.build({'query_id': chat_id, 'text': text, 'show_alert': show_alert}))
+        return response['ok']
 
     async def delete_message(self, chat_id: Union[int, str], message_ids: Union[list, int]) -> bool:
         """
@@ -428,15 +570,10 @@ class AsyncBot:
         Returns:
             bool: Возвращает True, если сообщение было успешно удалено.
         """
-        parameters = {
-            'chat_id': chat_id,
-            'message_id': message_ids
-        }
+        response = await self.__call_api__(methods.DELETE_MESSAGE.build({'chat_id': chat_id, 'message_id': message_ids}))
+        return response['ok']
 
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/deleteMessage', json=parameters)
-        return (await response.json())['ok'] if response is not None else False
-
-    async def edit_message_text(self, chat_id: Union[int, str], message_id: int, text: Union[int, float, str], parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, disable_web_page_preview: bool=False) -> bool:
+    async def edit_message_text(self, chat_id: Union[int, str], message_id: int, text: Union[int, float, str], parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, disable_web_page_preview: bool=False, coalesce: bool=False) -> bool:
         """
         Редактирует текст существующего сообщения.
         - Обратите внимание, что деловые сообщения, которые не были отправлены ботом и не содержат встроенной клавиатуры, можно редактировать только в течение 48 часов с момента отправки.
@@ -447,33 +584,19 @@ class AsyncBot:
             text (Union[int, float, str]): Новый текст сообщения.
             parse_mode (Union[str, ParseMode], optional): Режим форматирования текста.
             reply_markup (Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None], optional): Клавиатура для сообщения.
+            coalesce (bool, optional): Объединять частые правки этого сообщения (прогресс-бар): правка отправляется не чаще `bot.edit_coalescer.interval` секунд,
+                ожидающая правка заменяется новой, и все вызовы получают результат последней отправленной правки.
 
         Returns:
             bool: Возвращает True, если сообщение было успешно отредактировано.
         """
+        payload = methods.EDIT_MESSAGE_TEXT.build(locals())
 
-        parameters = {
-            "chat_id": chat_id,
-            "message_id": message_id,
-            "text": str(text),
-            "link_preview_options": {
-                "is_disabled": disable_web_page_preview
-            }
-        }
+        if coalesce:
+            return (await self.edit_coalescer.submit(payload.method, payload.parameters))['ok']
 
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-        
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/editMessageText', json=parameters)
-        return (await response.json())['ok'] if response is not None else False
+        response = await self.__call_api__(payload)
+        return response['ok']
 
     async def send_poll(self, chat_id: Union[int, str], question: Union[int, float, str], options: Union[List[PollOption], List[str]], question_parse_mode: Union[str, ParseMode]=None, is_anonymous: bool=True, type: str='regular', allows_multiple_answers: bool=False, correct_option_id: int=0, explanation: str=None, explanation_parse_mode: Union[str, ParseMode]=None, open_period: int=None, is_closed: bool=False, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -498,57 +621,29 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, содержащий опрос.
         """
-        parameters = {
-            "chat_id": chat_id,
-            "question": str(question),
-            "type": type,
-            "allows_multiple_answers": allows_multiple_answers,
-            "is_closed": is_closed
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
         if len(options) < 2:
             try:
                 raise Telegram('В списке параметра options должно быть минимум 2 элемента.')
             except Telegram as e:
                 traceback.print_exc(e)
+
+            options = None
         elif len(options) > 10:
             try:
                 raise Telegram('В списке параметра options должно быть максимум 10 элементов.')
             except Telegram as e:
                 traceback.print_exc(e)
-        else:
-            parameters['options'] = []
-            for option in options:
-                if isinstance(option, PollOption):
-                    _opt = {"text": option.text}
-                    if option.text_parse_mode is not None: _opt.update({"text_parse_mode": option.text_parse_mode})
-                    parameters['options'].append(_opt)
-                else:
-                    parameters['options'].append({"text": option})
-
-        if type == 'quiz':
-            parameters['correct_option_id'] = correct_option_id
-
-        if explanation is not None:
-            parameters['explanation'] = explanation
-            if explanation_parse_mode is not None: parameters['explanation_parse_mode'] = explanation_parse_mode
-
-        reply_markup = self.handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-
-        if open_period is not None:
-            parameters['open_period'] = open_period
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendPoll', json=parameters)
-        return Message((await response.json())['result'], self) if response is not None else None
+
+            options = None
+
+        if type != 'quiz':
+            correct_option_id = None
+
+        if explanation is None:
+            explanation_parse_mode = None
+
+        response = await self.__call_api__(methods.SEND_POLL.build(locals()))
+        return Message(response['result'], self)
 
     async def send_audio(self, chat_id: Union[int, str], audio: Union[InputFile], title: str=None, caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -566,41 +661,11 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        if title is None: parameters['title'] = 'audio'
-        else: parameters['title'] = title
-
-        parameters['audio'] = audio
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-
-        data = aiohttp.FormData()
-
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.loads(parameters[param]))
-                continue
-            data.add_field(param, str(parameters[param]))
+        if title is None:
+            title = 'audio'
 
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendAudio', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_AUDIO.build(locals()))
+        return Message(response['result'], self)
 
     async def send_document(self, chat_id: Union[int, str], document: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -617,46 +682,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        parameters['document'] = document.file
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-
-        data = aiohttp.FormData()
-
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.dumps(parameters[param], ensure_ascii=False))
-                continue
-            elif param == 'document':
-                data.add_field(
-                    'document',
-                    parameters[param],
-                    filename=getattr(document.file, 'name', 'document.bin')
-                )
-                continue
-            data.add_field(param, str(parameters[param]))
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendDocument', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_DOCUMENT.build(locals()))
+        return Message(response['result'], self)
 
     async def send_animation(self, chat_id: Union[int, str], animation: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -673,38 +700,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        parameters['animation'] = animation
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-
-        data = aiohttp.FormData()
-
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.loads(parameters[param]))
-                continue
-            data.add_field(param, str(parameters[param]))
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendAnimation', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_ANIMATION.build(locals()))
+        return Message(response['result'], self)
 
     async def send_voice(self, chat_id: Union[int, str], voice: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -721,38 +718,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        parameters['voice'] = voice
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-
-        data = aiohttp.FormData()
-
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.loads(parameters[param]))
-                continue
-            data.add_field(param, str(parameters[param]))
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendVoice', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_VOICE.build(locals()))
+        return Message(response['result'], self)
 
     async def send_video_note(self, chat_id: Union[int, str], video_note: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -769,38 +736,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        parameters['video_note'] = video_note
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-
-        data = aiohttp.FormData()
-
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.loads(parameters[param]))
-                continue
-            data.add_field(param, str(parameters[param]))
-        
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendVideoNote', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_VIDEO_NOTE.build(locals()))
+        return Message(response['result'], self)
 
     async def send_video(self, chat_id: Union[int, str], video: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -817,38 +754,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        parameters['video'] = video
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-
-        data = aiohttp.FormData()
-
-        for param in parameters:
-            if param == 'reply_markup':
-                data.add_field(param, json.loads(parameters[param]))
-                continue
-            data.add_field(param, str(parameters[param]))
-
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendVideo', data=data)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_VIDEO.build(locals()))
+        return Message(response['result'], self)
 
     async def send_contact(self, chat_id: Union[int, str], number: Union[InputFile], first_name: str, last_name: str=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -865,28 +772,8 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id,
-            "first_name": first_name
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        parameters['number'] = number
-
-        if last_name is not None: parameters['last_name'] = last_name
-
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendContact', json=parameters)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_CONTACT.build(locals()))
+        return Message(response['result'], self)
 
     async def send_dice(self, chat_id: Union[int, str], emoji: str, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -901,26 +788,11 @@ class AsyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
         if emoji not in ['🎲', '🎯', '🏀', '⚽', '🎳', '🎰']:
             raise TypeError(f'Эмодзи {emoji} не поддерживается.')
 
-        reply_markup = self.handle_reply_markup(reply_markup, async_mode=True)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize}, ensure_ascii=False)
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = json.dumps({'inline_keyboard': reply_markup.rows}, ensure_ascii=False)
-
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendDice', json=parameters)
-        return Message((await response.json())['result'], self) if response is not None else None
+        response = await self.__call_api__(methods.SEND_DICE.build(locals()))
+        return Message(response['result'], self)
 
     async def send_chat_action(self, chat_id: Union[int, str], action: Union[str, ChatAction]) -> bool:
         """
@@ -933,13 +805,8 @@ class AsyncBot:
         Returns:
             bool: True, если действие отправлено успешно, иначе False.
         """
-        parameters = {
-            "chat_id": chat_id,
-            "action": action
-        }
-
-        response = await self.__request__.post(f'https://api.telegram.org/bot{self.token}/sendChatAction', json=parameters)
-        return (await response.json())['ok'] if response is not None else False
+        response = await self.__call_api__(methods.SEND_CHAT_ACTION.build(locals()))
+        return response['ok']
     
     async def next_step_handler(self, chat_id: int, callback: Callable, *args):
         """
@@ -970,16 +837,65 @@ class AsyncBot:
         self._query_next_step_handlers.append((str(chat_id), callback, args))
     
     async def get_file(self, file_id: str) -> File:
-        response = await self.__request__.get(f'https://api.telegram.org/bot{self.token}/getFile', json={'file_id': file_id})
-        tojson = await response.json()
+        tojson = await self.__call_api__(methods.GET_FILE.build(locals()))
 
         return File(tojson['result']['file_id'], tojson['result']['file_unique_id'], tojson['result']['file_size'], tojson['result']['file_path'])
+
+    async def get_chat(self, chat_id: Union[int, str]) -> Chat:
+        """
+        Получает информацию о чате.
+
+        Args:
+            chat_id (Union[int, str]): Идентификатор чата или username канала.
+
+        Returns:
+            Chat: Объект чата.
+        """
+        return Chat((await self.__call_api__(methods.GET_CHAT.build(locals())))['result'])
+
+    async def get_chat_member(self, chat_id: Union[int, str], user_id: int) -> ChatMember:
+        """
+        Получает информацию об участнике чата.
+
+        Args:
+            chat_id (Union[int, str]): Идентификатор чата.
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            ChatMember: Статус пользователя в чате.
+        """
+        return ChatMember((await self.__call_api__(methods.GET_CHAT_MEMBER.build(locals())))['result'])
     
-    async def download_file(self, file_path: str) -> BytesIO:
-        response =  await self.__request__.get(f'https://api.telegram.org/file/bot{self.token}/'+file_path)
+    async def download_file(self, file_path: Union[str, File], mapped: bool=False) -> Union[BytesIO, mmap.mmap]:
+        """
+        Скачивает файл.
+
+        Args:
+            file_path (Union[str, File]): file_path из getFile или File (например, из get_file).
+                Одновременные скачивания одного File (по file_unique_id) объединяются в одно, скачанный File сохраняется в download_cache.
+                Для File без file_path getFile вызывается, только если файла нет в download_cache.
+            mapped (bool): Для File, сохранённого в download_cache на диске - вернуть mmap.mmap (только чтение) вместо копии в памяти.
+
+        Returns:
+            Union[BytesIO, mmap.mmap]: Содержимое файла.
+        """
+        if not isinstance(file_path, str):
+            file = file_path
+
+            async def download() -> bytes:
+                # getFile только при реальном скачивании: файл из кэша и одновременные вызовы его не запрашивают
+                path = file.file_path if file.file_path is not None else (await self.get_file(file.file_id)).file_path
+
+                return await self.__request__.get(methods.file_url(self.api_url, self.token, path))
+
+            data = await self.download_cache.afetch(file.file_unique_id, download, mapped)
+
+            return BytesIO(data) if isinstance(data, bytes) else data
+
+        response = await self.__request__.get(methods.file_url(self.api_url, self.token, file_path))
         return BytesIO(response)
     
-    async def edit_message_reply_markup(self, chat_id: Union[int, str]=None, message_id: Union[int, str]=None, inline_message_id: Union[int, str]=None, reply_markup: Union[InlineKeyboardMarkup, InlineKeyboardButton, list[list[InlineKeyboardButton]]]=None) -> bool:
+    async def edit_message_reply_markup(self, chat_id: Union[int, str]=None, message_id: Union[int, str]=None, inline_message_id: Union[int, str]=None, reply_markup: Union[InlineKeyboardMarkup, InlineKeyboardButton, list[list[InlineKeyboardButton]]]=None, coalesce: bool=False) -> bool:
         """
         Меняет inline кнопки.
 
@@ -988,233 +904,242 @@ class AsyncBot:
             message_id (int | str): Айди сообщения.
             inline_message_id (int | str): Требуется, если chat_id и message_id не указаны. Идентификатор встроенного сообщения
             reply_markup (types.InlineKeyboardMarkup | types.InlineKeyboardButton): Кнопки.
+            coalesce (bool): Объединять частые правки кнопок этого сообщения, см. edit_message_text.
         Return:
             bool
         """
+        payload = methods.EDIT_MESSAGE_REPLY_MARKUP.build(locals())
 
-        parameters = {}
+        if coalesce:
+            return (await self.edit_coalescer.submit(payload.method, payload.parameters))['ok']
 
-        if chat_id is not None:
-            parameters['chat_id'] = chat_id
-        
-        if message_id is not None:
-            parameters['message_id'] = message_id
-        
-        if inline_message_id:
-            parameters['inline_message_id'] = inline_message_id
-
-        if reply_markup is not None:
-            if isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-            elif isinstance(reply_markup, InlineKeyboardButton):
-                parameters['reply_markup'] = {'inline_keyboard': [[reply_markup.keyboard]]}
-            elif isinstance(reply_markup, list):
-                parameters['reply_markup'] = {'inline_keyboard': InlineKeyboardMarkup(builder=reply_markup)}
-        
-        response = await self.__request__.get(f'https://api.telegram.org/bot{self.token}/editMessageReplyMarkup', json=parameters)
-        return response.ok
+        response = await self.__call_api__(payload)
+        return response['ok']
+
+    async def __call_api__(self, payload: methods.Payload) -> dict:
+        """
+        Отправляет запрос, собранный MethodSpec.build: без файлов - JSON, с файлами - multipart/form-data, файлы передаются потоком.
+
+        Args:
+            payload (Payload): Запрос.
 
-    async def polling(self, on_startup: Callable=None, threaded_run: bool=False, *args) -> None:
+        Returns:
+            dict: Ответ Bot API целиком ({'ok': ..., 'result': ...}).
+        """
+        url = methods.method_url(self.api_url, self.token, payload.method)
+
+        if not payload.files:
+            return await self.__request__.call(url, json=payload.parameters)
+
+        with ExitStack() as stack:
+            return await self.__request__.call(url, data=payload.form_data(stack))
+
+    async def __send_edit__(self, method: str, parameters: dict) -> dict:
+        """
+        Отправляет правку, которую выбрал edit_coalescer.
+        """
+        return await self.__call_api__(methods.Payload(method, parameters))
+
+    def include_router(self, router: Router) -> None:
+        """
+        Подключает роутер: его обработчики (и зарегистрированные в нём позже) добавляются к обработчикам бота.
+
+        Args:
+            router (Router): Роутер.Обработчики в нём могут быть корутинами.
+        """
+        include_router(self, router)
+
+    def add_middleware(self, middleware: BaseMiddleware) -> None:
+        """
+        Добавляет middleware, которое вызывается один раз на каждое обновление до и после обработчиков.
+
+        Args:
+            middleware (BaseMiddleware): Объект middleware.Методы pre_process/post_process могут быть корутинами.
+        """
+        self._middlewares.append(middleware)
+
+    def set_priority(self, update_type: str, priority: int) -> None:
+        """
+        Задаёт приоритет типа обновления в очереди (для обработчиков без своего `priority`).
+
+        Args:
+            update_type (str): 'message', 'command' (сообщения с командой), 'callback_query', 'poll' или 'poll_answer'.
+            priority (int): Приоритет (Priority), обновления с большим приоритетом обрабатываются раньше.
+        """
+        self.priorities[update_type] = priority
+
+    def middleware(self, update_types: Union[str, List[str]]=None) -> Callable:
+        """
+        Декоратор для middleware-функции `func(update, data)`, функция может быть корутиной.Если она вернёт False, обновление пропускается.
+
+        Args:
+            update_types (Union[str, List[str]], optional): Типы обновлений, для которых вызывается функция.
+        """
+
+        def wrapper(func):
+            self.add_middleware(FunctionMiddleware(func, update_types))
+            return func
+        return wrapper
+
+    async def process_new_updates(self, updates: List[dict]) -> None:
+        """
+        Обрабатывает список обновлений, например полученных через webhook.
+
+        Args:
+            updates (List[dict]): Обновления в виде словарей.
+        """
+        for update in updates:
+            try:
+                await self._process_update(update)
+            except Exception:
+                self.logger.error(traceback.format_exc())
+
+    async def _process_update(self, update: dict) -> None:
+        """
+        Прогоняет обновление через middleware и запускает найденные обработчики.
+        """
+        data = {}
+        middlewares = []
+
+        for middleware in self._middlewares:
+            if not middleware.check(update):
+                continue
+
+            middlewares.append(middleware)
+
+            if await maybe_await(middleware.pre_process(update, data)) is False:
+                await self.__post_process__(middlewares, update, data, None)
+                return
+
+        try:
+            calls = route_update(self, update, data, types)
+        except Exception as e:
+            await self.__post_process__(middlewares, update, data, e)
+            raise
+
+        await self.__work_lunch__(calls, middlewares, update, data)
+
+    async def polling(self, on_startup: Callable=None, threaded_run: bool=False, *args, journal: UpdateJournal=None, update_queue: AsyncUpdateQueue=None, workers: int=100) -> None:
         """
         Запускает процесс опроса сервера Telegram для получения обновлений.
 
         Args:
             on_startup (Callable, optional): Функция, вызываемая при запуске опроса.
-            threaded_run (bool, optional): Если True, опрос выполняется в отдельных потоках.
-            thread_max_works (int, optional): Максимальное количество потоков.
+            threaded_run (bool, optional): Оставлен для совместимости: обработчики всегда выполняются в цикле событий, а их одновременность ограничивает workers.
             args: Дополнительные аргументы, передаваемые в функцию on_startup.
+            journal (UpdateJournal, optional): Журнал обновлений на диске.Необработанные до перезапуска обновления обрабатываются повторно.
+            update_queue (AsyncUpdateQueue, optional): Очередь между получением обновлений и обработчиками.
+                По умолчанию AsyncUpdateQueue(1000, 'block'): когда обработчики не успевают, получение обновлений ждёт.Метрики - `bot.update_queue.stats()`.
+                Обновления забираются по приоритету (см. set_priority и аргумент priority у декораторов).
+            workers (int, optional): Сколько обновлений обрабатывается одновременно.
 
         Returns:
             None
         """
 
-        if on_startup is not None:  asyncio.run(on_startup(args))
+        await self.start()
+
+        if on_startup is not None:  await maybe_await(on_startup(args))
+
+        self.update_queue = AsyncUpdateQueue() if update_queue is None else update_queue
+
+        if self.update_queue.priority is None:
+            self.update_queue.priority = lambda update: get_priority(self, update)
+
+        if journal is not None:
+            self.update_queue.add_drop_callback(lambda update: journal.ack(update['update_id']))
+
+        tasks = [asyncio.ensure_future(self.__queue_worker__(self.update_queue)) for _ in range(workers)]
+
+        try:
+            if journal is not None:
+                for update in journal.attach(self):
+                    await self.update_queue.put(update)
+
+            while True:
+                try:
+                    async with await self.__request__.get(methods.method_url(self.api_url, self.token, 'getUpdates'), params={"offset": self.offset, "timeout": 30, "allowed_updates": ["message", "callback_query", "poll", "poll_answer"]}) as response:
+                        if response.status != 200:
+                            continue
+                        
+                        updates = response
+
+                        updates = (await updates.json())["result"]
+
+                    if journal is not None and updates:
+                        # Запись с fsync блокирует, поэтому выполняется вне цикла событий
+                        await asyncio.get_running_loop().run_in_executor(None, journal.append, updates)
+
+                    for update in updates:
+                        self.offset = update["update_id"] + 1
 
+                        await self.update_queue.put(update)
+                except Exception as e:
+                    self.logger.error(traceback.format_exc())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            self.update_queue.close()
+
+            if journal is not None:
+                await asyncio.get_running_loop().run_in_executor(None, journal.close)
+
+    async def __queue_worker__(self, update_queue: AsyncUpdateQueue) -> None:
+        """
+        Задача-обработчик: забирает обновления из очереди и дожидается их обработчиков.
+        """
         while True:
+            update = await update_queue.get()
+
             try:
-                async with await self.__request__.get(f'https://api.telegram.org/bot{self.token}/getUpdates', params={"offset": self.offset, "timeout": 30, "allowed_updates": ["message", "callback_query", "poll"]}) as response:
-                    if response.status != 200:
-                        continue
-                    
-                    updates = response
-
-                    updates = (await updates.json())["result"]
-
-                for update in updates:
-                    self.offset = update["update_id"] + 1
-
-                    if update.get('message', False):
-                        for indx, step in enumerate(self._next_step_handlers):
-                            if str(update['message']['chat']['id']) == step[0]:
-                                if threaded_run:
-                                    self.__executor__.submit(self.__run_with_try_except__, step[1], Message(update['message'], self), *step[2])
-                                else:
-                                    self.__run_with_try_except__(step[1], Message(update['message'], self), *step[2])
-                                
-                                self._next_step_handlers.pop(indx)
-                                break
-                        
-                        for handler_message in self._message_handlers:
-                            if handler_message['filters'] is not None and not handler_message['filters'](Message(update['message'], self)):
-                                continue
-
-                            if handler_message['commands'] is not None:
-                                if not update['message'].get('text', False):
-                                    continue
-
-                                if isinstance(handler_message['commands'], list):
-                                    if not any(update['message']['text'].split()[0] == '/'+command for command in handler_message['commands']):
-                                        continue
-                                elif isinstance(handler_message['commands'], str):
-                                    if not update['message']['text'].startswith('/'+handler_message['commands']):
-                                        continue
-
-                            if handler_message['content_types'] is not None:
-                                if isinstance(handler_message['content_types'], str) and handler_message['content_types'].lower() != 'any':
-                                    if not update['message'].get(handler_message['content_types'], False):
-                                        continue
-                                elif isinstance(handler_message['content_types'], list):
-                                    if not any(update['message'].get(__type, False) and __type.lower() == 'any' for __type in handler_message['content_types']):
-                                        continue
-                            
-                            if handler_message['allowed_chat_type'] is not None:
-                                if isinstance(handler_message['allowed_chat_type'], str):
-                                    if update['message']['chat']['type'] != handler_message['allowed_chat_type']:
-                                        continue
-                                elif isinstance(handler_message['allowed_chat_type'], (tuple, list)):
-                                    if not any(update['message']['chat']['type'] == _chat_type for _chat_type in handler_message['allowed_chat_type']):
-                                        continue
-
-                            if handler_message['state'] is not None:
-                                if update['message']['from']['id'] not in StatesGroup.user_registers:
-                                    continue
-
-                                if handler_message['state'] != StatesGroup.user_registers[update['message']['from']['id']]['state']:
-                                    continue
-
-                            message = Message(update['message'], self)
-                            parameters = [message]
-                            parameters.append(FSMContext(message.from_user.id))
-                            
-                            is_method = inspect.ismethod(handler_message['func'])
-                            _parameters = list(inspect.signature(handler_message['func']).parameters)
-
-                            if is_method and len(_parameters) > 0: _parameters.pop(0)
-
-                            if len(_parameters) == 1: parameters.pop(1)
-
-                            if threaded_run:
-                                self.__executor__.submit(self.__run_with_try_except, handler_message['func'], *parameters)
-                            else:
-                                self.__run_with_try_except__(handler_message['func'], *parameters)
-                                
-                            break
-                    elif update.get('callback_query', False):
-                        for indx, step in enumerate(self._query_next_step_handlers):
-                            if str(update['callback_query']['message']['chat']['id']) == step[0]:
-                                if threaded_run:
-                                    self.__executor__.submit(self.__run_with_try_except__, step[1], CallbackQuery(update['callback_query'], self), *step[2])
-                                else:
-                                    self.__run_with_try_except__(step[1], CallbackQuery(update['callback_query'], self), *step[2])
-                                
-                                self._query_next_step_handlers.pop(indx)
-                                break
-
-                        for callback in self._callback_query_handlers:
-                            if callback['filters'] is not None and not callback['filters'](CallbackQuery(update['callback_query'], self)):
-                                continue
-
-                            if callback['allowed_chat_type'] is not None:
-                                if isinstance(callback['allowed_chat_type'], str):
-                                    if update['callback_query']['message']['chat']['type'] != callback['allowed_chat_type']:
-                                        continue
-                                elif isinstance(callback['allowed_chat_type'], (tuple, list)):
-                                    if not any(update['callback_query']['message']['chat']['type'] == _chat_type for _chat_type in callback['allowed_chat_type']):
-                                        continue
-
-                            if callback['state'] is not None:
-                                if update['callback_query']['message']['from']['id'] not in StatesGroup.user_registers:
-                                    continue
-
-                                if callback['state'] != StatesGroup.user_registers[update['callback_query']['message']['from']['id']]['state']:
-                                    continue
-                            
-                            callback_query = CallbackQuery(update['callback_query'], self)
-                            parameters = [callback_query]
-                            parameters.append(FSMContext(callback_query.from_user.id))
-
-                            is_method = inspect.ismethod(callback['func'])
-                            _parameters = list(inspect.signature(callback['func']).parameters)
-
-                            if is_method and len(_parameters) > 0: _parameters.pop(0)
-
-                            if len(_parameters) == 1: parameters.pop(1)
-
-                            if threaded_run:
-                                self.__executor__.submit(self.__run_with_try_except__, callback['func'], *parameters)
-                            else:
-                                self.__run_with_try_except__(callback['func'], *parameters)
-                            
-                            break
-                    elif update.get('poll', False):
-                        for poll in self._poll_handlers:
-                            if poll['filters'] is not None and not poll['filters'](Poll(update['poll'])):
-                                continue
-                            
-                            _poll = Poll(update['poll'])
-
-                            if threaded_run:
-                                self.__executor__.submit(poll['func'], _poll)
-                            else:
-                                self.__run_with_try_except__(poll['func'], _poll)
-                            
-                            break
-                    elif update.get('poll_answer', False):
-                        for poll_answer in self._poll_handlers:
-                            if poll_answer['filters'] is not None and not poll_answer['filters'](PollAnswer(update['poll_answer'])):
-                                continue
-
-                            if poll_answer['state'] is not None:
-                                if update['poll_answer']['user']['id'] not in StatesGroup.user_registers:
-                                    continue
-
-                                if poll_answer['state'] != StatesGroup.user_registers[update['poll_answer']['user']['id']]['state']:
-                                    continue
-                            
-                            _poll = PollAnswer(update['poll_answer'])
-
-                            if threaded_run:
-                                self.__executor__.submit(self.__run_with_try_except__, poll_answer['func'], _poll)
-                            else:
-                                self.__run_with_try_except__(poll_answer['func'], _poll)
-                            
-                            break
+                await self._process_update(update)
             except Exception as e:
                 self.logger.error(traceback.format_exc())
+            finally:
+                await update_queue.task_done(update)
 
-    def executor(self, on_startup: Callable=None, threaded_run: bool=False, *args) -> None:
+    def executor(self, on_startup: Callable=None, threaded_run: bool=False, *args, journal: UpdateJournal=None, update_queue: AsyncUpdateQueue=None, workers: int=100) -> None:
         """
-        Запускает бота с возможностью использования многопоточности.
+        Запускает бота в новом цикле событий (asyncio.run) и закрывает его сессию после остановки.
 
         Args:
             on_startup (Callable, optional): Функция, вызываемая при запуске.
-            threaded_run (bool, optional): Если True, используется многопоточность.
-            thread_max_works (int, optional): Максимальное количество потоков.
+            threaded_run (bool, optional): Оставлен для совместимости, см. polling.
             args: Дополнительные аргументы.
+            journal (UpdateJournal, optional): Журнал обновлений на диске.
+            update_queue (AsyncUpdateQueue, optional): Очередь между получением обновлений и обработчиками.
+            workers (int, optional): Сколько обновлений обрабатывается одновременно.
 
         Returns:
             None
         """
         
-        if on_startup is not None: self.__loop__.run_until_complete(on_startup(self))
+        async def main():
+            async with self:
+                if on_startup is not None: await on_startup(self)
 
-        self.__loop__.run_until_complete(self.polling(threaded_run=threaded_run, *args))
-    
-    def __run_with_try_except__(self, func: Callable, *args):
-        asyncio.run_coroutine_threadsafe(self.__work_lunch__(func, *args), self.__loop__)
+                await self.polling(None, threaded_run, *args, journal=journal, update_queue=update_queue, workers=workers)
+
+        asyncio.run(main())
     
-    async def __work_lunch__(self, func: Callable, *args):
-        try:
-            await func(*args)
-        except:
-            self.logger.error(traceback.format_exc())
\ No newline at end of file
+    async def __work_lunch__(self, calls: List[Tuple[Callable, list, dict]], middlewares: List[BaseMiddleware], update: dict, data: dict):
+        exception = None
+
+        for func, args, kwargs in calls:
+            try:
+                await maybe_await(func(*args, **kwargs))
+            except Exception as e:
+                exception = e
+                self.logger.error(traceback.format_exc())
+
+        await self.__post_process__(middlewares, update, data, exception)
+
+    async def __post_process__(self, middlewares: List[BaseMiddleware], update: dict, data: dict, exception: BaseException=None):
+        for middleware in reversed(middlewares):
+            try:
+                await maybe_await(middleware.post_process(update, data, exception))
+            except Exception:
+                self.logger.error(traceback.format_exc())
\ No newline at end of file
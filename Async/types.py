@@ -1,5 +1,4 @@
 import aiohttp.client_exceptions
-import requests
 
 from typing_extensions import override
 from typing import Union, List, BinaryIO, Callable, Any, Optional
@@ -8,12 +7,14 @@ from pathlib import Path
 import logging
 import aiohttp
 from asyncio import AbstractEventLoop
+import asyncio
 import traceback
 
 from ..types import (
     Message as BaseMessage,
     User as BaseUser,
     Chat as BaseChat,
+    ChatMember as BaseChatMember,
     ReplyKeyboardMarkup as BaseRKM,
     KeyboardButton as BaseKB,
     InlineKeyboardMarkup as BaseIKM,
@@ -24,9 +25,21 @@ from ..types import (
     ContentType as BaseCnT,
     Poll as BasePoll,
     File as BaseFile,
-    PollAnswer as BasePollAnswer
+    PollAnswer as BasePollAnswer,
+    InputFile as BaseInputFile,
+    InputMedia,
+    InputMediaPhoto,
+    InputMediaVideo,
+    InputMediaAudio,
+    InputMediaDocument,
+    RawJSON,
+    encode_json_body,
+    raise_for_result
 )
 
+from ..log import RequestLogger
+from ..cache import ResponseCache
+
 from ..exception import (
     ButtonParameterErorr,
     Telegram,
@@ -43,7 +56,15 @@ class GetMe:
     id = None
 
     def __init__(self, bot):
-        self.id = requests.get(f'https://api.telegram.org/bot{bot.token}/getMe').json()['result']['id']
+        me = getattr(bot, '_me', None)
+
+        if me is not None:
+            self.id = me.id
+        else:
+            import requests
+            from ..methods import API_URL, method_url
+
+            self.id = requests.get(method_url(getattr(bot, 'api_url', API_URL), bot.token, 'getMe')).json()['result']['id']
 
 class KeyboardButton(BaseKB):
     """
@@ -70,6 +91,8 @@ class ReplyKeyboardMarkup(BaseRKM):
         :param args: KeyboardButton object or text
         :return: None
         """
+        self.__check_frozen__()
+
         _butt = []
 
         for butt in args:
@@ -106,6 +129,8 @@ class InlineKeyboardMarkup(BaseIKM):
         :param args: InlineKeyboardButton object
         :return: None
         """
+        self.__check_frozen__()
+
         _butt = []
 
         for butt in args:
@@ -130,6 +155,7 @@ class InlineKeyboardMarkup(BaseIKM):
         :return: None
         """
         if not args: return None
+        self.__check_frozen__()
         self.storage.extend(args)
     @override
     def add_keyboards(self) -> None:
@@ -161,18 +187,12 @@ class PollOption:
         self.text = text
         self.text_parse_mode = text_parse_mode
 
-class InputFile:
+class InputFile(BaseInputFile):
     """
     Класс для безопасного вставки файла.Рекомендуется для использования
     """
-    def __init__(self, file: Union[IOBase, BinaryIO, BytesIO, Path]):
-        if isinstance(file, (IOBase, BinaryIO, BytesIO)):
-            self.file = file
-        elif isinstance(file, Path):
-            with open(file, 'rb') as f:
-                self.file = BytesIO(f.read())
-        else:
-            raise TypeError('Unknow file type')
+    def __init__(self, file: Union[IOBase, BinaryIO, BytesIO, Path, str]):
+        super().__init__(file)
 
 class ChatAction:
     """
@@ -349,6 +369,11 @@ class Chat(BaseChat):
     def __init__(self, chat: dict):
         super().__init__(chat)
 
+class ChatMember(BaseChatMember):
+    def __init__(self, member: dict):
+        super().__init__(member)
+        self.user: User = User(member.get('user', {}))
+
 class ChatType(BaseChT):
     """
     Класс для определения типа чата.
@@ -425,75 +450,107 @@ class BotCommandScopeChatMember:
         self.user_id = user_id
 
 class Request:
-    def __init__(self, log_level: int = logging.INFO, loop: AbstractEventLoop=None, timeout: int=None):
+    def __init__(self, log_level: int = logging.INFO, loop: AbstractEventLoop=None, timeout: int=None, log_sample_rate: float=1.0, log_max_length: int=512, session: aiohttp.ClientSession=None, cache: ResponseCache=None):
         """
         Args:
             log_level (int): Logging level
             timeout (int, optional): The maximum waiting time
-            loop (asyncio.AbstractEventLoop, optional)
+            loop (asyncio.AbstractEventLoop, optional): Deprecated, the session is bound to the running loop
+            log_sample_rate (float, optional): Share of requests written to the DEBUG log
+            log_max_length (int, optional): Maximum length of the logged request parameters
+            session (aiohttp.ClientSession, optional): Shared session, it is not closed by close()
+            cache (ResponseCache, optional): Response cache for read-mostly methods (getMe, getFile, getChat, ...), disabled by default
         
         Raises:
             Unauthorized
         """
-        self.__session__ = aiohttp.ClientSession(connector=aiohttp.TCPConnector(keepalive_timeout=30, loop=loop), loop=loop)
+        self.__session__: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        self._loop: Optional[AbstractEventLoop] = None
 
         self.timeout = timeout
+        self.cache = cache
         
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(log_level)
+
+        self.request_logger = RequestLogger(self.logger, log_sample_rate, log_max_length)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The aiohttp session, created on first use inside the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._owns_session and (self.__session__ is None or self.__session__.closed or self._loop is not loop):
+            self.__session__ = aiohttp.ClientSession(connector=aiohttp.TCPConnector(keepalive_timeout=30))
+            self._loop = loop
+
+        return self.__session__
+
+    async def close(self) -> None:
+        """
+        Closes the session if it was created by this Request.
+        """
+        if self._owns_session and self.__session__ is not None and not self.__session__.closed:
+            await self.__session__.close()
+
+        self.__session__ = None if self._owns_session else self.__session__
     
     async def get(self, url: str, **kwargs: Any) -> Union[aiohttp.ClientResponse, bytes]:
-        async with self.__session__.get(url, **kwargs, timeout=self.timeout) as response:
+        async with self.session.get(url, **encode_json_body(kwargs), timeout=self.timeout) as response:
             content_type = response.headers.get('Content-Type', '').lower()
-            self.logger.debug(f'Request (get) to {url} with parameters {kwargs}: Successfully')
+            self.request_logger.request('get', url, kwargs, response.status)
 
             if 'application/json' in content_type:
                 _result = await response.json()
 
-                if not _result['ok']:
-                    error_description = _result['description'].lower()
-                    
-                    if error_description == 'unauthorized':
-                        raise Unauthorized(error_description)
-                    elif error_description.startswith('bad request'):
-                        raise BadRequest(error_description)
-                    elif error_description.startswith('forbidden'):
-                        raise Forbidden(error_description)
-                    elif error_description.startswith('too many requests'):
-                        raise TooManyRequests(error_description, value=_result['parameters']['retry_after'])
-                    else:
-                        raise Telegram(error_description)
-                
+                raise_for_result(_result)
+
                 return response
             else:
                 return await response.read()
     
     async def post(self, url: str, **kwargs: Any) -> aiohttp.ClientResponse:
-        async with self.__session__.post(url, **kwargs, timeout=self.timeout) as response:
+        async with self.session.post(url, **encode_json_body(kwargs), timeout=self.timeout) as response:
             content_type = response.headers.get('Content-Type', '').lower()
-            self.logger.debug(f'Request (post) to {url} with parameters {kwargs}: Successfully')
+            self.request_logger.request('post', url, kwargs, response.status)
 
             if 'application/json' in content_type:
                 _result = await response.json()
 
-                if not _result['ok']:
-                    error_description = _result['description'].lower()
-                    
-                    if error_description == 'unauthorized':
-                        raise Unauthorized(error_description)
-                    elif error_description.startswith('bad request'):
-                        raise BadRequest(error_description)
-                    elif error_description.startswith('forbidden'):
-                        raise Forbidden(error_description)
-                    elif error_description.startswith('too many requests'):
-                        raise TooManyRequests(error_description, value=_result['parameters']['retry_after'])
-                    else:
-                        raise Telegram(error_description)
-                
+                raise_for_result(_result)
+
                 return response
             else:
                 return await response.read()
 
+    async def call(self, url: str, **kwargs: Any) -> dict:
+        """
+        POST request to a Bot API method.The response is decoded once and returned as a dict.
+        Methods listed in the response cache are answered from it (see ResponseCache).
+
+        Raises:
+            Unauthorized, BadRequest, Forbidden, TooManyRequests, Telegram
+        """
+        if self.cache is not None and 'data' not in kwargs and self.cache.cacheable(url):
+            return await self.cache.acall(url, kwargs.get('json', None), lambda: self._call(url, **kwargs))
+
+        return await self._call(url, **kwargs)
+
+    async def _call(self, url: str, **kwargs: Any) -> dict:
+        async with self.session.post(url, **encode_json_body(kwargs), timeout=self.timeout) as response:
+            self.request_logger.request('post', url, kwargs, response.status)
+
+            if 'application/json' not in response.headers.get('Content-Type', '').lower():
+                raise Telegram(f'Unexpected response from the Bot API: HTTP {response.status}')
+
+            _result = await response.json()
+            raise_for_result(_result)
+
+            return _result
+
 class File(BaseFile):
     def __init__(self, file_id: str, file_unique_id: str, file_size: int, file_path: str):
         """
@@ -5,12 +5,14 @@
 __name__ = 'EasyGram'
 __version__ = '0.0.5b1'
 
-from typing import Union, Callable, List, Tuple, Any
+from typing import Union, Callable, List, Tuple, Any, Pattern, Optional, TYPE_CHECKING
 import traceback
 
 from .types import (
     Message,
     User,
+    Chat,
+    ChatMember,
     ReplyKeyboardMarkup,
     InlineKeyboardMarkup,
     CallbackQuery,
@@ -30,12 +32,21 @@ from .types import (
     Request,
     File,
     PollAnswer,
-    InlineKeyboardButton
+    InlineKeyboardButton,
+    InputMedia,
+    InputMediaPhoto,
+    InputMediaVideo,
+    InputMediaAudio,
+    InputMediaDocument
 )
 
 from .exception import Telegram
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+
+from contextlib import ExitStack
+
+import json
 
 import traceback
 
@@ -43,12 +54,45 @@ from .state import StatesGroup, FSMContext, State
 
 import logging
 
+import threading
+
 import inspect
 
+import importlib
+
 from io import BytesIO
 
+import mmap
+
 from .utils import handle_reply_markup
 
+from .middleware import BaseMiddleware, FunctionMiddleware
+
+from .dispatcher import route_update, get_priority, compile_pattern, Priority, DEFAULT_PRIORITIES
+
+from .journal import UpdateJournal
+
+from .update_queue import UpdateQueue
+
+from .coalesce import EditCoalescer
+
+from .router import Router, include_router
+
+from .callback_data import CallbackData, CallbackDataFilter, as_filter
+
+from . import types
+
+from . import methods
+
+from .identity import parse_bot_id, MeCache
+
+from .cache import ResponseCache
+
+from .downloads import DownloadCache
+
+if TYPE_CHECKING:
+    import requests
+
 __all__ = [
     'ParseMode',
     'Message',
@@ -67,43 +111,142 @@ __all__ = [
     'User',
     'PollOption',
     'InputFile',
+    'InputMediaPhoto',
+    'InputMediaVideo',
+    'InputMediaAudio',
+    'InputMediaDocument',
     'ChatAction',
     'Poll',
     'SyncBot',
-    'File'
+    'File',
+    'BaseMiddleware',
+    'UpdateJournal',
+    'UpdateQueue',
+    'Priority',
+    'Router',
+    'CallbackData'
 ]
 
-class SyncBot:
-    offset = 0
-    _message_handlers = []
-    _callback_query_handlers = []
-    _next_step_handlers = []
-    _query_next_step_handlers = []
-    _poll_handlers = []
-    _poll_answer_handlers = []
-    _request = Request(timeout=35)
+# Подсистемы, которые тянут тяжёлые зависимости (aiohttp, Flask), загружаются при первом обращении (PEP 562)
+_LAZY_MODULES = ('Async', 'imitation', 'runner', 'throttling', 'workers')
+_LAZY_ATTRIBUTES = {
+    'MultiBotRunner': 'runner'
+}
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_MODULES:
+        return importlib.import_module(f'.{name}', __name__)
+
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__), name)
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-    def __init__(self, token: str, log_level: int=logging.DEBUG):
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_MODULES) | set(_LAZY_ATTRIBUTES))
+
+class SyncBot:
+    def __init__(self, token: str, log_level: int=logging.INFO, log_sample_rate: float=1.0, session: 'requests.Session'=None, api_url: str=methods.API_URL, me_cache: Union[str, MeCache]=None, response_cache: ResponseCache=None, download_cache: Union[str, DownloadCache]=None):
         """
         Args:
             token (str): Токен для аутентификации запросов к API Telegram.
             log_level (int): Уровень логирования.
+            log_sample_rate (float): Доля запросов к API, которые пишутся в лог на уровне DEBUG.
+            session (requests.Session, optional): Общая сессия (пул соединений) для нескольких ботов.
+            api_url (str, optional): Адрес сервера Bot API (например, локального telegram-bot-api или эмулятора).
+            me_cache (Union[str, MeCache], optional): Папка (или MeCache) для кэша getMe на диске.
+            response_cache (ResponseCache, optional): Кэш ответов getMe, getFile, getChat, getChatMember (по умолчанию выключен).
+            download_cache (Union[str, DownloadCache], optional): Папка (или DownloadCache) для скачанных файлов.Без неё одновременные скачивания одного файла всё равно объединяются.
+
+        Бот создаётся без запросов к Telegram: id берётся из токена (`bot.id`), а getMe запрашивается в фоне (см. `bot.me`).
+
+        Raises:
+            Telegram: Токен имеет неверный формат.
         """
         self.token = token
+        self.api_url = api_url.rstrip('/')
+        self.id: int = parse_bot_id(token)
+        self.me_cache: Optional[MeCache] = MeCache(me_cache) if isinstance(me_cache, str) else me_cache
+        self.download_cache: DownloadCache = DownloadCache(download_cache) if isinstance(download_cache, str) else download_cache or DownloadCache(None)
+
+        self._me: Optional[User] = None
+        self._me_fresh = False
+        self._me_future: Optional[Future] = None
+
+        self.offset = 0
+        self._message_handlers: List[dict] = []
+        self._callback_query_handlers: List[dict] = []
+        self._next_step_handlers: List[tuple] = []
+        self._query_next_step_handlers: List[tuple] = []
+        self._poll_handlers: List[dict] = []
+        self._poll_answer_handlers: List[dict] = []
+        self._routers: List[Router] = []
+
+        self._request = Request(log_level, timeout=35, log_sample_rate=log_sample_rate, session=session, cache=response_cache)
+
+        self._middlewares: List[BaseMiddleware] = []
+        self.update_queue: UpdateQueue = None
+        self.priorities: dict = dict(DEFAULT_PRIORITIES)
+        self.edit_coalescer = EditCoalescer(self.__send_edit__)
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(log_level)
 
-        self._request.logger.setLevel(log_level)
-        
+        if self.me_cache is not None:
+            user, self._me_fresh = self.me_cache.load(self.id)
+
+            if user is not None:
+                self._me = User(user)
+
+        if not self._me_fresh:
+            self._me_future = Future()
+            threading.Thread(target=self.__fetch_me__, args=(self._me_future,), name='EasyGram-getMe', daemon=True).start()
+
+    @property
+    def me(self) -> User:
+        """
+        Информация о боте (getMe).Запрашивается в фоне при создании бота: первое обращение ждёт ответа, если он ещё не пришёл,
+        а если фоновый запрос не удался - запрашивает getMe заново (ошибка передаётся вызывающему).
+        Ожидание фонового запроса ограничено таймаутом запросов бота (по умолчанию 30 секунд), после него выбрасывается TimeoutError.
+        """
+        if self._me is None:
+            future = self._me_future
+
+            if future is not None:
+                try:
+                    return future.result(timeout=self._request.timeout or 30)
+                except FutureTimeoutError:
+                    raise TimeoutError('getMe не ответил вовремя') from None
+                except Exception:
+                    pass
+
+            self.__set_me__(self.get_me())
+
+        return self._me
+
+    @me.setter
+    def me(self, user: User) -> None:
+        self._me = user
+
+    def __set_me__(self, user: User) -> None:
+        self._me = user
+        self._me_fresh = True
+
+        if self.me_cache is not None:
+            self.me_cache.save(self.id, dict(vars(user)))
+
+        self.logger.debug('The bot is launched with user name @%s', user.username)
+
+    def __fetch_me__(self, future: Future) -> None:
         try:
-            self.me = self.get_me()
-        except (TimeoutError, ConnectionError) as e:
-            traceback.print_exc()
+            user = self.get_me()
         except Exception as e:
-            raise Telegram('The token is incorrectly set.')
+            self.logger.warning('getMe failed: %s', e)
+            future.set_exception(e)
+            return
 
-        self.logger.debug(f'The bot is launched with user name @{self.me.username}')
+        self.__set_me__(user)
+        future.set_result(user)
 
     def get_me(self) -> User:
         """
@@ -112,10 +255,7 @@ class SyncBot:
         Returns:
             User: Объект, представляющий бота.
         """
-
-        response = self._request.get(f'https://api.telegram.org/bot{self.token}/getMe')
-
-        return User(response.json()['result'])
+        return User(self.__call_api__(methods.GET_ME.build({}))['result'])
 
     def set_my_commands(self, commands: List[BotCommand], scope: Union[BotCommandScopeChat, BotCommandScopeDefault, BotCommandScopeChatMember, BotCommandScopeAllGroupChats, BotCommandScopeAllPrivateChats, BotCommandScopeChatAdministrators, BotCommandScopeAllChatAdministrators]=None, language_code: str=None) -> bool:
         """
@@ -129,23 +269,7 @@ class SyncBot:
         Returns:
             bool: Возвращает True, если команды успешно установлены.
         """
-        parameters = {
-            'commands': [{'command': command.command, 'description': command.description} for command in commands]
-        }
-
-        if scope:
-            parameters['scope'] = {"type": scope.type}
-            if hasattr(scope, 'chat_id'):
-                parameters['scope'].update({"chat_id": scope.chat_id})
-            if hasattr(scope, 'user_id'):
-                parameters['scope'].update({"user_id": scope.user_id})
-
-        if language_code:
-            parameters['language_code'] = language_code
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/setMyCommands', json=parameters)
-
-        return response.json()['ok']
+        return self.__call_api__(methods.SET_MY_COMMANDS.build(locals()))['ok']
 
     def send_message(self, chat_id: Union[int, str], text: Union[int, float, str], reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]]], str]=None, parse_mode: Union[str, ParseMode]=None, reply_to_message_id: int=None, disable_web_page_preview: bool=False) -> Message:
         """
@@ -161,31 +285,7 @@ class SyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
-        parameters = {
-            'chat_id': chat_id,
-            'text': text,
-            "link_preview_options": {
-                "is_disabled": disable_web_page_preview
-            }
-        }
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f"https://api.telegram.org/bot{self.token}/sendMessage", json=parameters)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_MESSAGE.build(locals()))['result'], self)
 
     def send_photo(self, chat_id: Union[int, str], photo: Union[InputFile], caption: Union[int, float, str]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, parse_mode: Union[str, ParseMode]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -203,35 +303,93 @@ class SyncBot:
         Returns:
             Message: Объект сообщения, отправленного ботом.
         """
+        return Message(self.__call_api__(methods.SEND_PHOTO.build(locals()))['result'], self)
+
+
+    def send_media_group(self, chat_id: Union[int, str], media: List[InputMedia], reply_to_message_id: int=None, disable_notification: bool=False, upload_chat_id: Union[int, str]=None) -> List[Message]:
+        """
+        Отправляет альбом из 2-10 фото, видео, документов или аудио одним запросом.
+
+        Args:
+            chat_id (Union[int, str]): Идентификатор чата.
+            media (List[InputMedia]): InputMediaPhoto, InputMediaVideo, InputMediaDocument или InputMediaAudio с InputFile, file_id или URL.
+            reply_to_message_id (int, optional): Если указан, альбом будет отправлен как ответ на указанное сообщение.
+            disable_notification (bool, optional): Отправить без звука.
+            upload_chat_id (Union[int, str], optional): Чат (например, закрытый канал), куда файлы сначала загружаются параллельно (см. upload_media).
+                Тогда время загрузки альбома определяется самым большим файлом, а не суммой всех.
+
+        Returns:
+            List[Message]: Сообщения альбома.
+        """
+        if not 2 <= len(media) <= 10:
+            raise ValueError('В альбоме должно быть от 2 до 10 файлов.')
+
+        if upload_chat_id is not None:
+            media = self.upload_media(upload_chat_id, media)
+
         parameters = {
             "chat_id": chat_id
         }
 
+        if reply_to_message_id is not None:
+            parameters['reply_to_message_id'] = reply_to_message_id
+
+        if disable_notification:
+            parameters['disable_notification'] = 'true'
+
         files = {}
+        items = []
 
-        files['photo'] = photo.file
+        with ExitStack() as stack:
+            for indx, item in enumerate(media):
+                if isinstance(item.media, str):
+                    items.append(item.to_dict())
+                    continue
 
-        if caption is not None:
-            parameters['caption'] = caption
+                name = f'file{indx}'
+                files[name] = (item.media.name or name, stack.enter_context(item.media.stream()))
+                items.append(item.to_dict(name))
 
-        reply_markup = handle_reply_markup(reply_markup)
-        
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
+            parameters['media'] = json.dumps(items, ensure_ascii=False)
+
+            response = self._request.post(methods.method_url(self.api_url, self.token, 'sendMediaGroup'), data=parameters, files=files or None)
+
+        return [Message(message, self) for message in response.json()['result']]
+
+    def upload_media(self, chat_id: Union[int, str], media: List[InputMedia]) -> List[InputMedia]:
+        """
+        Параллельно загружает файлы из media в чат chat_id и возвращает копии InputMedia с file_id вместо файлов.
+        Полученные InputMedia можно отправлять в любые чаты без повторной загрузки.
+
+        Args:
+            chat_id (Union[int, str]): Чат для загрузки, например закрытый канал.
+            media (List[InputMedia]): Файлы.
+
+        Returns:
+            List[InputMedia]: Те же файлы с file_id.
+        """
+        uploads = [item for item in media if not isinstance(item.media, str)]
+
+        if not uploads:
+            return list(media)
 
-        response = self._request.post(f"https://api.telegram.org/bot{self.token}/sendPhoto", data=parameters, files=files)
+        with ThreadPoolExecutor(len(uploads)) as executor:
+            file_ids = iter(list(executor.map(lambda item: self.__upload_media__(chat_id, item), uploads)))
 
-        return Message(response.json()['result'], self)
+        return [item if isinstance(item.media, str) else item.with_media(next(file_ids)) for item in media]
 
-    def message(self, _filters: Callable[[Message], Any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None) -> Callable:
+    def __upload_media__(self, chat_id: Union[int, str], item: InputMedia) -> str:
+        """
+        Загружает один файл и возвращает его file_id.
+        """
+        with item.media.stream() as stream:
+            response = self._request.post(methods.method_url(self.api_url, self.token, f'send{item.type.capitalize()}'), data={'chat_id': chat_id, 'disable_notification': 'true'}, files={item.type: (item.media.name or item.type, stream)})
+
+        result = response.json()['result'][item.type]
+
+        return (result[-1] if isinstance(result, list) else result)['file_id']
+
+    def message(self, _filters: Callable[[Message], Any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, regexp: Union[str, Pattern]=None, text_pattern: str=None) -> Callable:
         """
         Декоратор для обработки входящих сообщений.
 
@@ -241,10 +399,15 @@ class SyncBot:
             commands (Union[str, List[str]], optional): Команды, на которые должен реагировать обработчик.
             allowed_chat_type (Union[List[str], Tuple[str], str], optional): Типы чатов, в которых активен обработчик.
             state (StateRegExp, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
+            regexp (Union[str, Pattern], optional): Регулярное выражение для текста (или подписи) сообщения, проверяется с начала текста.
+                Совпадение передаётся в обработчик параметром `match`, именованные группы - параметрами с их именами.
+            text_pattern (str, optional): Шаблон всего текста в стиле fnmatch ('привет*'), вместо regexp.
 
         Returns:
             Callable: Функция-обертка, которая регистрирует обработчик сообщений.
         """
+        pattern = compile_pattern(regexp, text_pattern)
 
         def wrapper(func):
             self._message_handlers.append({
@@ -253,11 +416,13 @@ class SyncBot:
                 'content_types': content_types, 
                 'commands': commands, 
                 'allowed_chat_type': allowed_chat_type, 
-                'state': state
+                'state': state, 
+                'priority': priority,
+                'regexp': pattern
                 })
         return wrapper
 
-    def message_handler(self, _filters: Callable[[Message], Any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None) -> Callable:
+    def message_handler(self, _filters: Callable[[Message], Any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, regexp: Union[str, Pattern]=None, text_pattern: str=None) -> Callable:
         """
         Декоратор для обработки входящих сообщений.Для миграции из pyTelegramBotAPI в EasyGram
         :param _filters: лямбда
@@ -265,8 +430,12 @@ class SyncBot:
         :param commands: команды(без префикса)
         :param allowed_chat_type: тип группы
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
+        :param regexp: Регулярное выражение для текста сообщения, совпадение передаётся в обработчик параметром match
+        :param text_pattern: Шаблон текста в стиле fnmatch, вместо regexp
         :return: Функцию которую нужно вызвать
         """
+        pattern = compile_pattern(regexp, text_pattern)
 
         def wrapper(func):
             self._message_handlers.append({
@@ -275,79 +444,96 @@ class SyncBot:
                 'content_types': content_types, 
                 'commands': commands, 
                 'allowed_chat_type': allowed_chat_type, 
-                'state': state
+                'state': state, 
+                'priority': priority,
+                'regexp': pattern
                 })
         return wrapper
 
-    def callback_query(self, _filters: Callable[[CallbackQuery], Any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None) -> Callable:
+    def callback_query(self, _filters: Callable[[CallbackQuery], Any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, callback_data: Union[CallbackData, CallbackDataFilter]=None) -> Callable:
         """
         Декоратор для обработки вызовов InlineKeyboardMarkup кнопки.
         :param _filters: лямбда
         :param allowed_chat_type: тип группы
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
+        :param callback_data: Фабрика CallbackData или factory.filter(...), поля передаются в обработчик параметрами с их именами
         :return: Функцию которую нужно вызвать
         """
+        callback_filter = as_filter(callback_data)
 
         def wrapper(func):
             self._callback_query_handlers.append({
                 'func': func, 
                 'filters': _filters, 
                 'allowed_chat_type': allowed_chat_type, 
-                'state': state
+                'state': state, 
+                'priority': priority,
+                'callback_data': callback_filter
                 })
         return wrapper
 
-    def callback_query_handler(self, _filters: Callable[[CallbackQuery], Any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None) -> Callable:
+    def callback_query_handler(self, _filters: Callable[[CallbackQuery], Any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, callback_data: Union[CallbackData, CallbackDataFilter]=None) -> Callable:
         """
         Декоратор для обработки вызовов InlineKeyboardMarkup кнопки.Для миграции из pyTelegramBotAPI в EasyGram
         :param _filters: лямбда
         :param allowed_chat_type: тип группы
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
+        :param callback_data: Фабрика CallbackData или factory.filter(...), поля передаются в обработчик параметрами с их именами
         :return: Функцию которую нужно вызвать
         """
+        callback_filter = as_filter(callback_data)
 
         def wrapper(func):
             self._callback_query_handlers.append({
                 'func': func, 
                 'filters': _filters, 
                 'allowed_chat_type': allowed_chat_type, 
-                'state': state
+                'state': state, 
+                'priority': priority,
+                'callback_data': callback_filter
                 })
         return wrapper
     
-    def poll_handler(self, _filters: Callable[[Poll], Any]=None) -> Callable:
+    def poll_handler(self, _filters: Callable[[Poll], Any]=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки опросов.Для миграции из pyTelegramBotAPI в EasyGram
         :param _filters: лямбда
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
         :return: Callable
         """
 
         def wrapper(func):
             self._poll_handlers.append({
                 'func': func, 
-                'filters': _filters
+                'filters': _filters, 
+                'priority': priority
                 })
         return wrapper
     
-    def poll(self, _filters: Callable[[Poll], Any]=None) -> Callable:
+    def poll(self, _filters: Callable[[Poll], Any]=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки обновления данных опросов.
         :param _filters: лямбда
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
         :return: Callable
         """
 
         def wrapper(func):
             self._poll_handlers.append({
                 'func': func, 
-                'filters': _filters
+                'filters': _filters, 
+                'priority': priority
                 })
         return wrapper
 
-    def poll_answer_handler(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None) -> Callable:
+    def poll_answer_handler(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки ответов на опросы.
         :param _filters: лямбда
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
         :return: Callable
         """
 
@@ -355,16 +541,18 @@ class SyncBot:
             self._poll_answer_handlers.append({
                 'func': func,
                 'filters': _filters,
-                'state': state
+                'state': state,
+                'priority': priority
             })
         
         return wrapper
     
-    def poll_answer(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None) -> Callable:
+    def poll_answer(self, _filters: Callable[[PollAnswer], Any]=None, state: State=None, priority: int=None) -> Callable:
         """
         Декоратор для обработки ответов на опросы.
         :param _filters: лямбда
         :param state: поле State
+        :param priority: Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше
         :return: Callable
         """
 
@@ -372,7 +560,8 @@ class SyncBot:
             self._poll_answer_handlers.append({
                 'func': func,
                 'filters': _filters,
-                'state': state
+                'state': state,
+                'priority': priority
             })
         
         return wrapper
@@ -385,15 +574,7 @@ class SyncBot:
         :param show_alert: Если True, сообщение будет отображаться в виде всплывающего окна (alert).
         :return: Возвращает True, если запрос был успешным, иначе False.
         """
-        parameters = {
-            'callback_query_id': query_id,
-            'text': str(text),
-            'show_alert': show_alert
-        }
-
-        response = self._request.post(f"https://api.telegram.org/bot{self.token}/answerCallbackQuery", json=parameters)
-
-        return response.json()['result']
+        return self.__call_api__(methods.ANSWER_CALLBACK_QUERY.build(locals()))['result']
 
     def delete_message(self, chat_id: Union[int, str], message_id: int) -> bool:
         """
@@ -404,16 +585,9 @@ class SyncBot:
         :param message_id: Айди сообщения
         :return: Булевое значение
         """
-        parameters = {
-            'chat_id': chat_id,
-            'message_id': message_id
-        }
-
-        response = self._request.post(f"https://api.telegram.org/bot{self.token}/deleteMessage", json=parameters)
-
-        return response.json()['result']
+        return self.__call_api__(methods.DELETE_MESSAGE.build(locals()))['result']
 
-    def edit_message_text(self, chat_id: Union[int, str], message_id: int, text: Union[int, float, str], parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, disable_web_page_preview: bool=False) -> bool:
+    def edit_message_text(self, chat_id: Union[int, str], message_id: int, text: Union[int, float, str], parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, disable_web_page_preview: bool=False, coalesce: bool=False) -> bool:
         """
         Редактирование сообщения.Обратите внимание, что деловые сообщения, которые не были отправлены ботом и не содержат встроенной клавиатуры, можно редактировать только в течение 48 часов с момента отправки.
         :param chat_id: Айди чата
@@ -421,31 +595,16 @@ class SyncBot:
         :param text: Текст
         :param parse_mode: Форматирования текста
         :param reply_markup: Кнопки
+        :param coalesce: Объединять частые правки этого сообщения (прогресс-бар): правка отправляется не чаще `bot.edit_coalescer.interval` секунд,
+            ожидающая правка заменяется новой, и возвращается результат последней отправленной правки
         :return: Булевое значение
         """
+        payload = methods.EDIT_MESSAGE_TEXT.build(locals())
 
-        parameters = {
-            "chat_id": chat_id,
-            "message_id": message_id,
-            "text": str(text),
-            "link_preview_options": {
-                "is_disabled": disable_web_page_preview
-            }
-        }
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-
-        response = self._request.post(f"https://api.telegram.org/bot{self.token}/editMessageText", json=parameters)
+        if coalesce:
+            return self.edit_coalescer.submit(payload.method, payload.parameters).result()['result']
 
-        return response.json()['result']
+        return self.__call_api__(payload)['result']
 
     def send_poll(self, chat_id: Union[int, str], question: Union[int, float, str], options: Union[List[PollOption], List[str]], question_parse_mode: Union[str, ParseMode]=None, is_anonymous: bool=True, type: str='regular', allows_multiple_answers: bool=False, correct_option_id: int=0, explanation: str=None, explanation_parse_mode: Union[str, ParseMode]=None, open_period: int=None, is_closed: bool=False, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -466,62 +625,28 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id,
-            "question": str(question),
-            "type": type,
-            "allows_multiple_answers": allows_multiple_answers,
-            "is_closed": is_closed,
-            "is_anonymous": is_anonymous
-        }
-
-        reply_markup = handle_reply_markup(reply_markup)
-
         if len(options) < 2:
             try:
                 raise Telegram('В списке параметра options должно быть минимум 2 элемента.')
             except Telegram as e:
                 traceback.print_exc(e)
+
+            options = None
         elif len(options) > 10:
             try:
                 raise Telegram('В списке параметра options должно быть максимум 10 элементов.')
             except Telegram as e:
                 traceback.print_exc(e)
-        else:
-            parameters['options'] = []
-            for option in options:
-                if isinstance(option, PollOption):
-                    _opt = {"text": option.text}
-                    if option.text_parse_mode is not None: _opt.update({"text_parse_mode": option.text_parse_mode})
-                    parameters['options'].append(_opt)
-                else:
-                    parameters['options'].append({"text": option})
-
-        if type == 'quiz':
-            parameters['correct_option_id'] = correct_option_id
-
-        if explanation is not None:
-            parameters['explanation'] = explanation
-            if explanation_parse_mode is not None: parameters['explanation_parse_mode'] = explanation_parse_mode
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-
-        if open_period is not None:
-            parameters['open_period'] = open_period
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-        
-        if question_parse_mode is not None:
-            parameters['question_parse_mode'] = question_parse_mode
 
-        response = self._request.post(f"https://api.telegram.org/bot{self.token}/sendPoll", json=parameters)
+            options = None
+
+        if type != 'quiz':
+            correct_option_id = None
 
-        return Message(response.json()['result'], self)
+        if explanation is None:
+            explanation_parse_mode = None
+
+        return Message(self.__call_api__(methods.SEND_POLL.build(locals()))['result'], self)
 
     def send_audio(self, chat_id: Union[int, str], audio: Union[InputFile], title: str=None, caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -535,41 +660,15 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-
-        files = {
-
-        }
-
         if isinstance(audio, str):
-            with open(audio, 'rb') as f:
-                files['audio'] = f
-                parameters['title'] = f.name if title is None else title
-        else:
-            files['audio'] = audio
-            parameters['title'] = 'audio' if title is None else title
+            audio = InputFile(audio)
 
-        if caption is not None:
-            parameters['caption'] = caption
+            if title is None:
+                title = audio.name
+        elif title is None:
+            title = 'audio'
 
-        reply_markup = handle_reply_markup(reply_markup)
-        
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendAudio', data=parameters, files=files)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_AUDIO.build(locals()))['result'], self)
 
     def send_document(self, chat_id: Union[int, str], document: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -582,35 +681,7 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-
-        files = {
-
-        }
-
-        files['document'] = document.file
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendDocument', data=parameters, files=files)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_DOCUMENT.build(locals()))['result'], self)
 
     def send_animation(self, chat_id: Union[int, str], animation: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -623,35 +694,7 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-
-        files = {
-
-        }
-
-        files['animation'] = animation.file
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendAnimation', data=parameters, files=files)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_ANIMATION.build(locals()))['result'], self)
 
     def send_voice(self, chat_id: Union[int, str], voice: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -664,35 +707,7 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-
-        files = {
-
-        }
-
-        files['voice'] = voice.file
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendVoice', data=parameters, files=files)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_VOICE.build(locals()))['result'], self)
 
     def send_video(self, chat_id: Union[int, str], video: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -705,35 +720,7 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-
-        files = {
-
-        }
-
-        files['video'] = video.file
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendVideo', data=parameters, files=files)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_VIDEO.build(locals()))['result'], self)
 
     def send_video_note(self, chat_id: Union[int, str], video_note: Union[InputFile], caption: str=None, parse_mode: Union[str, ParseMode]=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -746,35 +733,7 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-
-        files = {
-
-        }
-
-        files['video_note'] = video_note.file
-
-        if caption is not None:
-            parameters['caption'] = caption
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-        if parse_mode is not None:
-            parameters['parse_mode'] = parse_mode
-            
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendVideoNote', data=parameters, files=files)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_VIDEO_NOTE.build(locals()))['result'], self)
 
     def send_contact(self, chat_id: Union[int, str], number: str, first_name: str, last_name: str=None, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -787,29 +746,7 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id,
-            "first_name": first_name
-        }
-
-        parameters['number'] = number
-
-        if last_name is not None: parameters['last_name'] = last_name
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendContact', json=parameters)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_CONTACT.build(locals()))['result'], self)
 
     def send_dice(self, chat_id: Union[int, str], emoji: str, reply_markup: Union[ReplyKeyboardMarkup, InlineKeyboardMarkup, list[list[Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]]], str, None]=None, reply_to_message_id: int=None) -> Message:
         """
@@ -820,27 +757,10 @@ class SyncBot:
         :param reply_to_message_id: Ответ на сообщение
         :return: Message
         """
-        parameters = {
-            "chat_id": chat_id
-        }
-        
-        if reply_to_message_id is not None:
-            parameters['reply_to_message_id'] = reply_to_message_id
-
         if emoji not in ['🎲', '🎯', '🏀', '⚽', '🎳', '🎰']:
             raise TypeError(f'Такой эмодзи {emoji} не допускается.')
 
-        reply_markup = handle_reply_markup(reply_markup)
-
-        if reply_markup is not None and reply_markup.rows:
-            if isinstance(reply_markup, ReplyKeyboardMarkup):
-                parameters['reply_markup'] = {'keyboard': reply_markup.rows, 'resize_keyboard': reply_markup.resize_keyboard}
-            elif isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendDice', json=parameters)
-
-        return Message(response.json()['result'], self)
+        return Message(self.__call_api__(methods.SEND_DICE.build(locals()))['result'], self)
 
     def send_chat_action(self, chat_id: Union[int, str], action: Union[str, ChatAction]) -> None:
         """
@@ -849,12 +769,7 @@ class SyncBot:
         :param action: Действие.Смотреть тип дествий в EasyGram.types.ChatAction/EasyGram.Async.types.ChatAction
         :return: None
         """
-        parameters = {
-            "chat_id": chat_id,
-            "action": action
-        }
-
-        response = self._request.post(f'https://api.telegram.org/bot{self.token}/sendChatAction', json=parameters)
+        self.__call_api__(methods.SEND_CHAT_ACTION.build(locals()))
     
     def next_step_handler(self, chat_id: int, callback: Callable, *args) -> None:
         """
@@ -877,17 +792,67 @@ class SyncBot:
         self._query_next_step_handlers.append((str(chat_id), callback, args))
     
     def get_file(self, file_id: str) -> File:
-        response = self._request.get(f'https://api.telegram.org/bot{self.token}/getFile', json={'file_id': file_id}).json()
+        response = self.__call_api__(methods.GET_FILE.build(locals()))
         return File(response['result']['file_id'], response['result']['file_unique_id'], response['result']['file_size'], response['result']['file_path'])
 
-    def download_file(self, file_path: str) -> BytesIO:
-        if not file_path.startswith('https://api.telegram.org/file/'):
+    def get_chat(self, chat_id: Union[int, str]) -> Chat:
+        """
+        Получает информацию о чате.
+
+        Args:
+            chat_id (Union[int, str]): Идентификатор чата или username канала.
+
+        Returns:
+            Chat: Объект чата.
+        """
+        return Chat(self.__call_api__(methods.GET_CHAT.build(locals()))['result'])
+
+    def get_chat_member(self, chat_id: Union[int, str], user_id: int) -> ChatMember:
+        """
+        Получает информацию об участнике чата.
+
+        Args:
+            chat_id (Union[int, str]): Идентификатор чата.
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            ChatMember: Статус пользователя в чате.
+        """
+        return ChatMember(self.__call_api__(methods.GET_CHAT_MEMBER.build(locals()))['result'])
+
+    def download_file(self, file_path: Union[str, File], mapped: bool=False) -> Union[BytesIO, mmap.mmap]:
+        """
+        Скачивает файл.
+
+        Args:
+            file_path (Union[str, File]): Ссылка на файл из телеграма или File (например, из get_file).
+                Одновременные скачивания одного File (по file_unique_id) объединяются в одно, скачанный File сохраняется в download_cache.
+                Для File без file_path getFile вызывается, только если файла нет в download_cache.
+            mapped (bool): Для File, сохранённого в download_cache на диске - вернуть mmap.mmap (только чтение) вместо копии в памяти.
+
+        Returns:
+            Union[BytesIO, mmap.mmap]: Содержимое файла.
+        """
+        if not isinstance(file_path, str):
+            file = file_path
+
+            def download() -> bytes:
+                # getFile только при реальном скачивании: файл из кэша и одновременные вызовы его не запрашивают
+                path = file.file_path if file.file_path is not None else self.get_file(file.file_id).file_path
+
+                return self._request.get(methods.file_url(self.api_url, self.token, path))
+
+            data = self.download_cache.fetch(file.file_unique_id, download, mapped)
+
+            return BytesIO(data) if isinstance(data, bytes) else data
+
+        if not file_path.startswith(f'{self.api_url}/file/'):
             raise ValueError('file_path не является ссылкой из телеграма.')
 
         response = self._request.get(file_path)
         return BytesIO(response)
 
-    def edit_message_reply_markup(self, chat_id: Union[int, str]=None, message_id: Union[int, str]=None, inline_message_id: Union[int, str]=None, reply_markup: Union[InlineKeyboardMarkup, InlineKeyboardButton, list[list[InlineKeyboardButton]]]=None) -> bool:
+    def edit_message_reply_markup(self, chat_id: Union[int, str]=None, message_id: Union[int, str]=None, inline_message_id: Union[int, str]=None, reply_markup: Union[InlineKeyboardMarkup, InlineKeyboardButton, list[list[InlineKeyboardButton]]]=None, coalesce: bool=False) -> bool:
         """
         Меняет inline кнопки.
 
@@ -896,33 +861,126 @@ class SyncBot:
             message_id (int | str): Айди сообщения.
             inline_message_id (int | str): Требуется, если chat_id и message_id не указаны. Идентификатор встроенного сообщения
             reply_markup (types.InlineKeyboardMarkup | types.InlineKeyboardButton): Кнопки.
+            coalesce (bool): Объединять частые правки кнопок этого сообщения, см. edit_message_text.
         Return:
             bool
         """
+        payload = methods.EDIT_MESSAGE_REPLY_MARKUP.build(locals())
 
-        parameters = {}
+        if coalesce:
+            return self.edit_coalescer.submit(payload.method, payload.parameters).result()['ok']
 
-        if chat_id is not None:
-            parameters['chat_id'] = chat_id
-        
-        if message_id is not None:
-            parameters['message_id'] = message_id
-        
-        if inline_message_id:
-            parameters['inline_message_id'] = inline_message_id
-
-        if reply_markup is not None:
-            if isinstance(reply_markup, InlineKeyboardMarkup):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.rows}
-            elif isinstance(reply_markup, InlineKeyboardButton):
-                parameters['reply_markup'] = {'inline_keyboard': reply_markup.keyboard}
-            elif isinstance(reply_markup, list):
-                parameters['reply_markup'] = {'inline_keyboard': InlineKeyboardMarkup(builder=reply_markup)}
-        
-        response = self._request.get(f'https://api.telegram.org/bot{self.token}/editMessageReplyMarkup', json=parameters)
-        return response.ok()
+        return self.__call_api__(payload)['ok']
+
+    def __call_api__(self, payload: methods.Payload) -> dict:
+        """
+        Отправляет запрос, собранный MethodSpec.build: без файлов - JSON, с файлами - multipart/form-data, файлы передаются потоком.
+        :param payload: Запрос
+        :return: Ответ Bot API целиком ({'ok': ..., 'result': ...})
+        """
+        url = methods.method_url(self.api_url, self.token, payload.method)
+
+        if not payload.files:
+            return self._request.call(url, json=payload.parameters)
 
-    def polling(self, on_startup: Callable=None, threaded_run: bool=False, thread_max_works: int=10, *args) -> None:
+        with ExitStack() as stack:
+            return self._request.call(url, data=payload.form_fields(), files=payload.open_files(stack))
+
+    def __send_edit__(self, method: str, parameters: dict) -> dict:
+        """
+        Отправляет правку, которую выбрал edit_coalescer.
+        """
+        return self.__call_api__(methods.Payload(method, parameters))
+
+    def include_router(self, router: Router) -> None:
+        """
+        Подключает роутер: его обработчики (и зарегистрированные в нём позже) добавляются к обработчикам бота.
+        :param router: Объект Router
+        :return: None
+        """
+        include_router(self, router)
+
+    def add_middleware(self, middleware: BaseMiddleware) -> None:
+        """
+        Добавляет middleware, которое вызывается один раз на каждое обновление до и после обработчиков.
+        :param middleware: Объект BaseMiddleware
+        :return: None
+        """
+        self._middlewares.append(middleware)
+
+    def set_priority(self, update_type: str, priority: int) -> None:
+        """
+        Задаёт приоритет типа обновления в очереди (для обработчиков без своего `priority`).
+        :param update_type: 'message', 'command' (сообщения с командой), 'callback_query', 'poll' или 'poll_answer'
+        :param priority: Приоритет (Priority), обновления с большим приоритетом обрабатываются раньше
+        :return: None
+        """
+        self.priorities[update_type] = priority
+
+    def middleware(self, update_types: Union[str, List[str]]=None) -> Callable:
+        """
+        Декоратор для middleware-функции `func(update, data)`.Если функция вернёт False, обновление пропускается.
+        :param update_types: Типы обновлений, для которых вызывается функция
+        :return: Callable
+        """
+
+        def wrapper(func):
+            self.add_middleware(FunctionMiddleware(func, update_types))
+            return func
+        return wrapper
+
+    def process_new_updates(self, updates: List[dict]) -> None:
+        """
+        Обрабатывает список обновлений, например полученных через webhook.
+        :param updates: Обновления в виде словарей
+        :return: None
+        """
+        for update in updates:
+            try:
+                self._process_update(update)
+            except Exception:
+                self.logger.error(traceback.format_exc())
+
+    def _process_update(self, update: dict, executor: ThreadPoolExecutor=None) -> None:
+        """
+        Прогоняет обновление через middleware и вызывает найденные обработчики.
+        """
+        data = {}
+        middlewares = []
+
+        for middleware in self._middlewares:
+            if not middleware.check(update):
+                continue
+
+            middlewares.append(middleware)
+
+            if middleware.pre_process(update, data) is False:
+                self.__post_process__(middlewares, update, data, None)
+                return
+
+        try:
+            calls = route_update(self, update, data, types)
+        except Exception as e:
+            self.__post_process__(middlewares, update, data, e)
+            raise
+
+        if executor is not None and calls:
+            executor.submit(self.__run_func_with_try_except__, calls, middlewares, update, data)
+        else:
+            self.__run_func_with_try_except__(calls, middlewares, update, data)
+
+    def _get_updates(self, timeout: int=30) -> List[dict]:
+        """
+        Получает новые обновления начиная с self.offset.
+        """
+        response = self._request.get(methods.method_url(self.api_url, self.token, 'getUpdates'), params={"offset": self.offset, "timeout": timeout, "allowed_updates": ["message", "callback_query", "poll", "poll_answer"]})
+
+        if response.status_code != 200:
+            return []
+
+        return response.json()['result']
+
+    def polling(self, on_startup: Callable=None, threaded_run: bool=False, thread_max_works: int=10, *args, journal: UpdateJournal=None, update_queue: UpdateQueue=None) -> None:
         """
         Запускает процесс опроса событий, выполняя указанную функцию при старте.
 
@@ -930,186 +988,128 @@ class SyncBot:
         :param args: Дополнительные аргументы, которые будут переданы в функцию on_startup.
         :param threaded_run: Запуск с потоком.
         :param thread_max_works: Ограничения по потокам(!Чем больше потоков запустится, тем сильнее нагружается процессор!)
+        :param journal: Журнал UpdateJournal.Обновления записываются на диск до сдвига offset, а после перезапуска необработанные обновления обрабатываются повторно.
+        :param update_queue: Очередь UpdateQueue между получением обновлений и потоками-обработчиками (при threaded_run=True).
+            По умолчанию UpdateQueue(thread_max_works * 100, 'block'): когда потоки не успевают, получение обновлений ждёт.Метрики - `bot.update_queue.stats()`.
+            Потоки забирают обновления по приоритету (см. set_priority и аргумент priority у декораторов).
         :return: Ничего не возвращает.
         """
         if on_startup is not None:  on_startup(*args)
 
+        stop = threading.Event()
+        workers = []
+
         if threaded_run:
-            executor = ThreadPoolExecutor(thread_max_works)
+            self.update_queue = UpdateQueue(thread_max_works * 100) if update_queue is None else update_queue
 
-        while True:
-            try:
-                updates = self._request.get(f'https://api.telegram.org/bot{self.token}/getUpdates', params={"offset": self.offset, "timeout": 30, "allowed_updates": ["message", "callback_query", "poll", "poll_answer"]})
-            except Exception as e:
-                traceback.print_exc()
-                continue
+            if self.update_queue.priority is None:
+                self.update_queue.priority = lambda update: get_priority(self, update)
 
-            if updates.status_code != 200:
-                continue
+            if journal is not None:
+                self.update_queue.add_drop_callback(lambda update: journal.ack(update['update_id']))
+
+            for _ in range(thread_max_works):
+                worker = threading.Thread(target=self.__queue_worker__, args=(self.update_queue, stop), daemon=True)
+                worker.start()
+                workers.append(worker)
 
-            updates = updates.json()['result']
+        try:
+            if journal is not None:
+                self.__dispatch_updates__(journal.attach(self), threaded_run)
 
-            for update in updates:
+            while True:
                 try:
+                    updates = self._get_updates()
+                except Exception as e:
+                    traceback.print_exc()
+                    continue
+
+                if journal is not None:
+                    journal.append(updates)
+
+                for update in updates:
                     self.offset = update["update_id"] + 1
 
-                    if update.get('message', False):
-                        
-                        for indx, step in enumerate(self._next_step_handlers):
-                            if str(update['message']['chat']['id']) == step[0]:
-                                if threaded_run:
-                                    executor.submit(step[1], Message(update['message'], self), *step[2])
-                                else:
-                                    self.__run_func_with_try_except__(step[1], Message(update['message'], self), *step[2])
-                                
-                                self._next_step_handlers.pop(indx)
-                                break
-                        
-                        for handler_message in self._message_handlers:
-                            if handler_message['filters'] is not None and not handler_message['filters'](Message(update['message'], self)):
-                                continue
-
-                            if handler_message['commands'] is not None:
-                                if not update['message'].get('text', False):
-                                    continue
-
-                                if isinstance(handler_message['commands'], list):
-                                    if not any(update['message']['text'].split()[0] == '/' + command for command in handler_message['commands']):
-                                        continue
-                                elif isinstance(handler_message['commands'], str):
-                                    if not update['message']['text'].startswith('/'+handler_message['commands']):
-                                        continue
-
-                            if handler_message['content_types'] is not None:
-                                if isinstance(handler_message['content_types'], str) and handler_message['content_types'].lower() != 'any':
-                                    if not update['message'].get(handler_message['content_types'], False):
-                                        continue
-                                elif isinstance(handler_message['content_types'], list):
-                                    if not any(update['message'].get(__type, False) and __type.lower() == 'any' for __type in handler_message['content_types']):
-                                        continue
-
-                            if handler_message['allowed_chat_type'] is not None:
-                                if isinstance(handler_message['allowed_chat_type'], str):
-                                    if update['message']['chat']['type'] != handler_message['allowed_chat_type']:
-                                        continue
-                                elif isinstance(handler_message['allowed_chat_type'], (tuple, list)):
-                                    if not any(update['message']['chat']['type'] == _chat_type for _chat_type in handler_message['allowed_chat_type']):
-                                        continue
-                            
-                            if handler_message['state'] is not None:
-                                if update['message']['from']['id'] not in StatesGroup.user_registers:
-                                    continue
-
-                                if handler_message['state'] != StatesGroup.user_registers[update['message']['from']['id']]['state']:
-                                    continue
-
-                            message = Message(update['message'], self)
-                            parameters = [message]
-                            parameters.append(FSMContext(message.from_user.id))
-                            
-                            is_method = inspect.ismethod(handler_message['func'])
-                            _parameters = list(inspect.signature(handler_message['func']).parameters)
-
-                            if is_method and len(_parameters) > 0: _parameters.pop(0)
-
-                            if len(_parameters) == 1: parameters.pop(1)
-                            
-                            if threaded_run:
-                                executor.submit(self.__run_func_with_try_except__, [handler_message['func'], *parameters])
-                            else:
-                                self.__run_func_with_try_except__(handler_message['func'], *parameters)
-                            
-                            break
-                    elif update.get('callback_query', False):
-                        for indx, step in enumerate(self._query_next_step_handlers):
-                            if str(update['message']['chat']['id']) == step[0]:
-                                if threaded_run:
-                                    executor.submit(step[1], CallbackQuery(update['callback_queyr'], self), *step[2])
-                                else:
-                                    step[1](CallbackQuery(update['callback_queyr'], self), *step[2])
-                                
-                                self._queyr_next_step_handlers.pop(indx)
-                                break
-
-                        for callback in self._callback_query_handlers:
-                            if callback['filters'] is not None and not callback['filters'](Message(update['callback_query'], self)):
-                                continue
-
-                            if callback['allowed_chat_type'] is not None:
-                                if isinstance(callback['allowed_chat_type'], str):
-                                    if update['callback_query']['chat']['type'] != callback['allowed_chat_type']:
-                                        continue
-                                elif isinstance(callback['allowed_chat_type'], (tuple, list)):
-                                    if not any(update['callback_query']['chat']['type'] == _chat_type for _chat_type in callback['allowed_chat_type']):
-                                        continue
-                            
-                            if callback['state'] is not None:
-                                if update['message']['from']['id'] not in StatesGroup.user_registers:
-                                    continue
-
-                                if callback['state'] != StatesGroup.user_registers[update['message']['from']['id']]['state']:
-                                    continue
-                            
-                            callback_query = CallbackQuery(update['callback_query'], self)
-                            parameters = [callback_query]
-                            parameters.append(FSMContext(callback_query.from_user.id))
-
-                            is_method = inspect.ismethod(callback['func'])
-                            _parameters = list(inspect.signature(callback['func']).parameters)
-
-                            if is_method and len(_parameters) > 0: _parameters.pop(0)
-
-                            if len(_parameters) == 1: parameters.pop(1)
-
-                            if threaded_run:
-                                executor.submit(self.__run_func_with_try_except__, [callback['func'], *parameters])
-                            else:
-                                self.__run_func_with_try_except__(callback['func'], *parameters)
-                            
-                            break
-                    elif update.get('poll', False):
-                        for poll in self._poll_handlers:
-                            if poll['filters'] is not None and not poll['filters'](Poll(update['poll'])):
-                                continue
-                            
-                            _poll = Poll(update['poll'])
-
-                            if threaded_run:
-                                executor.submit(self.__run_func_with_try_except__, [poll['func'], *parameters])
-                            else:
-                                self.__run_func_with_try_except__(poll['func'], *parameters)
-                            break
-                    elif update.get('poll_answer', False):
-                        for poll_answer in self._poll_answer_handlers:
-                            if poll_answer['filters'] is not None and not poll_answer['filters'](PollAnswer(update['poll_answer'])):
-                                continue
-                            
-                            if poll_answer['state'] is not None:
-                                if update['poll_answer']['user']['id'] not in StatesGroup.user_registers:
-                                    continue
-
-                                if poll_answer['state'] != StatesGroup.user_registers[update['poll_answer']['user']['id']]['state']:
-                                    continue
-                            
-                            _poll = PollAnswer(update['poll'])
-
-                            if threaded_run:
-                                executor.submit(self.__run_func_with_try_except__, [poll['func'], _poll])
-                            else:
-                                self.__run_func_with_try_except__(poll['func'], _poll)
-                            break
-                except Exception as e:
-                    self.logger.error(traceback.format_exc())
+                self.__dispatch_updates__(updates, threaded_run)
+        finally:
+            stop.set()
+
+            for worker in workers:
+                worker.join()
+
+            if threaded_run:
+                self.update_queue.close()
+
+            if journal is not None:
+                journal.close()
+
+    def __dispatch_updates__(self, updates: List[dict], threaded_run: bool) -> None:
+        """
+        Кладёт обновления в очередь потоков или обрабатывает их сразу.
+        """
+        for update in updates:
+            if threaded_run:
+                self.update_queue.put(update)
+                continue
+
+            try:
+                self._process_update(update)
+            except Exception as e:
+                self.logger.error(traceback.format_exc())
+
+    def __queue_worker__(self, update_queue: UpdateQueue, stop: threading.Event) -> None:
+        """
+        Поток-обработчик: забирает обновления из очереди, пока не будет остановлен.
+        """
+        while not stop.is_set():
+            update = update_queue.get(timeout=0.5)
+
+            if update is None:
+                continue
+
+            try:
+                self._process_update(update)
+            except Exception as e:
+                self.logger.error(traceback.format_exc())
+            finally:
+                update_queue.task_done(update)
     
-    def start_polling(self, on_startup: Callable=None, threaded_run: bool=False, thread_max_works: int=10, *args) -> None:
-        self.polling(on_startup, threaded_run, thread_max_works, *args)
+    def sharded_polling(self, on_startup: Callable=None, processes: int=None, queue_size: int=1000, *args) -> None:
+        """
+        Запускает опрос в многопроцессном режиме: текущий процесс получает обновления и распределяет их по айди чата между процессами-воркерами.
+        Обновления одного чата обрабатываются по порядку одним воркером, там же хранится его состояние FSM.
+
+        :param on_startup: Функция, которая будет вызвана до запуска воркеров.
+        :param processes: Количество воркеров, по умолчанию количество ядер.
+        :param queue_size: Размер очереди каждого воркера.
+        :param args: Дополнительные аргументы для on_startup.
+        :return: Ничего не возвращает.
+        """
+        from .workers import ShardedPolling
+
+        ShardedPolling(self, processes, queue_size).run(on_startup, *args)
+
+    def start_polling(self, on_startup: Callable=None, threaded_run: bool=False, thread_max_works: int=10, *args, journal: UpdateJournal=None, update_queue: UpdateQueue=None) -> None:
+        self.polling(on_startup, threaded_run, thread_max_works, *args, journal=journal, update_queue=update_queue)
     
-    def __run_func_with_try_except__(self, func: Callable, *args):
+    def __run_func_with_try_except__(self, calls: List[Tuple[Callable, list, dict]], middlewares: List[BaseMiddleware], update: dict, data: dict):
         """
-        Функция для логирования.
+        Вызывает обработчики с логированием ошибок и затем post_process у middleware.
         """
+        exception = None
 
-        try:
-            func(*args)
-        except:
-            self.logger.error(traceback.format_exc())
\ No newline at end of file
+        for func, args, kwargs in calls:
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                exception = e
+                self.logger.error(traceback.format_exc())
+
+        self.__post_process__(middlewares, update, data, exception)
+
+    def __post_process__(self, middlewares: List[BaseMiddleware], update: dict, data: dict, exception: BaseException=None):
+        for middleware in reversed(middlewares):
+            try:
+                middleware.post_process(update, data, exception)
+            except Exception:
+                self.logger.error(traceback.format_exc())
\ No newline at end of file
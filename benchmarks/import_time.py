@@ -0,0 +1,63 @@
+"""
+Проверка времени импорта: `import EasyGram` не должен загружать requests, aiohttp и asyncio.
+
+Запуск (EasyGram должен быть установлен или лежать в PYTHONPATH):
+    python benchmarks/import_time.py
+
+Скрипт завершается с ошибкой, если тяжёлые зависимости загружаются при импорте, и выводит самые долгие импорты по данным `-X importtime`.
+"""
+
+import subprocess
+import json
+import sys
+
+FORBIDDEN = ('requests', 'aiohttp', 'asyncio')
+
+CODE = f"""
+import json, sys
+import EasyGram
+print(json.dumps([name for name in {FORBIDDEN!r} if name in sys.modules]))
+"""
+
+def main() -> int:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CODE], capture_output=True, text=True)
+
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+
+    # Строки вида "import time: self [us] | cumulative | imported package" идут в порядке завершения импорта,
+    # поэтому вложенные импорты EasyGram - это строки между предыдущим импортом верхнего уровня и строкой EasyGram
+    timings = []
+    block = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        block.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+        if not name.startswith('  '):
+            if name.strip() == 'EasyGram':
+                timings = block
+
+            block = []
+
+    if timings:
+        print(f'import EasyGram: {timings[-1][0] / 1000:.1f} ms')
+
+    for cumulative, self_us, name in sorted(timings, reverse=True)[:15]:
+        print(f'{cumulative / 1000:8.1f} ms {self_us / 1000:8.1f} ms  {name}')
+
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+
+    if loaded:
+        print(f'При импорте загружены: {", ".join(loaded)}', file=sys.stderr)
+        return 1
+
+    print(f'OK: {", ".join(FORBIDDEN)} не загружаются при импорте')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Микробенчмарк handle_reply_markup: прежний обход (копия реализации до кэширования, только синхронные типы) против текущего.
+
+Запуск (EasyGram должен быть установлен или лежать в PYTHONPATH):
+    python benchmarks/reply_markup.py
+"""
+
+from typing import Any, Callable
+import timeit
+
+from EasyGram.types import InlineKeyboardButton, KeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+from EasyGram.utils import handle_reply_markup
+
+def legacy_handle_reply_markup(reply_markup: Any, async_mode: bool=False) -> Any:
+    """
+    Прежняя реализация: каждая кнопка проверяется рекурсивным вызовом (который создаёт лишнюю клавиатуру),
+    а клавиатура собирается заново при каждом вызове.
+    """
+    if isinstance(reply_markup, InlineKeyboardButton):
+        _btn = InlineKeyboardMarkup()
+        _btn.add(reply_markup)
+
+        return _btn
+    elif isinstance(reply_markup, KeyboardButton):
+        _btn = ReplyKeyboardMarkup()
+        _btn.add(reply_markup)
+
+        return _btn
+    elif isinstance(reply_markup, (InlineKeyboardMarkup, ReplyKeyboardMarkup)):
+        return reply_markup
+    elif isinstance(reply_markup, str):
+        _btn = ReplyKeyboardMarkup()
+        _btn.add(reply_markup)
+
+        return _btn
+    elif isinstance(reply_markup, list):
+        btns = []
+        _type = None
+        _kb_type = None
+
+        for column in reply_markup:
+            _btns = []
+            __type = None
+
+            for row in column:
+                if legacy_handle_reply_markup(row) is None:
+                    return None
+
+                if isinstance(row, str):
+                    _btns.append(KeyboardButton(row))
+
+                    _kb_type = ReplyKeyboardMarkup
+                    __type = KeyboardButton
+                elif isinstance(row, InlineKeyboardButton):
+                    _btns.append(row)
+
+                    _kb_type = InlineKeyboardMarkup
+                    __type = InlineKeyboardButton
+                elif isinstance(row, KeyboardButton):
+                    _btns.append(row)
+
+                    _kb_type = ReplyKeyboardMarkup
+                    __type = KeyboardButton
+                else:
+                    return None
+
+                if _type is None:
+                    _type = __type
+
+            if _type != None and _type != __type:
+                return None
+
+            btns.append(_btns.copy())
+
+        kb = _kb_type()
+
+        if _type is not None:
+            for btn in btns:
+                kb.add(*btn)
+
+        return kb
+    else:
+        return None
+
+def inline_grid() -> list:
+    return [[InlineKeyboardButton(f'Кнопка {i}-{j}', callback_data=f'item:{i}:{j}') for j in range(2)] for i in range(15)]
+
+CASES = [
+    ('15x2 inline buttons', inline_grid, lambda markup: markup),
+    ("[['Yes', 'No'], ['Cancel']]", lambda: [['Yes', 'No'], ['Cancel']], lambda markup: markup),
+    ('15x2 inline buttons + to_json()', inline_grid, lambda markup: markup.to_json())
+]
+
+def measure(function: Callable[[Any], Any], make_input: Callable[[], Any], finish: Callable[[Any], Any], number: int=2000) -> float:
+    # Входные данные создаются заранее, как клавиатура, собранная один раз в обработчике
+    value = make_input()
+    seconds = min(timeit.repeat(lambda: finish(function(value)), number=number, repeat=5))
+
+    return seconds / number * 1e6
+
+def main() -> None:
+    for name, make_input, finish in CASES:
+        # Результаты должны совпадать, иначе сравнение не имеет смысла
+        assert str(legacy_handle_reply_markup(make_input()).to_json()) == str(handle_reply_markup(make_input()).to_json()), name
+
+        old = measure(legacy_handle_reply_markup, make_input, finish)
+        new = measure(handle_reply_markup, make_input, finish)
+
+        print(f'{name}: {old:.1f}us -> {new:.1f}us ({old / new:.1f}x)')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
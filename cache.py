@@ -0,0 +1,221 @@
+"""
+Кэш ответов Bot API для методов, ответы которых редко меняются (getMe, getFile, getChat, getChatMember).
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+import json
+import time
+
+from .exception import BadRequest, Forbidden, NotFound
+
+__all__ = [
+    'DEFAULT_TTLS',
+    'ResponseCache'
+]
+
+DEFAULT_TTLS: Dict[str, float] = {
+    'getMe': 3600,
+    # Ссылка на файл действительна не меньше часа
+    'getFile': 1800,
+    'getChat': 60,
+    'getChatMember': 30,
+    'getChatAdministrators': 60
+}
+
+# Ошибки, которые кэшируются (чат или пользователь не найден, нет доступа), в отличие от сетевых ошибок и TooManyRequests
+NEGATIVE_ERRORS = (BadRequest, Forbidden, NotFound)
+
+_MISS = object()
+
+class _Error:
+    __slots__ = ('type', 'args')
+
+    def __init__(self, error: BaseException):
+        self.type = type(error)
+        self.args = error.args
+
+    def raise_(self) -> None:
+        raise self.type(*self.args)
+
+class ResponseCache:
+    """
+    Кэш ответов для Request: per-method TTL, кэширование ошибок, объединение одинаковых одновременных запросов
+    и вытеснение давно не использованных записей (LRU).
+
+    Использование:
+        bot = SyncBot(token, response_cache=ResponseCache())
+        bot.get_file(file_id)  # повторный вызов в течение 30 минут не идёт в сеть
+
+    Кэшируются только методы из `ttls`.Ключ - адрес метода (с токеном бота) и параметры, поэтому один кэш можно отдать нескольким ботам.
+    Ответы отдаются одним и тем же объектом, изменять их нельзя.
+
+    Args:
+        ttls (Dict[str, float], optional): Время жизни ответа в секундах для каждого метода, по умолчанию DEFAULT_TTLS.
+        maxsize (int): Максимальное число записей.
+        negative_ttl (float): Время жизни ошибок BadRequest/Forbidden/NotFound, 0 - не кэшировать ошибки.
+    """
+    def __init__(self, ttls: Dict[str, float]=None, maxsize: int=1024, negative_ttl: float=10.0):
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._tasks: Dict[Tuple[str, str], Any] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f'ResponseCache(size={len(self)}, hits={self.hits}, misses={self.misses}, joined={self.joined})'
+
+    def clone(self) -> 'ResponseCache':
+        """
+        Пустой кэш с теми же настройками (например, для процесса после fork).
+        """
+        return ResponseCache(self.ttls, self.maxsize, self.negative_ttl)
+
+    def clear(self, method: str=None) -> None:
+        """
+        Удаляет все записи или записи одного метода.
+        """
+        with self._lock:
+            if method is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key in self._entries if key[0].rsplit('/', 1)[-1] == method]:
+                del self._entries[key]
+
+    def cacheable(self, url: str) -> bool:
+        return url.rsplit('/', 1)[-1] in self.ttls
+
+    @staticmethod
+    def _key(url: str, parameters: Optional[dict]) -> Tuple[str, str]:
+        return (url, '' if not parameters else json.dumps(parameters, sort_keys=True, ensure_ascii=False, default=str))
+
+    def _lookup(self, key: Tuple[str, str]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is None:
+                return _MISS
+
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return _MISS
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def _store(self, key: Tuple[str, str], value: Any) -> None:
+        if isinstance(value, BaseException):
+            ttl = self.negative_ttl
+            value = _Error(value)
+        else:
+            ttl = self.ttls.get(key[0].rsplit('/', 1)[-1], 0)
+
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        if isinstance(value, _Error):
+            value.raise_()
+
+        return value
+
+    def call(self, url: str, parameters: Optional[dict], fetch: Callable[[], Any]) -> Any:
+        """
+        Ответ из кэша или результат `fetch()`.Одновременные одинаковые запросы из разных потоков ждут один `fetch`.
+        """
+        key = self._key(url, parameters)
+        value = self._lookup(key)
+
+        if value is not _MISS:
+            return self._unwrap(value)
+
+        with self._lock:
+            future = self._futures.get(key, None)
+            owner = future is None
+
+            if owner:
+                future = self._futures[key] = Future()
+                self.misses += 1
+            else:
+                self.joined += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except NEGATIVE_ERRORS as e:
+            self._store(key, e)
+            future.set_exception(e)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._store(key, result)
+            future.set_result(result)
+
+            return result
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    async def acall(self, url: str, parameters: Optional[dict], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Асинхронная версия call: одинаковые одновременные запросы ждут одну задачу, отмена одного из ожидающих её не отменяет.
+        """
+        import asyncio
+
+        key = self._key(url, parameters)
+        value = self._lookup(key)
+
+        if value is not _MISS:
+            return self._unwrap(value)
+
+        task = self._tasks.get(key, None)
+
+        if task is None:
+            self.misses += 1
+            task = self._tasks[key] = asyncio.ensure_future(self._afetch(key, fetch))
+            # Ошибку задачи, которую уже никто не ждёт, не выводим как "never retrieved"
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        else:
+            self.joined += 1
+
+        return await asyncio.shield(task)
+
+    async def _afetch(self, key: Tuple[str, str], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fetch()
+        except NEGATIVE_ERRORS as e:
+            self._store(key, e)
+            raise
+        else:
+            self._store(key, result)
+
+            return result
+        finally:
+            self._tasks.pop(key, None)
@@ -0,0 +1,158 @@
+"""
+Структурированные данные кнопок (callback_data): упаковка полей в строку до 64 байт и разбор обратно.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+__all__ = [
+    'CallbackData',
+    'CallbackDataFilter',
+    'MAX_CALLBACK_DATA_BYTES'
+]
+
+MAX_CALLBACK_DATA_BYTES = 64
+
+def _to_bool(value: str) -> bool:
+    return value == '1'
+
+def _from_bool(value: Any) -> str:
+    return '1' if value else '0'
+
+_PARSERS: Dict[type, Callable[[str], Any]] = {str: str, int: int, float: float, bool: _to_bool}
+_FORMATTERS: Dict[type, Callable[[Any], str]] = {str: str, int: lambda value: str(int(value)), float: repr, bool: _from_bool}
+
+class CallbackData:
+    """
+    Фабрика callback_data вида `prefix:value1:value2`.
+
+    Использование:
+        item = CallbackData('item', id=int, action=str)
+
+        InlineKeyboardButton('Купить', callback_data=item.new(id=5, action='buy'))  # 'item:5:buy'
+
+        @bot.callback_query(callback_data=item.filter(action='buy'))
+        def buy(callback_query, id, action): ...
+
+    Обработчики с `callback_data` ищутся по префиксу через словарь, а не перебором фильтров.
+    Поля передаются в обработчик параметрами с их именами, все поля вместе - параметром `callback_data` (dict).
+
+    Args:
+        prefix (str): Префикс, по которому бот находит обработчики.Не должен содержать `sep`.
+        *fields (str): Имена строковых полей.
+        sep (str): Разделитель полей.
+        **typed_fields (type): Поля с типами: str, int, float или bool.
+    """
+    def __init__(self, prefix: str, *fields: str, sep: str=':', **typed_fields: type):
+        if not prefix or sep in prefix:
+            raise ValueError(f'Префикс не может быть пустым или содержать "{sep}".')
+
+        self.prefix = prefix
+        self.sep = sep
+        self.fields: Dict[str, type] = {field: str for field in fields}
+
+        for field, _type in typed_fields.items():
+            if _type not in _PARSERS:
+                raise TypeError(f'Неподдерживаемый тип поля {field}: {_type!r}.')
+
+            self.fields[field] = _type
+
+    def __repr__(self) -> str:
+        return f'CallbackData({self.prefix!r}, {", ".join(self.fields)})'
+
+    def new(self, *args: Any, **kwargs: Any) -> str:
+        """
+        Упаковывает значения полей в строку для InlineKeyboardButton.
+
+        Raises:
+            ValueError: Не хватает полей, значение содержит разделитель или результат длиннее 64 байт.
+        """
+        values = dict(zip(self.fields, args))
+        values.update(kwargs)
+
+        parts = [self.prefix]
+
+        for field, _type in self.fields.items():
+            if field not in values:
+                raise ValueError(f'Не указано поле {field}.')
+
+            value = _FORMATTERS[_type](values[field])
+
+            if self.sep in value:
+                raise ValueError(f'Значение поля {field} не может содержать "{self.sep}".')
+
+            parts.append(value)
+
+        data = self.sep.join(parts)
+
+        if len(data.encode('utf-8')) > MAX_CALLBACK_DATA_BYTES:
+            raise ValueError(f'callback_data длиннее {MAX_CALLBACK_DATA_BYTES} байт: {data!r}.')
+
+        return data
+
+    def parse(self, data: str) -> Optional[Dict[str, Any]]:
+        """
+        Разбирает callback_data.
+
+        Returns:
+            dict: Значения полей с их типами или None, если данные созданы не этой фабрикой.
+        """
+        parts = data.split(self.sep)
+
+        if parts[0] != self.prefix or len(parts) != len(self.fields) + 1:
+            return None
+
+        try:
+            return {field: _PARSERS[_type](value) for (field, _type), value in zip(self.fields.items(), parts[1:])}
+        except ValueError:
+            return None
+
+    def filter(self, **conditions: Any) -> 'CallbackDataFilter':
+        """
+        Условие для обработчика: `item.filter(action='buy')` или `item.filter(action=['buy', 'sell'])`.
+        """
+        for field in conditions:
+            if field not in self.fields:
+                raise ValueError(f'У {self!r} нет поля {field}.')
+
+        return CallbackDataFilter(self, conditions)
+
+class CallbackDataFilter:
+    """
+    Фабрика CallbackData с условиями на значения полей.Создаётся через CallbackData.filter.
+    """
+    def __init__(self, factory: CallbackData, conditions: Dict[str, Any]):
+        self.factory = factory
+        self.conditions: List[Tuple[str, Any]] = [
+            (field, frozenset(value) if isinstance(value, (list, tuple, set, frozenset)) else value) for field, value in conditions.items()
+        ]
+
+    def check(self, data: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            dict: Значения полей, если `data` подходит под фабрику и условия, иначе None.
+        """
+        values = self.factory.parse(data)
+
+        if values is None:
+            return None
+
+        for field, expected in self.conditions:
+            if isinstance(expected, frozenset):
+                if values[field] not in expected:
+                    return None
+            elif values[field] != expected:
+                return None
+
+        return values
+
+def as_filter(callback_data: Any) -> Optional[CallbackDataFilter]:
+    """
+    Приводит параметр `callback_data` обработчика к CallbackDataFilter.
+    """
+    if callback_data is None or isinstance(callback_data, CallbackDataFilter):
+        return callback_data
+
+    if isinstance(callback_data, CallbackData):
+        return callback_data.filter()
+
+    raise TypeError('callback_data должен быть CallbackData или CallbackData.filter(...).')
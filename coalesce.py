@@ -0,0 +1,212 @@
+"""
+Объединение частых правок одного сообщения (например, прогресс-бар) в один запрос.
+"""
+
+from typing import Any, Callable, Dict, Optional, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+if TYPE_CHECKING:
+    import asyncio
+
+__all__ = [
+    'EditCoalescer',
+    'AsyncEditCoalescer'
+]
+
+class _BaseEditCoalescer:
+    """
+    Общая часть EditCoalescer и AsyncEditCoalescer.
+
+    Правки одного сообщения одним методом отправляются не чаще раза в `interval` секунд.Пока правка ждёт отправки,
+    новая правка того же сообщения заменяет её, а все вызывающие получают результат последней, отправленной правки.
+
+    Args:
+        send (Callable[[str, dict], Any]): Функция, которая отправляет метод API с параметрами и возвращает ответ Telegram (dict).
+        interval (float): Минимальный интервал между правками одного сообщения в секундах.
+    """
+    def __init__(self, send: Callable[[str, dict], Any], interval: float=1.0):
+        self.send = send
+        self.interval = interval
+
+        self._pending: Dict[tuple, list] = {}
+        self._last_sent: Dict[tuple, float] = {}
+
+        self.sent = 0
+        self.superseded = 0
+
+    @staticmethod
+    def _key(method: str, parameters: dict) -> tuple:
+        return (method, parameters.get('chat_id'), parameters.get('message_id'), parameters.get('inline_message_id'))
+
+    def _due(self, key: tuple, now: float) -> float:
+        return self._last_sent.get(key, now - self.interval) + self.interval
+
+    def _prune(self, now: float) -> None:
+        if len(self._last_sent) > 10_000:
+            self._last_sent = {key: sent for key, sent in self._last_sent.items() if now - sent < self.interval}
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: pending - правок ждёт отправки, sent - отправлено запросов, superseded - правок заменено более новыми.
+        """
+        return {'pending': len(self._pending), 'sent': self.sent, 'superseded': self.superseded}
+
+class EditCoalescer(_BaseEditCoalescer):
+    """
+    Объединитель правок для SyncBot.Фоновый поток выбирает правки, которым пора отправляться, и отдаёт их пулу из `max_workers` потоков:
+    правки разных сообщений отправляются одновременно, а медленная правка одного чата не задерживает остальные.
+    Правки одного сообщения по-прежнему отправляются по одной.
+
+    Args:
+        max_workers (int): Сколько правок отправляется одновременно.
+    """
+    def __init__(self, send: Callable[[str, dict], Any], interval: float=1.0, max_workers: int=8):
+        super().__init__(send, interval)
+        self.max_workers = max_workers
+
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: set = set()
+
+    def submit(self, method: str, parameters: dict) -> Future:
+        """
+        Ставит правку в очередь.
+
+        Returns:
+            Future: Ответ Telegram на правку, которая будет отправлена последней.
+        """
+        future = Future()
+        key = self._key(method, parameters)
+
+        with self._condition:
+            if key in self._pending:
+                self._pending[key][1] = parameters
+                self._pending[key][2].append(future)
+                self.superseded += 1
+            else:
+                self._pending[key] = [method, parameters, [future]]
+
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='EasyGram-edit')
+                self._thread = threading.Thread(target=self._run, daemon=True, name='EasyGram-edit-coalescer')
+                self._thread.start()
+
+            self._condition.notify()
+
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    # Сообщение, правка которого ещё отправляется, ждёт её ответа
+                    due = min(((self._due(key, now), key) for key in self._pending if key not in self._in_flight), default=None)
+                    busy = len(self._in_flight) >= self.max_workers
+
+                    if due is not None and due[0] <= now and not busy:
+                        break
+
+                    self._condition.wait(None if due is None or busy else due[0] - now)
+
+                key = due[1]
+                method, parameters, futures = self._pending.pop(key)
+                self._in_flight.add(key)
+                self._last_sent[key] = now
+                self._prune(now)
+
+            self._executor.submit(self._send, key, method, parameters, futures)
+
+    def _send(self, key: tuple, method: str, parameters: dict, futures: list) -> None:
+        try:
+            result = self.send(method, parameters)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future in futures:
+                future.set_result(result)
+        finally:
+            with self._condition:
+                self._in_flight.discard(key)
+                self.sent += 1
+                self._condition.notify()
+
+class AsyncEditCoalescer(_BaseEditCoalescer):
+    """
+    Объединитель правок для AsyncBot.`send` - корутина, используется внутри одного цикла событий.
+    Правки разных сообщений отправляются отдельными задачами, а следующая правка сообщения - только после ответа на предыдущую.
+    """
+    def __init__(self, send: Callable[[str, dict], Any], interval: float=1.0):
+        super().__init__(send, interval)
+
+        self._in_flight: set = set()
+        # Ссылки на задачи, чтобы их не удалил сборщик мусора
+        self._tasks: set = set()
+
+    def _schedule(self, key: tuple) -> None:
+        import asyncio
+
+        task = asyncio.get_running_loop().create_task(self._flush(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    def submit(self, method: str, parameters: dict) -> 'asyncio.Future':
+        """
+        Ставит правку в очередь.
+
+        Returns:
+            asyncio.Future: Ответ Telegram на правку, которая будет отправлена последней.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = self._key(method, parameters)
+
+        if key in self._pending:
+            self._pending[key][1] = parameters
+            self._pending[key][2].append(future)
+            self.superseded += 1
+        else:
+            self._pending[key] = [method, parameters, [future]]
+
+            # Если правка сообщения ещё отправляется, эту запланирует _flush после ответа
+            if key not in self._in_flight:
+                self._schedule(key)
+
+        return future
+
+    async def _flush(self, key: tuple) -> None:
+        delay = self._due(key, time.monotonic()) - time.monotonic()
+
+        if delay > 0:
+            import asyncio
+
+            await asyncio.sleep(delay)
+
+        method, parameters, futures = self._pending.pop(key)
+        now = time.monotonic()
+        self._last_sent[key] = now
+        self._prune(now)
+        self._in_flight.add(key)
+
+        try:
+            result = await self.send(method, parameters)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight.discard(key)
+            self.sent += 1
+
+            if key in self._pending:
+                self._schedule(key)
@@ -0,0 +1,601 @@
+"""
+Общая маршрутизация обновлений для SyncBot и AsyncBot.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Pattern, Tuple, Union
+from functools import lru_cache
+import fnmatch
+import inspect
+import re
+
+from .state import StatesGroup, FSMContext
+
+__all__ = [
+    'UPDATE_TYPES',
+    'Priority',
+    'DEFAULT_PRIORITIES',
+    'get_priority',
+    'get_update_type',
+    'get_chat_id',
+    'get_user_id',
+    'parse_command',
+    'CommandIndex',
+    'RegexpMatcher',
+    'CallbackIndex',
+    'compile_pattern',
+    'route_update',
+    'maybe_await'
+]
+
+UPDATE_TYPES = ('message', 'callback_query', 'poll', 'poll_answer')
+
+class Priority:
+    """
+    Приоритеты обработки обновлений.Обновления с большим приоритетом забираются из очереди раньше.
+    """
+    LOW = 0
+    NORMAL = 5
+    HIGH = 10
+
+# 'command' - сообщения, которые начинаются с '/'
+DEFAULT_PRIORITIES = {
+    'callback_query': Priority.HIGH,
+    'command': Priority.HIGH,
+    'message': Priority.NORMAL,
+    'poll_answer': Priority.LOW,
+    'poll': Priority.LOW
+}
+
+def get_update_type(update: dict) -> Optional[str]:
+    """
+    Возвращает тип обновления: 'message', 'callback_query', 'poll' или 'poll_answer'.
+    """
+    for update_type in UPDATE_TYPES:
+        if update.get(update_type, False):
+            return update_type
+
+    return None
+
+def get_chat_id(update: dict) -> Optional[int]:
+    """
+    Достаёт айди чата из необработанного обновления, не создавая объектов Message/CallbackQuery.
+    """
+    if update.get('message', False):
+        return update['message'].get('chat', {}).get('id', None)
+    elif update.get('callback_query', False):
+        return (update['callback_query'].get('message') or {}).get('chat', {}).get('id', None)
+
+    return None
+
+def get_user_id(update: dict) -> Optional[int]:
+    """
+    Достаёт айди пользователя из необработанного обновления.
+    """
+    if update.get('message', False):
+        return update['message'].get('from', {}).get('id', None)
+    elif update.get('callback_query', False):
+        return update['callback_query'].get('from', {}).get('id', None)
+    elif update.get('poll_answer', False):
+        return update['poll_answer'].get('user', {}).get('id', None)
+
+    return None
+
+async def maybe_await(value: Any) -> Any:
+    """
+    Дожидается значения, если это корутина, иначе возвращает его как есть.
+    """
+    if inspect.isawaitable(value):
+        return await value
+
+    return value
+
+@lru_cache(maxsize=1024)
+def _get_parameters(func: Callable) -> Tuple[Tuple[str, Any], ...]:
+    try:
+        return tuple((name, parameter.kind) for name, parameter in inspect.signature(func).parameters.items())
+    except (TypeError, ValueError):
+        return (('args', inspect.Parameter.VAR_POSITIONAL),)
+
+def handler_call(func: Callable, obj: Any, user_id: Optional[int], data: dict) -> Tuple[Callable, list, dict]:
+    """
+    Собирает аргументы для обработчика: объект обновления, FSMContext (если обработчик принимает второй аргумент)
+    и значения из `data`, имена которых совпадают с параметрами обработчика.
+    """
+    kwargs = {}
+    positional = []
+    var_keyword = False
+
+    for name, kind in _get_parameters(func):
+        if kind == inspect.Parameter.VAR_KEYWORD:
+            var_keyword = True
+        elif name in data and kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY):
+            kwargs[name] = data[name]
+        elif kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.VAR_POSITIONAL):
+            positional.append(name)
+
+    if var_keyword:
+        kwargs = {key: value for key, value in data.items() if key not in positional}
+
+    args = [obj]
+
+    if len(positional) > 1 and user_id is not None:
+        args.append(FSMContext(user_id))
+
+    return func, args, kwargs
+
+def check_chat_type(allowed_chat_type: Any, chat_type: Optional[str]) -> bool:
+    if allowed_chat_type is None:
+        return True
+
+    if isinstance(allowed_chat_type, str):
+        return chat_type == allowed_chat_type
+
+    return chat_type in allowed_chat_type
+
+def check_state(state: Any, user_id: Optional[int]) -> bool:
+    if state is None:
+        return True
+
+    if user_id not in StatesGroup.user_registers:
+        return False
+
+    return state == StatesGroup.user_registers[user_id]['state']
+
+def check_content_types(content_types: Any, message: dict) -> bool:
+    if content_types is None:
+        return True
+
+    if isinstance(content_types, str):
+        return content_types.lower() == 'any' or bool(message.get(content_types, False))
+
+    return any(_type.lower() == 'any' or message.get(_type, False) for _type in content_types)
+
+def parse_command(text: Optional[str], username: Optional[str]=None) -> Optional[str]:
+    """
+    Достаёт команду из текста сообщения: '/start@bot arg' -> 'start'.
+
+    Args:
+        text (str, optional): Текст сообщения.
+        username (str, optional): Имя бота.Команда с упоминанием другого бота ('/start@other_bot') не считается командой.
+
+    Returns:
+        str: Команда без '/' и упоминания или None.
+    """
+    if not text or text[0] != '/':
+        return None
+
+    command, _, mention = text.split(maxsplit=1)[0][1:].partition('@')
+
+    if mention and username is not None and mention.lower() != username.lower():
+        return None
+
+    return command
+
+def compile_pattern(regexp: Union[str, Pattern, None]=None, text_pattern: Optional[str]=None) -> Optional[Pattern]:
+    """
+    Компилирует `regexp` или `text_pattern` обработчика сообщений.
+
+    Args:
+        regexp (Union[str, Pattern], optional): Регулярное выражение, проверяется с начала текста (re.match).
+        text_pattern (str, optional): Шаблон всего текста в стиле fnmatch: '*' - любые символы, '?' - один символ.
+
+    Returns:
+        Pattern: Скомпилированное выражение или None.
+    """
+    if regexp is not None and text_pattern is not None:
+        raise ValueError('Укажите только regexp или text_pattern.')
+
+    if text_pattern is not None:
+        return re.compile(fnmatch.translate(text_pattern))
+
+    if regexp is not None:
+        return re.compile(regexp)
+
+    return None
+
+_NAMED_GROUP = re.compile(r'(?<!\\)\(\?P<\w+>')
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+class RegexpMatcher:
+    """
+    Все `regexp`/`text_pattern` обработчиков сообщений, объединённые в одно выражение `(?P<_0>...)|(?P<_1>...)|...`.
+
+    Одна проверка объединённого выражения показывает, с какого по порядку обработчика выражения начинают совпадать:
+    все выражения до него не совпадают, а если совпадений нет - обработчики с выражениями пропускаются без проверок.
+    Выражения с обратными ссылками или своими флагами в объединённое не входят, и тогда каждое проверяется отдельно.
+
+    Args:
+        handlers (List[dict]): Обработчики сообщений бота.
+    """
+    def __init__(self, handlers: List[dict]):
+        self.rank: Dict[int, int] = {}
+        alternatives = []
+
+        for handler in handlers:
+            if handler.get('regexp', None) is not None:
+                self.rank[id(handler)] = len(alternatives)
+                alternatives.append(handler['regexp'])
+
+        self.size = len(alternatives)
+        self.combined: Optional[Pattern] = None
+
+        if alternatives and all(self._combinable(pattern) for pattern in alternatives):
+            try:
+                self.combined = re.compile('|'.join(f'(?P<_{indx}>{_NAMED_GROUP.sub("(", pattern.pattern)})' for indx, pattern in enumerate(alternatives)))
+            except re.error:
+                self.combined = None
+
+    @staticmethod
+    def _combinable(pattern: Pattern) -> bool:
+        return isinstance(pattern.pattern, str) and pattern.flags == re.U and not _BACKREFERENCE.search(pattern.pattern)
+
+    def first(self, text: str) -> int:
+        """
+        Номер первого выражения, которое может совпасть с `text`.`size` - ни одно не совпадает.
+        """
+        if self.combined is None:
+            return 0
+
+        match = self.combined.match(text)
+
+        if match is None:
+            return self.size
+
+        return int(match.lastgroup[1:])
+
+class TextMatch:
+    """
+    Проверка выражений обработчиков для одного сообщения.Объединённое выражение проверяется не больше одного раза.
+    """
+    def __init__(self, matcher: RegexpMatcher, text: Optional[str]):
+        self.matcher = matcher
+        self.text = text
+        self._first: Optional[int] = None
+
+    @property
+    def first(self) -> int:
+        """
+        Номер первого выражения, которое может совпасть (см. RegexpMatcher.first).
+        """
+        if self._first is None:
+            self._first = self.matcher.size if self.text is None else self.matcher.first(self.text)
+
+        return self._first
+
+    def __call__(self, handler: dict) -> Optional[Any]:
+        """
+        Returns:
+            re.Match: Совпадение выражения обработчика или None.
+        """
+        if self.matcher.rank[id(handler)] < self.first:
+            return None
+
+        return handler['regexp'].match(self.text)
+
+class CommandIndex:
+    """
+    Индекс обработчиков сообщений по командам.
+
+    Для каждой команды заранее собран список обработчиков-кандидатов в порядке регистрации: обработчики этой команды
+    и обработчики без `commands`.Поэтому поиск обработчика не сравнивает команду с каждым обработчиком.
+
+    Args:
+        handlers (List[dict]): Обработчики сообщений бота.
+    """
+    def __init__(self, handlers: List[dict]):
+        self.size = len(handlers)
+
+        generic = set()
+        commands: Dict[str, set] = {}
+
+        for indx, handler in enumerate(handlers):
+            if handler['commands'] is None:
+                generic.add(indx)
+                continue
+
+            for command in [handler['commands']] if isinstance(handler['commands'], str) else handler['commands']:
+                commands.setdefault(command, set()).add(indx)
+
+        self.generic: List[dict] = [handlers[indx] for indx in sorted(generic)]
+        self.commands: Dict[str, List[dict]] = {command: [handlers[indx] for indx in sorted(indexes | generic)] for command, indexes in commands.items()}
+        self.regexp = RegexpMatcher(handlers)
+        self._skipped: Dict[Tuple[Optional[str], int], List[dict]] = {}
+
+    def get(self, command: Optional[str], first: int=0) -> List[dict]:
+        """
+        Обработчики, которые могут подойти сообщению с командой `command` (None - сообщение без команды).
+
+        Args:
+            first (int): Номер первого выражения, которое может совпасть с текстом (RegexpMatcher.first).
+                Обработчики с выражениями до него в список не попадают.
+        """
+        if command not in self.commands:
+            command = None
+
+        handlers = self.generic if command is None else self.commands[command]
+
+        if not first:
+            return handlers
+
+        skipped = self._skipped.get((command, first), None)
+
+        if skipped is None:
+            rank = self.regexp.rank
+            skipped = self._skipped[(command, first)] = [handler for handler in handlers if rank.get(id(handler), first) >= first]
+
+        return skipped
+
+def get_command_index(bot: Any) -> CommandIndex:
+    """
+    Индекс команд бота.Пересобирается, если с прошлого раза добавились обработчики (в том числе из роутеров).
+    """
+    index = getattr(bot, '_command_index', None)
+
+    if index is None or index.size != len(bot._message_handlers):
+        index = bot._command_index = CommandIndex(bot._message_handlers)
+
+    return index
+
+def get_message_handlers(bot: Any, raw: dict, text_match: TextMatch=None) -> List[dict]:
+    """
+    Обработчики сообщений, команды которых подходят сообщению `raw`.С `text_match` в список не попадают
+    обработчики, выражения которых точно не совпадают с текстом.
+    """
+    # Без ожидания getMe: пока ответа нет, упоминание бота в команде не проверяется
+    me = getattr(bot, '_me', None)
+    index = get_command_index(bot)
+
+    return index.get(parse_command(raw.get('text', None), getattr(me, 'username', None)), text_match.first if text_match is not None and index.regexp.size else 0)
+
+def get_text_match(bot: Any, raw: dict) -> TextMatch:
+    """
+    Проверка `regexp`/`text_pattern` обработчиков по тексту (или подписи) сообщения `raw`.
+    """
+    return TextMatch(get_command_index(bot).regexp, raw.get('text', None) or raw.get('caption', None))
+
+class CallbackIndex:
+    """
+    Индекс обработчиков callback_query по префиксу callback_data.
+
+    Для каждого префикса заранее собран список кандидатов в порядке регистрации: обработчики с фабрикой этого префикса
+    и обработчики без `callback_data`.
+
+    Args:
+        handlers (List[dict]): Обработчики callback_query бота.
+    """
+    def __init__(self, handlers: List[dict]):
+        self.size = len(handlers)
+
+        generic = set()
+        prefixes: Dict[str, set] = {}
+        self.separators: List[str] = []
+
+        for indx, handler in enumerate(handlers):
+            callback_filter = handler.get('callback_data', None)
+
+            if callback_filter is None:
+                generic.add(indx)
+                continue
+
+            prefixes.setdefault(callback_filter.factory.prefix, set()).add(indx)
+
+            if callback_filter.factory.sep not in self.separators:
+                self.separators.append(callback_filter.factory.sep)
+
+        self.generic: List[dict] = [handlers[indx] for indx in sorted(generic)]
+        self.prefixes: Dict[str, List[dict]] = {prefix: [handlers[indx] for indx in sorted(indexes | generic)] for prefix, indexes in prefixes.items()}
+
+    def get(self, data: Optional[str]) -> List[dict]:
+        """
+        Обработчики, которые могут подойти нажатию кнопки с `data`.
+        """
+        if data:
+            for sep in self.separators:
+                handlers = self.prefixes.get(data.partition(sep)[0], None)
+
+                if handlers is not None:
+                    return handlers
+
+        return self.generic
+
+def get_callback_index(bot: Any) -> CallbackIndex:
+    """
+    Индекс callback_data бота.Пересобирается, если с прошлого раза добавились обработчики.
+    """
+    index = getattr(bot, '_callback_index', None)
+
+    if index is None or index.size != len(bot._callback_query_handlers):
+        index = bot._callback_index = CallbackIndex(bot._callback_query_handlers)
+
+    return index
+
+def iter_callback_handlers(bot: Any, raw: dict) -> Iterator[Tuple[dict, Optional[Dict[str, Any]]]]:
+    """
+    Обработчики callback_query, подходящие по callback_data, вместе с разобранными значениями полей.
+    """
+    data = raw.get('data', None)
+
+    for handler in get_callback_index(bot).get(data):
+        callback_filter = handler.get('callback_data', None)
+
+        if callback_filter is None:
+            yield handler, None
+            continue
+
+        values = callback_filter.check(data)
+
+        if values is not None:
+            yield handler, values
+
+def check_message_handler(handler: dict, raw: dict, message: Any) -> bool:
+    if not check_content_types(handler['content_types'], raw):
+        return False
+
+    if not check_chat_type(handler['allowed_chat_type'], raw.get('chat', {}).get('type', None)):
+        return False
+
+    if not check_state(handler['state'], raw.get('from', {}).get('id', None)):
+        return False
+
+    if handler['filters'] is not None and not handler['filters'](message):
+        return False
+
+    return True
+
+def _handler_priority(handlers: list, update_type: str, raw: dict, text_match: TextMatch=None) -> Optional[int]:
+    for handler in handlers:
+        if update_type == 'message':
+            if not check_content_types(handler['content_types'], raw):
+                continue
+
+            if handler.get('regexp', None) is not None and text_match(handler) is None:
+                continue
+
+            if not check_chat_type(handler['allowed_chat_type'], raw.get('chat', {}).get('type', None)):
+                continue
+        elif update_type == 'callback_query':
+            if not check_chat_type(handler['allowed_chat_type'], (raw.get('message') or {}).get('chat', {}).get('type', None)):
+                continue
+
+            if handler.get('callback_data', None) is not None and handler['callback_data'].check(raw.get('data', None) or '') is None:
+                continue
+
+        if not check_state(handler.get('state', None), (raw.get('from') or raw.get('user') or {}).get('id', None)):
+            continue
+
+        return handler.get('priority', None)
+
+    return None
+
+def get_priority(bot: Any, update: dict) -> int:
+    """
+    Приоритет обновления в очереди: `priority` первого обработчика, который подходит без учёта пользовательских фильтров,
+    иначе приоритет типа обновления из `bot.priorities` (для сообщений с командой - 'command').
+    """
+    update_type = get_update_type(update)
+
+    if update_type is None:
+        return Priority.NORMAL
+
+    raw = update[update_type]
+
+    text_match = None
+
+    if update_type == 'message':
+        text_match = get_text_match(bot, raw)
+        handlers = get_message_handlers(bot, raw, text_match)
+    elif update_type == 'callback_query':
+        handlers = get_callback_index(bot).get(raw.get('data', None))
+    else:
+        handlers = {
+            'poll': bot._poll_handlers,
+            'poll_answer': bot._poll_answer_handlers
+        }[update_type]
+
+    priority = _handler_priority(handlers, update_type, raw, text_match)
+
+    if priority is not None:
+        return priority
+
+    if update_type == 'message' and (raw.get('text') or '').startswith('/'):
+        update_type = 'command'
+
+    return bot.priorities.get(update_type, Priority.NORMAL)
+
+def _pop_next_step(steps: list, chat_id: str) -> Optional[tuple]:
+    for indx, step in enumerate(steps):
+        if chat_id == step[0]:
+            return steps.pop(indx)
+
+    return None
+
+def route_update(bot: Any, update: dict, data: dict, types: Any) -> List[Tuple[Callable, list, dict]]:
+    """
+    Находит обработчики для обновления.
+
+    Args:
+        bot (SyncBot | AsyncBot): Бот, в котором зарегистрированы обработчики.
+        update (dict): Необработанное обновление из getUpdates.
+        data (dict): Данные, собранные middleware, передаются в обработчик по имени параметра.
+        types: Модуль с типами (EasyGram.types или EasyGram.Async.types).
+
+    Returns:
+        List[Tuple[Callable, list, dict]]: Функции с аргументами, которые нужно вызвать по порядку.
+    """
+    calls = []
+
+    if update.get('message', False):
+        raw = update['message']
+        message = types.Message(raw, bot)
+        user_id = raw.get('from', {}).get('id', None)
+
+        step = _pop_next_step(bot._next_step_handlers, str(raw['chat']['id']))
+
+        if step is not None:
+            calls.append((step[1], [message, *step[2]], {}))
+
+        text_match = get_text_match(bot, raw)
+
+        for handler in get_message_handlers(bot, raw, text_match):
+            handler_data = data
+
+            if handler.get('regexp', None) is not None:
+                match = text_match(handler)
+
+                if match is None:
+                    continue
+
+                handler_data = {**data, **match.groupdict(), 'match': match}
+
+            if not check_message_handler(handler, raw, message):
+                continue
+
+            calls.append(handler_call(handler['func'], message, user_id, handler_data))
+            break
+    elif update.get('callback_query', False):
+        raw = update['callback_query']
+        callback_query = types.CallbackQuery(raw, bot)
+        chat = (raw.get('message') or {}).get('chat', {})
+        user_id = raw.get('from', {}).get('id', None)
+
+        step = _pop_next_step(bot._query_next_step_handlers, str(chat.get('id', None)))
+
+        if step is not None:
+            calls.append((step[1], [callback_query, *step[2]], {}))
+
+        for handler, values in iter_callback_handlers(bot, raw):
+            if not check_chat_type(handler['allowed_chat_type'], chat.get('type', None)):
+                continue
+
+            if not check_state(handler['state'], user_id):
+                continue
+
+            if handler['filters'] is not None and not handler['filters'](callback_query):
+                continue
+
+            calls.append(handler_call(handler['func'], callback_query, user_id, data if values is None else {**data, **values, 'callback_data': values}))
+            break
+    elif update.get('poll', False):
+        poll = types.Poll(update['poll'])
+
+        for handler in bot._poll_handlers:
+            if handler['filters'] is not None and not handler['filters'](poll):
+                continue
+
+            calls.append(handler_call(handler['func'], poll, None, data))
+            break
+    elif update.get('poll_answer', False):
+        poll_answer = types.PollAnswer(update['poll_answer'])
+        user_id = update['poll_answer'].get('user', {}).get('id', None)
+
+        for handler in bot._poll_answer_handlers:
+            if not check_state(handler['state'], user_id):
+                continue
+
+            if handler['filters'] is not None and not handler['filters'](poll_answer):
+                continue
+
+            calls.append(handler_call(handler['func'], poll_answer, user_id, data))
+            break
+
+    return calls
@@ -0,0 +1,279 @@
+"""
+Скачивание файлов: одновременные скачивания одного файла объединяются в одно, скачанные файлы хранятся на диске.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from concurrent.futures import Future
+from collections import OrderedDict
+import threading
+import hashlib
+import mmap
+import re
+import os
+
+__all__ = [
+    'DownloadCache'
+]
+
+# file_unique_id состоит из символов base64url, остальные ключи хэшируются, чтобы не выйти за пределы папки
+_KEY = re.compile(r'[A-Za-z0-9_-]{1,128}')
+
+class DownloadCache:
+    """
+    Кэш скачанных файлов по file_unique_id (content-addressed: один и тот же файл у разных ботов и сообщений имеет один ключ).
+
+    Одновременные скачивания одного файла (например, популярный файл переслали боту много пользователей сразу)
+    ждут одно скачивание, а скачанный файл сохраняется в `<path>/<первые 2 символа>/<file_unique_id>` и больше не скачивается.
+    Файлы можно читать через mmap (`download_file(file, mapped=True)`), не копируя их в память процесса.
+
+    Использование:
+        bot = SyncBot(token, download_cache='.easygram/files')
+        data = bot.download_file(bot.get_file(file_id))
+
+    Размер папки учитывается в памяти (при первом обращении папка сканируется один раз): при превышении max_bytes
+    удаляются файлы, которые дольше всего не читались.Файлы, записанные другими процессами, учитываются при первом чтении.
+
+    Args:
+        path (str, optional): Папка кэша, None - только объединение одновременных скачиваний, без хранения на диске.
+        max_bytes (int): Максимальный суммарный размер файлов в папке.
+    """
+    def __init__(self, path: Optional[str]='.easygram/files', max_bytes: int=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._tasks: Dict[str, Any] = {}
+
+        # Ключ -> размер, в порядке от давно не читанных к недавно прочитанным
+        self._index: Optional['OrderedDict[str, int]'] = None
+        self._total = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+
+    def __repr__(self) -> str:
+        return f'DownloadCache(path={self.path!r}, bytes={self._total}, hits={self.hits}, misses={self.misses}, joined={self.joined})'
+
+    def clone(self) -> 'DownloadCache':
+        """
+        Кэш с той же папкой и без незавершённых скачиваний (для процесса после fork).
+        """
+        return DownloadCache(self.path, self.max_bytes)
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return key if _KEY.fullmatch(key) else hashlib.sha256(key.encode()).hexdigest()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name[:2], name)
+
+    def _scan(self) -> 'OrderedDict[str, int]':
+        # Вызывается под self._lock
+        if self._index is None:
+            stats = []
+
+            try:
+                for shard in os.scandir(self.path):
+                    if not shard.is_dir():
+                        continue
+
+                    for entry in os.scandir(shard.path):
+                        if entry.is_file() and not entry.name.endswith('.tmp'):
+                            stat = entry.stat()
+                            stats.append((stat.st_mtime, entry.name, stat.st_size))
+            except OSError:
+                pass
+
+            self._index = OrderedDict((name, size) for _, name, size in sorted(stats))
+            self._total = sum(self._index.values())
+
+        return self._index
+
+    def _touch(self, name: str, size: int) -> None:
+        try:
+            # Порядок вытеснения после перезапуска восстанавливается по времени изменения файлов
+            os.utime(self._file(name))
+        except OSError:
+            pass
+
+        with self._lock:
+            index = self._scan()
+
+            if name in index:
+                index.move_to_end(name)
+            else:
+                index[name] = size
+                self._total += size
+
+    def load(self, key: str) -> Optional[bytes]:
+        """
+        Файл из кэша или None.
+        """
+        if self.path is None:
+            return None
+
+        name = self._name(key)
+
+        try:
+            with open(self._file(name), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        self._touch(name, len(data))
+
+        return data
+
+    def open(self, key: str) -> Optional[Union[mmap.mmap, bytes]]:
+        """
+        Файл из кэша, отображённый в память только для чтения (mmap.mmap поддерживает read/seek и срезы), или None.
+        Пустой файл отображать нельзя, для него возвращается b''.
+        """
+        if self.path is None:
+            return None
+
+        name = self._name(key)
+
+        try:
+            with open(self._file(name), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        except (OSError, ValueError):
+            return None
+
+        self._touch(name, size)
+
+        return data
+
+    def save(self, key: str, data: bytes) -> None:
+        """
+        Записывает файл атомарно и удаляет давно не читанные файлы сверх max_bytes.Ошибки записи игнорируются.
+        """
+        if self.path is None or len(data) > self.max_bytes:
+            return
+
+        name = self._name(key)
+        path = self._file(name)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+            return
+
+        with self._lock:
+            index = self._scan()
+            self._total += len(data) - index.pop(name, 0)
+            index[name] = len(data)
+
+            self._evict(index)
+
+    def _evict(self, index: 'OrderedDict[str, int]') -> None:
+        # Вызывается под self._lock
+        while self._total > self.max_bytes and index:
+            name, size = index.popitem(last=False)
+            self._total -= size
+
+            try:
+                os.remove(self._file(name))
+            except OSError:
+                # Например, файл отображён в память в Windows: он будет удалён при следующем вытеснении
+                pass
+
+    def fetch(self, key: str, download: Callable[[], bytes], mapped: bool=False) -> Union[bytes, mmap.mmap]:
+        """
+        Файл из кэша или результат `download()`.Одновременные вызовы с одним ключом из разных потоков ждут одно скачивание.
+
+        Args:
+            mapped (bool): Вернуть файл из кэша через mmap (см. open), если он сохранён на диске.
+        """
+        data = self.open(key) if mapped else self.load(key)
+
+        if data is not None:
+            self.hits += 1
+            return data
+
+        with self._lock:
+            future = self._futures.get(key, None)
+            owner = future is None
+
+            if owner:
+                future = self._futures[key] = Future()
+                self.misses += 1
+            else:
+                self.joined += 1
+
+        if not owner:
+            data = future.result()
+        else:
+            try:
+                data = download()
+                self.save(key, data)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(data)
+            finally:
+                with self._lock:
+                    self._futures.pop(key, None)
+
+        if mapped:
+            return self.open(key) or data
+
+        return data
+
+    async def afetch(self, key: str, download: Callable[[], Awaitable[bytes]], mapped: bool=False) -> Union[bytes, mmap.mmap]:
+        """
+        Асинхронная версия fetch: одновременные вызовы ждут одну задачу, отмена одного из ожидающих её не отменяет.
+        Чтение и запись на диск выполняются в пуле потоков цикла событий.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        data = None if self.path is None else await loop.run_in_executor(None, self.open if mapped else self.load, key)
+
+        if data is not None:
+            self.hits += 1
+            return data
+
+        task = self._tasks.get(key, None)
+
+        if task is None:
+            self.misses += 1
+            task = self._tasks[key] = asyncio.ensure_future(self._adownload(key, download))
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        else:
+            self.joined += 1
+
+        data = await asyncio.shield(task)
+
+        if mapped and self.path is not None:
+            return await loop.run_in_executor(None, self.open, key) or data
+
+        return data
+
+    async def _adownload(self, key: str, download: Callable[[], Awaitable[bytes]]) -> bytes:
+        import asyncio
+
+        try:
+            data = await download()
+
+            if self.path is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.save, key, data)
+
+            return data
+        finally:
+            self._tasks.pop(key, None)
@@ -0,0 +1,85 @@
+"""
+Информация о боте без ожидания getMe при запуске: id берётся из токена, ответ getMe кэшируется на диске.
+"""
+
+from typing import Optional, Tuple
+import json
+import time
+import os
+
+from .exception import Telegram
+
+__all__ = [
+    'parse_bot_id',
+    'MeCache'
+]
+
+def parse_bot_id(token: str) -> int:
+    """
+    Id бота из токена вида `123456:ABC-DEF...`, без запроса к Telegram.
+
+    Raises:
+        Telegram: Токен имеет неверный формат.
+    """
+    bot_id, sep, secret = str(token).partition(':')
+
+    if not sep or not secret or not bot_id.isdigit():
+        raise Telegram('The token is incorrectly set.')
+
+    return int(bot_id)
+
+class MeCache:
+    """
+    Кэш ответа getMe на диске: `<path>/me-<id бота>.json`.Токен в файл не пишется.
+
+    Несколько процессов (например, воркеры при автомасштабировании) могут использовать одну папку:
+    файл записывается атомарно, при старте бот берёт информацию о себе из файла и не ждёт getMe.
+
+    Args:
+        path (str): Папка кэша.
+        ttl (float): Через сколько секунд запись считается устаревшей: бот обновляет её в фоне, но пользуется ей до ответа getMe.
+    """
+    def __init__(self, path: str='.easygram', ttl: float=24 * 60 * 60):
+        self.path = path
+        self.ttl = ttl
+
+    def _file(self, bot_id: int) -> str:
+        return os.path.join(self.path, f'me-{bot_id}.json')
+
+    def load(self, bot_id: int) -> Tuple[Optional[dict], bool]:
+        """
+        Returns:
+            tuple: (ответ getMe или None, свежая ли запись).
+        """
+        try:
+            with open(self._file(bot_id), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None, False
+
+        user = entry.get('user', None)
+
+        if not isinstance(user, dict) or user.get('id', None) != bot_id:
+            return None, False
+
+        return user, time.time() - entry.get('time', 0) < self.ttl
+
+    def save(self, bot_id: int, user: dict) -> None:
+        """
+        Записывает ответ getMe.Ошибки записи (например, файловая система только для чтения) игнорируются.
+        """
+        path = self._file(bot_id)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+
+        try:
+            os.makedirs(self.path, exist_ok=True)
+
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'time': time.time(), 'user': user}, f, ensure_ascii=False)
+
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,1168 @@
+"""
+Эмулятор Bot API для локальных и нагрузочных тестов: сервер на aiohttp.web отвечает на запросы бота так же, как api.telegram.org,
+а сообщения пользователей добавляются программно (тысячи синтетических пользователей) или из браузера.
+
+Использование:
+    emulator = Emulator(token)
+    api_url = emulator.start_in_thread()
+
+    bot = SyncBot(token, api_url=api_url)  # или AsyncBot: обычный polling, но к эмулятору
+    threading.Thread(target=bot.polling, daemon=True).start()
+
+    stats = emulator.call(emulator.load(rate=2000, duration=10, users=5000))
+    print(stats)
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from collections import Counter, OrderedDict, deque
+from pathlib import Path
+import threading
+import itertools
+import asyncio
+import hashlib
+import random
+import json
+import time
+
+from aiohttp import web
+
+from ..identity import parse_bot_id
+
+__all__ = [
+    'Emulator',
+    'LoadStats'
+]
+
+_ROOT = Path(__file__).parent
+
+# Метод отправки -> поле сообщения с файлом
+_MEDIA_METHODS = {
+    'sendPhoto': 'photo',
+    'sendDocument': 'document',
+    'sendAudio': 'audio',
+    'sendVideo': 'video',
+    'sendAnimation': 'animation',
+    'sendVoice': 'voice',
+    'sendVideoNote': 'video_note'
+}
+
+_MISSING = object()
+
+class _ApiError(Exception):
+    def __init__(self, error_code: int, description: str):
+        super().__init__(description)
+        self.error_code = error_code
+        self.description = description
+
+class LoadStats:
+    """
+    Статистика эмулятора.
+
+    Attributes:
+        injected (int): Добавлено обновлений.
+        delivered (int): Обновлений, получение которых бот подтвердил (offset в getUpdates).
+        replies (int): Сообщений, отправленных ботом.
+        calls (Counter): Запросов к каждому методу Bot API.
+        latencies (List[float]): Время от добавления сообщения пользователя до ответа бота в этот чат, в секундах.
+    """
+    def __init__(self):
+        self.injected = 0
+        self.delivered = 0
+        self.replies = 0
+        self.calls: Counter = Counter()
+        self.latencies: List[float] = []
+        self.started = time.monotonic()
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Перцентиль задержки ответа (p от 0 до 100) в секундах или None, если ответов не было.
+        """
+        if not self.latencies:
+            return None
+
+        latencies = sorted(self.latencies)
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))]
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.started
+
+        return {
+            'elapsed': round(elapsed, 3),
+            'injected': self.injected,
+            'delivered': self.delivered,
+            'replies': self.replies,
+            'updates_per_second': round(self.delivered / elapsed, 1) if elapsed else None,
+            'latency_p50': self.percentile(50),
+            'latency_p95': self.percentile(95),
+            'latency_p99': self.percentile(99),
+            'calls': dict(self.calls)
+        }
+
+    def __repr__(self) -> str:
+        return f'LoadStats({self.summary()})'
+
+def _value(value: Any) -> Any:
+    """
+    Значение параметра из form-data или query: вложенные объекты приходят строкой JSON, числа - строкой.
+    """
+    if not isinstance(value, str):
+        return value
+
+    if value[:1] in ('{', '[') or value in ('true', 'false', 'null'):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    if value.lstrip('-').isdigit():
+        return int(value)
+
+    return value
+
+class Emulator:
+    """
+    Локальный сервер, совместимый с Bot API: бот подключается к нему через `api_url` и работает через свой обычный getUpdates.
+
+    Обновления получают возрастающие update_id, getUpdates поддерживает offset, limit и long polling (timeout).
+    Сообщения пользователей добавляются методами inject_message/inject_update из любого потока, а load
+    отправляет заданное число сообщений в секунду и считает задержку ответов бота (см. LoadStats).
+    Нажатия inline-кнопок (press, inject_callback_query), правки сообщений (inject_edited_message) и ответы на опросы
+    (inject_poll_answer) проходят весь путь: обновление -> обработчик бота -> answerCallbackQuery/editMessageText/....
+
+    Браузерный клиент (`http://host:port/`) переписывается с ботом от имени client_user, события бота приходят ему через SSE (`/events`).
+
+    Args:
+        token (str, optional): Токен бота.Запросы с другим токеном получают 401 Unauthorized, None - принимать любой токен.
+        host (str): Адрес сервера.
+        port (int): Порт, 0 - любой свободный.
+        first_name (str): Имя бота в getMe.
+        username (str): Username бота в getMe.
+        description (str): Описание бота (getMyDescription).
+        max_messages (int): Сколько последних сообщений хранить для правок и удаления.
+    """
+    def __init__(self, token: str=None, host: str='127.0.0.1', port: int=5000, first_name: str='ExampleBot', username: str='example_bot', description: str='Имитированный бот🤖', max_messages: int=100000):
+        self.token = token
+        self.host = host
+        self.port = port
+        self.description = description
+        self.max_messages = max_messages
+
+        bot_id = parse_bot_id(token) if token is not None else 1
+        self.bot_user = {'id': bot_id, 'is_bot': True, 'first_name': first_name, 'username': username}
+
+        self.stats = LoadStats()
+        self.commands: List[dict] = []
+
+        self._lock = threading.Lock()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._user_ids = itertools.count(10 ** 9)
+        self._file_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+
+        self._updates: deque = deque()
+        self._users: Dict[int, dict] = {}
+        self._messages: 'OrderedDict[Tuple[Any, int], dict]' = OrderedDict()
+        self._files: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self._waiting: Dict[Any, deque] = {}
+        self._callback_queries: 'OrderedDict[str, Any]' = OrderedDict()
+        # Как и в Telegram, allowed_updates из getUpdates действует, пока бот его не изменит
+        self.allowed_updates: Optional[set] = None
+        self._votes: Dict[str, Dict[int, List[int]]] = {}
+
+        # Ответы бота на нажатия кнопок: (callback_query_id, text, show_alert)
+        self.callback_answers: deque = deque(maxlen=1000)
+
+        self.client_user = self.user(first_name='User', last_name='Durov', username='oprosmenya')
+        self._client_updates: deque = deque(maxlen=1000)
+        self._subscribers: List[asyncio.Queue] = []
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._wakeup_scheduled = False
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._methods: Dict[str, Callable[[dict], Any]] = {
+            'getMe': lambda parameters: self.bot_user,
+            'logOut': lambda parameters: True,
+            'close': lambda parameters: True,
+            'deleteWebhook': lambda parameters: True,
+            'sendMessage': self._send_message,
+            'sendMediaGroup': self._send_media_group,
+            'sendPoll': self._send_poll,
+            'sendDice': self._send_dice,
+            'sendContact': self._send_contact,
+            'sendChatAction': lambda parameters: True,
+            'setMyCommands': self._set_my_commands,
+            'getMyCommands': lambda parameters: self.commands,
+            'getMyDescription': lambda parameters: {'description': self.description},
+            'getChat': lambda parameters: self._chat(self._required(parameters, 'chat_id')),
+            'getChatMember': self._get_chat_member,
+            'getFile': self._get_file,
+            'editMessageText': self._edit_message_text,
+            'editMessageReplyMarkup': self._edit_message_reply_markup,
+            'deleteMessage': self._delete_message,
+            'answerCallbackQuery': self._answer_callback_query,
+            'stopPoll': self._stop_poll
+        }
+
+        for method, field in _MEDIA_METHODS.items():
+            self._methods[method] = lambda parameters, field=field: self._send_media(parameters, field)
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def api_url(self) -> str:
+        """
+        Значение для параметра `api_url` у SyncBot/AsyncBot.
+        """
+        return self.url
+
+    # Пользователи и обновления
+
+    def user(self, user_id: int=None, first_name: str=None, last_name: str=None, username: str=None) -> dict:
+        """
+        Создаёт (или возвращает существующего) пользователя.Без user_id выдаётся новый синтетический id.
+        """
+        if user_id is None:
+            user_id = next(self._user_ids)
+        elif user_id in self._users:
+            return self._users[user_id]
+
+        user = {'id': user_id, 'is_bot': False, 'first_name': first_name or f'User {user_id}', 'language_code': 'ru'}
+
+        if last_name is not None:
+            user['last_name'] = last_name
+
+        user['username'] = username or f'user{user_id}'
+
+        self._users[user_id] = user
+
+        return user
+
+    def _chat(self, chat_id: Any) -> dict:
+        user = self._users.get(chat_id, None)
+
+        if user is not None:
+            return {'id': chat_id, 'first_name': user['first_name'], 'username': user['username'], 'type': 'private'}
+
+        if isinstance(chat_id, str):
+            return {'id': chat_id, 'title': chat_id, 'type': 'channel'}
+
+        return {'id': chat_id, 'title': f'Chat {chat_id}', 'type': 'group' if chat_id < 0 else 'private'}
+
+    def inject_update(self, update: dict, chat_id: Any=None) -> int:
+        """
+        Добавляет обновление (без update_id) в очередь getUpdates.Можно вызывать из любого потока.
+
+        Args:
+            update (dict): Обновление, например {'message': {...}}.
+            chat_id (Any, optional): Чат, ответ бота в который считается ответом на это обновление (для задержек в LoadStats).
+
+        Returns:
+            int: update_id или None, если бот не получает обновления этого типа (allowed_updates).
+        """
+        if self.allowed_updates is not None and not any(update_type in self.allowed_updates for update_type in update if update_type != 'update_id'):
+            return None
+
+        with self._lock:
+            update_id = update['update_id'] = next(self._update_ids)
+            self._updates.append(update)
+            self.stats.injected += 1
+
+            if chat_id is not None:
+                self._waiting.setdefault(chat_id, deque()).append(time.monotonic())
+
+        self._notify()
+
+        return update_id
+
+    def inject_message(self, text: str=None, user: Union[int, dict]=None, chat_id: Any=None, **fields: Any) -> dict:
+        """
+        Добавляет сообщение пользователя.
+
+        Args:
+            text (str, optional): Текст.
+            user (Union[int, dict], optional): Пользователь (id или результат user()), по умолчанию новый синтетический.
+            chat_id (Any, optional): Чат, по умолчанию личный чат пользователя.
+            **fields: Другие поля сообщения (photo, caption, reply_to_message, ...).
+
+        Returns:
+            dict: Сообщение.
+        """
+        if not isinstance(user, dict):
+            user = self.user(user)
+
+        chat_id = user['id'] if chat_id is None else chat_id
+
+        message = {'message_id': next(self._message_ids), 'from': user, 'chat': self._chat(chat_id), 'date': int(time.time())}
+
+        if text is not None:
+            message['text'] = text
+
+        message.update(fields)
+        self._remember(message)
+        self.inject_update({'message': message}, chat_id)
+
+        return message
+
+    def _message(self, chat_id: Any, message_id: Union[int, dict]) -> dict:
+        if isinstance(message_id, dict):
+            chat_id, message_id = message_id['chat']['id'], message_id['message_id']
+
+        message = self._messages.get((chat_id, message_id), None)
+
+        if message is None:
+            raise KeyError(f'Сообщение {message_id} в чате {chat_id} не найдено.')
+
+        return message
+
+    def inject_callback_query(self, message: dict, data: str, user: Union[int, dict]=None) -> dict:
+        """
+        Добавляет нажатие inline-кнопки с callback_data=data под сообщением бота.
+
+        Args:
+            message (dict): Сообщение бота (например, результат sendMessage).
+            data (str): callback_data.
+            user (Union[int, dict], optional): Кто нажал, по умолчанию собеседник чата.
+
+        Returns:
+            dict: callback_query.
+        """
+        chat_id = message['chat']['id']
+        user = user if isinstance(user, dict) else self.user(chat_id if user is None else user)
+
+        callback_query = {'id': str(next(self._callback_ids)), 'from': user, 'message': message, 'chat_instance': str(chat_id), 'data': data}
+
+        with self._lock:
+            self._callback_queries[callback_query['id']] = chat_id
+
+            while len(self._callback_queries) > 10000:
+                self._callback_queries.popitem(last=False)
+
+        self.inject_update({'callback_query': callback_query}, chat_id)
+
+        return callback_query
+
+    def press(self, chat_id: Any, message_id: Union[int, dict], text: str, user: Union[int, dict]=None) -> dict:
+        """
+        Нажимает inline-кнопку с текстом text под сообщением бота.
+
+        Raises:
+            KeyError: Нет такого сообщения или кнопки.
+        """
+        message = self._message(chat_id, message_id)
+
+        for row in self._inline(message.get('reply_markup', None)):
+            for button in row:
+                if button.get('text', None) == text and 'callback_data' in button:
+                    return self.inject_callback_query(message, button['callback_data'], user)
+
+        raise KeyError(f'Кнопка {text!r} не найдена.')
+
+    def inject_edited_message(self, chat_id: Any, message_id: Union[int, dict], text: str) -> dict:
+        """
+        Пользователь изменяет своё сообщение: обновление edited_message.
+        """
+        message = self._message(chat_id, message_id)
+        message['text'] = text
+        message['edit_date'] = int(time.time())
+
+        self.inject_update({'edited_message': dict(message)}, message['chat']['id'])
+
+        return message
+
+    def inject_poll_answer(self, chat_id: Any, message_id: Union[int, dict], option_ids: List[int], user: Union[int, dict]=None) -> dict:
+        """
+        Пользователь голосует в опросе бота (пустой option_ids - отменить голос).
+        Добавляются обновления poll_answer (для неанонимных опросов) и poll с новыми результатами.
+
+        Returns:
+            dict: Опрос.
+        """
+        message = self._message(chat_id, message_id)
+        poll = message.get('poll', None)
+
+        if poll is None:
+            raise KeyError('В сообщении нет опроса.')
+
+        if poll['is_closed']:
+            raise ValueError('Опрос закрыт.')
+
+        user = user if isinstance(user, dict) else self.user(message['chat']['id'] if user is None else user)
+        option_ids = list(option_ids)
+
+        if any(not 0 <= option_id < len(poll['options']) for option_id in option_ids) or (len(option_ids) > 1 and not poll['allows_multiple_answers']):
+            raise ValueError(f'Неверные варианты ответа: {option_ids}.')
+
+        with self._lock:
+            votes = self._votes.setdefault(poll['id'], {})
+
+            for option_id in votes.pop(user['id'], []):
+                poll['options'][option_id]['voter_count'] -= 1
+
+            if option_ids:
+                votes[user['id']] = option_ids
+
+                for option_id in option_ids:
+                    poll['options'][option_id]['voter_count'] += 1
+
+            poll['total_voter_count'] = len(votes)
+
+        if not poll['is_anonymous']:
+            self.inject_update({'poll_answer': {'poll_id': poll['id'], 'user': user, 'option_ids': option_ids}})
+
+        self.inject_update({'poll': dict(poll, options=[dict(option) for option in poll['options']])})
+        self._client_event(message['chat']['id'], {'poll_update': {'message_id': message['message_id'], 'options': poll['options'], 'total_voter_count': poll['total_voter_count']}})
+
+        return poll
+
+    def inject_messages(self, count: int, users: Union[int, List[dict]]=100, text: Union[str, Callable[[int], str]]='/start') -> None:
+        """
+        Добавляет count сообщений от users пользователей по кругу.
+
+        Args:
+            count (int): Количество сообщений.
+            users (Union[int, List[dict]]): Число новых синтетических пользователей или список пользователей.
+            text (Union[str, Callable[[int], str]]): Текст или функция номер сообщения -> текст.
+        """
+        users = [self.user() for _ in range(users)] if isinstance(users, int) else users
+
+        for indx in range(count):
+            self.inject_message(text(indx) if callable(text) else text, users[indx % len(users)])
+
+    async def load(self, rate: float, duration: float, users: Union[int, List[dict]]=1000, text: Union[str, Callable[[int], str]]='/start', drain_timeout: float=10.0) -> LoadStats:
+        """
+        Нагрузка: rate сообщений в секунду в течение duration секунд, затем ожидание, пока бот заберёт все обновления (не дольше drain_timeout).
+
+        Returns:
+            LoadStats: Статистика за время нагрузки.
+        """
+        users = [self.user() for _ in range(users)] if isinstance(users, int) else users
+
+        self.stats = LoadStats()
+        started = time.monotonic()
+        total = int(duration * rate)
+        sent = 0
+
+        while sent < total:
+            due = min(int((time.monotonic() - started) * rate) + 1, total)
+
+            for indx in range(sent, due):
+                self.inject_message(text(indx) if callable(text) else text, users[indx % len(users)])
+
+            sent = max(sent, due)
+
+            await asyncio.sleep(0.005)
+
+        await self.drain(drain_timeout)
+
+        return self.stats
+
+    async def drain(self, timeout: float=10.0) -> bool:
+        """
+        Ждёт, пока бот подтвердит получение всех обновлений и ответит во все чаты.
+
+        Returns:
+            bool: True, если дождались, False - если вышло время.
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                if not self._updates and not any(self._waiting.values()):
+                    return True
+
+            if time.monotonic() >= deadline:
+                return False
+
+            await asyncio.sleep(0.01)
+
+    def call(self, coro: Awaitable[Any], timeout: float=None) -> Any:
+        """
+        Выполняет корутину эмулятора (например, load) в его цикле событий из другого потока и возвращает результат.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _notify(self) -> None:
+        loop = self._loop
+
+        if loop is None:
+            return
+
+        if self._in_loop():
+            self._event.set()
+        elif not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            loop.call_soon_threadsafe(self._wakeup)
+
+    def _wakeup(self) -> None:
+        self._wakeup_scheduled = False
+        self._event.set()
+
+    def _remember(self, message: dict) -> None:
+        with self._lock:
+            self._messages[(message['chat']['id'], message['message_id'])] = message
+
+            while len(self._messages) > self.max_messages:
+                self._messages.popitem(last=False)
+
+    def _replied(self, chat_id: Any) -> None:
+        with self._lock:
+            self.stats.replies += 1
+            waiting = self._waiting.get(chat_id, None)
+
+            if waiting:
+                self.stats.latencies.append(time.monotonic() - waiting.popleft())
+
+                if not waiting:
+                    del self._waiting[chat_id]
+
+    def _client(self, chat_id: Any, event: dict) -> None:
+        if chat_id == self.client_user['id']:
+            self._client_event(chat_id, event)
+
+    def _client_event(self, chat_id: Any, event: dict) -> None:
+        """
+        Событие для браузера: сразу подписчикам SSE, а если их нет - в буфер до подключения.
+        """
+        if chat_id is not None and chat_id != self.client_user['id']:
+            return
+
+        if self._loop is not None and not self._in_loop():
+            self._loop.call_soon_threadsafe(self._client_event, chat_id, event)
+            return
+
+        if not self._subscribers:
+            self._client_updates.append(event)
+            return
+
+        for queue in self._subscribers:
+            if queue.full():
+                # Браузер не успевает читать: старые события отбрасываются
+                queue.get_nowait()
+
+            queue.put_nowait(event)
+
+    # Методы Bot API
+
+    @staticmethod
+    def _required(parameters: dict, name: str) -> Any:
+        value = parameters.get(name, None)
+
+        if value is None or value == '':
+            raise _ApiError(400, f'Bad Request: {name} is empty')
+
+        return value
+
+    def _find(self, parameters: dict) -> dict:
+        key = (self._required(parameters, 'chat_id'), self._required(parameters, 'message_id'))
+        message = self._messages.get(key, None)
+
+        if message is None:
+            raise _ApiError(400, 'Bad Request: message to edit not found')
+
+        return message
+
+    @staticmethod
+    def _inline(reply_markup: Any) -> List[list]:
+        if isinstance(reply_markup, dict):
+            return reply_markup.get('inline_keyboard', [])
+
+        return []
+
+    def _bot_message(self, parameters: dict, **fields: Any) -> dict:
+        chat_id = self._required(parameters, 'chat_id')
+
+        message = {'message_id': next(self._message_ids), 'from': self.bot_user, 'chat': self._chat(chat_id), 'date': int(time.time())}
+        message.update(fields)
+
+        reply_to = parameters.get('reply_to_message_id', None)
+
+        if reply_to is not None and (chat_id, reply_to) in self._messages:
+            message['reply_to_message'] = self._messages[(chat_id, reply_to)]
+
+        if self._inline(parameters.get('reply_markup', None)):
+            message['reply_markup'] = parameters['reply_markup']
+
+        self._remember(message)
+        self._replied(chat_id)
+
+        return message
+
+    def _send_message(self, parameters: dict) -> dict:
+        text = str(self._required(parameters, 'text'))
+        message = self._bot_message(parameters, text=text)
+
+        self._client(message['chat']['id'], {'message': {
+            'message_id': message['message_id'],
+            'text': text,
+            'parse_mode': parameters.get('parse_mode', None),
+            'reply_to_message_id': parameters.get('reply_to_message_id', None),
+            'inline': self._inline(parameters.get('reply_markup', None))
+        }})
+
+        return message
+
+    def _store_file(self, data: bytes, filename: str=None) -> dict:
+        file_unique_id = hashlib.sha1(data).hexdigest()[:16]
+        file_id = f'E{next(self._file_ids)}{file_unique_id}'
+
+        with self._lock:
+            self._files[file_id] = (file_unique_id, data)
+
+            while len(self._files) > 1000:
+                self._files.popitem(last=False)
+
+        result = {'file_id': file_id, 'file_unique_id': file_unique_id, 'file_size': len(data)}
+
+        if filename is not None:
+            result['file_name'] = filename
+
+        return result
+
+    def _send_media(self, parameters: dict, field: str) -> dict:
+        value = self._required(parameters, field)
+
+        if isinstance(value, web.FileField):
+            file = self._store_file(value.file.read(), value.filename)
+        elif value in self._files:
+            file_unique_id, data = self._files[value]
+            file = {'file_id': value, 'file_unique_id': file_unique_id, 'file_size': len(data)}
+        else:
+            # file_id или URL, которых эмулятор не знает
+            file = {'file_id': str(value), 'file_unique_id': hashlib.sha1(str(value).encode()).hexdigest()[:16]}
+
+        caption = parameters.get('caption', None)
+        fields = {field: [dict(file, width=0, height=0)] if field == 'photo' else file}
+
+        if caption is not None:
+            fields['caption'] = str(caption)
+
+        message = self._bot_message(parameters, **fields)
+
+        if field == 'photo' and file['file_id'] in self._files:
+            import base64
+
+            self._client(message['chat']['id'], {'photo': {
+                'message_id': message['message_id'],
+                'photo': base64.b64encode(self._files[file['file_id']][1]).decode('utf-8'),
+                'reply_to_message_id': parameters.get('reply_to_message_id', None),
+                'caption': caption,
+                'inline': self._inline(parameters.get('reply_markup', None))
+            }})
+        else:
+            self._client(message['chat']['id'], {'message': {
+                'message_id': message['message_id'],
+                'text': f'📎 {file.get("file_name", field)}' + (f'\n{caption}' if caption else ''),
+                'parse_mode': None,
+                'reply_to_message_id': parameters.get('reply_to_message_id', None),
+                'inline': self._inline(parameters.get('reply_markup', None))
+            }})
+
+        return message
+
+    def _send_media_group(self, parameters: dict) -> List[dict]:
+        media = self._required(parameters, 'media')
+
+        if isinstance(media, str):
+            media = json.loads(media)
+
+        if not isinstance(media, list) or not 2 <= len(media) <= 10:
+            raise _ApiError(400, 'Bad Request: media must include 2-10 items')
+
+        items = []
+
+        for item in media:
+            field = item.get('type', None) if isinstance(item, dict) else None
+
+            if field not in ('photo', 'video', 'document', 'audio'):
+                raise _ApiError(400, 'Bad Request: invalid media type')
+
+            value = item.get('media', None)
+
+            # Файлы альбома приходят частями multipart, а в media на них ссылаются как attach://<имя части>
+            if isinstance(value, str) and value.startswith('attach://'):
+                value = parameters.get(value[len('attach://'):], None)
+
+                if value is None:
+                    raise _ApiError(400, 'Bad Request: wrong file identifier/HTTP URL specified')
+
+            items.append((field, dict(chat_id=parameters.get('chat_id', None), reply_to_message_id=parameters.get('reply_to_message_id', None), caption=item.get('caption', None), **{field: value})))
+
+        messages = [self._send_media(item, field) for field, item in items]
+
+        for message in messages:
+            message['media_group_id'] = str(messages[0]['message_id'])
+
+        return messages
+
+    def _send_poll(self, parameters: dict) -> dict:
+        options = [{'text': option if isinstance(option, str) else option.get('text', ''), 'voter_count': 0} for option in self._required(parameters, 'options')]
+
+        if not 2 <= len(options) <= 10:
+            raise _ApiError(400, 'Bad Request: poll must have 2-10 options')
+
+        poll = {
+            'id': str(next(self._message_ids)),
+            'question': str(self._required(parameters, 'question')),
+            'options': options,
+            'total_voter_count': 0,
+            'is_closed': bool(parameters.get('is_closed', False)),
+            'is_anonymous': bool(parameters.get('is_anonymous', True)),
+            'type': parameters.get('type', 'regular'),
+            'allows_multiple_answers': bool(parameters.get('allows_multiple_answers', False))
+        }
+
+        if parameters.get('correct_option_id', None) is not None:
+            poll['correct_option_id'] = parameters['correct_option_id']
+
+        message = self._bot_message(parameters, poll=poll)
+
+        self._client(message['chat']['id'], {'poll': dict(
+            poll,
+            message_id=message['message_id'],
+            explanation=parameters.get('explanation', None),
+            open_period=parameters.get('open_period', None),
+            reply_to_message_id=parameters.get('reply_to_message_id', None),
+            inline=self._inline(parameters.get('reply_markup', None))
+        )})
+
+        return message
+
+    def _send_dice(self, parameters: dict) -> dict:
+        emoji = parameters.get('emoji', None) or '🎲'
+
+        return self._bot_message(parameters, dice={'emoji': emoji, 'value': random.randint(1, 64 if emoji == '🎰' else 6)})
+
+    def _send_contact(self, parameters: dict) -> dict:
+        contact = {'phone_number': str(self._required(parameters, 'phone_number')), 'first_name': str(self._required(parameters, 'first_name'))}
+
+        if parameters.get('last_name', None) is not None:
+            contact['last_name'] = parameters['last_name']
+
+        return self._bot_message(parameters, contact=contact)
+
+    def _set_my_commands(self, parameters: dict) -> bool:
+        self.commands = [{'command': command['command'], 'description': command['description']} for command in self._required(parameters, 'commands')]
+        self._client_event(None, {'set_commands': self.commands})
+
+        return True
+
+    def _get_chat_member(self, parameters: dict) -> dict:
+        user_id = self._required(parameters, 'user_id')
+        user = self.bot_user if user_id == self.bot_user['id'] else self._users.get(user_id, None)
+
+        if user is None:
+            raise _ApiError(400, 'Bad Request: user not found')
+
+        return {'user': user, 'status': 'administrator' if user is self.bot_user else 'member'}
+
+    def _get_file(self, parameters: dict) -> dict:
+        file_id = self._required(parameters, 'file_id')
+
+        if file_id not in self._files:
+            raise _ApiError(400, 'Bad Request: invalid file_id')
+
+        file_unique_id, data = self._files[file_id]
+
+        return {'file_id': file_id, 'file_unique_id': file_unique_id, 'file_size': len(data), 'file_path': f'files/{file_id}'}
+
+    def _edit_message_text(self, parameters: dict) -> Union[dict, bool]:
+        if parameters.get('inline_message_id', None) is not None:
+            return True
+
+        message = self._find(parameters)
+        text = str(self._required(parameters, 'text'))
+        field = 'caption' if 'caption' in message and 'text' not in message else 'text'
+        reply_markup = parameters.get('reply_markup', None)
+
+        if message.get(field, None) == text and self._inline(reply_markup) == self._inline(message.get('reply_markup', None)):
+            raise _ApiError(400, 'Bad Request: message is not modified: specified new message content and reply markup are exactly the same as a current content and reply markup of the message')
+
+        message[field] = text
+        message['edit_date'] = int(time.time())
+        self._set_markup(message, reply_markup)
+
+        self._client(message['chat']['id'], {'edit_message_text': {
+            'message_id': message['message_id'],
+            'text': text,
+            'parse_mode': parameters.get('parse_mode', None),
+            'inline': self._inline(message.get('reply_markup', None))
+        }})
+
+        return message
+
+    def _set_markup(self, message: dict, reply_markup: Any) -> None:
+        if self._inline(reply_markup):
+            message['reply_markup'] = reply_markup
+        else:
+            message.pop('reply_markup', None)
+
+    def _edit_message_reply_markup(self, parameters: dict) -> Union[dict, bool]:
+        if parameters.get('inline_message_id', None) is not None:
+            return True
+
+        message = self._find(parameters)
+        reply_markup = parameters.get('reply_markup', None)
+
+        if self._inline(reply_markup) == self._inline(message.get('reply_markup', None)):
+            raise _ApiError(400, 'Bad Request: message is not modified: specified new message content and reply markup are exactly the same as a current content and reply markup of the message')
+
+        self._set_markup(message, reply_markup)
+        message['edit_date'] = int(time.time())
+
+        self._client(message['chat']['id'], {'edit_reply_markup': {'message_id': message['message_id'], 'inline': self._inline(reply_markup)}})
+
+        return message
+
+    def _answer_callback_query(self, parameters: dict) -> bool:
+        callback_query_id = str(self._required(parameters, 'callback_query_id'))
+
+        with self._lock:
+            chat_id = self._callback_queries.pop(callback_query_id, _MISSING)
+
+        if chat_id is _MISSING:
+            raise _ApiError(400, 'Bad Request: query is too old and response timeout expired or query ID is invalid')
+
+        text = parameters.get('text', None)
+        show_alert = bool(parameters.get('show_alert', False))
+
+        self.callback_answers.append((callback_query_id, text, show_alert))
+        self._replied(chat_id)
+
+        if text:
+            self._client(chat_id, {'callback_answer': {'text': str(text), 'show_alert': show_alert}})
+
+        return True
+
+    def _stop_poll(self, parameters: dict) -> dict:
+        message = self._find(parameters)
+        poll = message.get('poll', None)
+
+        if poll is None:
+            raise _ApiError(400, 'Bad Request: message with poll to stop not found')
+
+        if poll['is_closed']:
+            raise _ApiError(400, 'Bad Request: poll has already been closed')
+
+        poll['is_closed'] = True
+        self._set_markup(message, parameters.get('reply_markup', None))
+        self._client(message['chat']['id'], {'poll_update': {'message_id': message['message_id'], 'options': poll['options'], 'total_voter_count': poll['total_voter_count'], 'is_closed': True}})
+
+        return poll
+
+    def _delete_message(self, parameters: dict) -> bool:
+        key = (self._required(parameters, 'chat_id'), self._required(parameters, 'message_id'))
+
+        with self._lock:
+            if self._messages.pop(key, None) is None:
+                raise _ApiError(400, 'Bad Request: message to delete not found')
+
+        self._client(key[0], {'delete_message': {'message_id': key[1]}})
+
+        return True
+
+    async def _get_updates(self, parameters: dict) -> List[dict]:
+        offset = int(parameters.get('offset', None) or 0)
+        limit = min(max(int(parameters.get('limit', None) or 100), 1), 100)
+        allowed_updates = parameters.get('allowed_updates', None)
+
+        if allowed_updates is not None:
+            self.allowed_updates = {allowed_updates} if isinstance(allowed_updates, str) else set(allowed_updates) or None
+
+        timeout = float(parameters.get('timeout', None) or 0)
+        updates = self._updates
+
+        with self._lock:
+            # Обновления с update_id меньше offset подтверждены ботом
+            while updates and updates[0]['update_id'] < offset:
+                updates.popleft()
+                self.stats.delivered += 1
+
+        if not updates and timeout > 0:
+            self._event.clear()
+
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        with self._lock:
+            return list(itertools.islice(updates, limit))
+
+    # HTTP
+
+    async def _parameters(self, request: web.Request) -> dict:
+        # Списки в query передаются повторением ключа: allowed_updates=message&allowed_updates=poll
+        parameters = {key: [_value(value) for value in request.query.getall(key)] if len(request.query.getall(key)) > 1 else _value(request.query[key]) for key in request.query}
+
+        if request.body_exists:
+            if request.content_type == 'application/json':
+                body = await request.json()
+                parameters.update({key: _value(value) if key.endswith('_id') else value for key, value in body.items()})
+            else:
+                for key, value in (await request.post()).items():
+                    parameters[key] = _value(value)
+
+        return parameters
+
+    @staticmethod
+    def _error(error_code: int, description: str) -> web.Response:
+        return web.json_response({'ok': False, 'error_code': error_code, 'description': description}, status=error_code)
+
+    async def _handle_api(self, request: web.Request) -> web.Response:
+        if self.token is not None and request.match_info['token'] != self.token:
+            return self._error(401, 'Unauthorized')
+
+        method = request.match_info['method']
+        self.stats.calls[method] += 1
+
+        try:
+            parameters = await self._parameters(request)
+
+            if method == 'getUpdates':
+                result = await self._get_updates(parameters)
+            elif method in self._methods:
+                result = self._methods[method](parameters)
+            else:
+                return self._error(404, 'Not Found: method not found')
+        except _ApiError as e:
+            return self._error(e.error_code, e.description)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            return self._error(400, f'Bad Request: {e.args[0] if e.args else e}')
+
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _handle_file(self, request: web.Request) -> web.Response:
+        if self.token is not None and request.match_info['token'] != self.token:
+            return self._error(401, 'Unauthorized')
+
+        file = self._files.get(request.match_info['file_id'], None)
+
+        if file is None:
+            return self._error(404, 'Not Found')
+
+        return web.Response(body=file[1], content_type='application/octet-stream')
+
+    # Браузерный клиент
+
+    async def _client_index(self, request: web.Request) -> web.FileResponse:
+        return web.FileResponse(_ROOT / 'templates' / 'index.html')
+
+    async def _client_get_updates(self, request: web.Request) -> web.Response:
+        if not self._client_updates:
+            return web.Response(status=204)
+
+        updates = list(self._client_updates)
+        self._client_updates.clear()
+
+        return web.json_response({'updates': updates})
+
+    async def _client_send_message(self, request: web.Request) -> web.Response:
+        import base64
+
+        data = await request.json()
+
+        if data.get('image', None):
+            file = self._store_file(base64.b64decode(data['image'].split(',', 1)[-1]))
+            message = self.inject_message(user=self.client_user, photo=[dict(file, width=0, height=0)], caption=data.get('caption', None))
+        else:
+            message = self.inject_message(str(data.get('text', '')), self.client_user)
+
+        return web.json_response({'ok': True, 'message_id': message['message_id']})
+
+    async def _client_events(self, request: web.Request) -> web.StreamResponse:
+        """
+        Server-Sent Events: события бота (сообщения, правки, ответы на кнопки) отправляются браузеру сразу, без опроса.
+        """
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+        for event in self._client_updates:
+            queue.put_nowait(event)
+
+        self._client_updates.clear()
+        self._subscribers.append(queue)
+
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    # Комментарий SSE, чтобы прокси и браузер не закрыли соединение
+                    await response.write(b': ping\n\n')
+                    continue
+
+                await response.write(f'data: {json.dumps(event, ensure_ascii=False)}\n\n'.encode('utf-8'))
+        except ConnectionResetError:
+            pass
+        finally:
+            self._subscribers.remove(queue)
+
+        return response
+
+    async def _client_callback_query(self, request: web.Request) -> web.Response:
+        data = await request.json()
+
+        try:
+            message = self._message(self.client_user['id'], int(data['message_id']))
+        except (KeyError, ValueError) as e:
+            return self._error(400, f'Bad Request: {e.args[0] if e.args else e}')
+
+        self.inject_callback_query(message, str(data.get('data', '')), self.client_user)
+
+        return web.json_response({'ok': True})
+
+    async def _client_poll_answer(self, request: web.Request) -> web.Response:
+        data = await request.json()
+
+        try:
+            poll = self.inject_poll_answer(self.client_user['id'], int(data['message_id']), [int(option_id) for option_id in data.get('option_ids', [])], self.client_user)
+        except (KeyError, ValueError) as e:
+            return self._error(400, f'Bad Request: {e.args[0] if e.args else e}')
+
+        return web.json_response({'ok': True, 'poll': poll})
+
+    async def _client_edit_message(self, request: web.Request) -> web.Response:
+        data = await request.json()
+
+        try:
+            self.inject_edited_message(self.client_user['id'], int(data['message_id']), str(data.get('text', '')))
+        except (KeyError, ValueError) as e:
+            return self._error(400, f'Bad Request: {e.args[0] if e.args else e}')
+
+        return web.json_response({'ok': True})
+
+    async def _client_get_commands(self, request: web.Request) -> web.Response:
+        if not self.commands:
+            return web.Response(status=204)
+
+        return web.json_response(self.commands)
+
+    async def _client_get_bot_data(self, request: web.Request) -> web.Response:
+        return web.json_response({'name': self.bot_user['first_name'], 'username': self.bot_user['username'], 'description': self.description, 'image': None})
+
+    # Запуск
+
+    def application(self) -> web.Application:
+        """
+        aiohttp-приложение эмулятора (например, для aiohttp.test_utils.TestServer).
+        """
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+
+        app.router.add_route('*', '/bot{token}/{method}', self._handle_api)
+        app.router.add_get('/file/bot{token}/files/{file_id}', self._handle_file)
+
+        app.router.add_get('/', self._client_index)
+        app.router.add_get('/getUpdates', self._client_get_updates)
+        app.router.add_post('/sendMessage', self._client_send_message)
+        app.router.add_get('/events', self._client_events)
+        app.router.add_post('/callbackQuery', self._client_callback_query)
+        app.router.add_post('/pollAnswer', self._client_poll_answer)
+        app.router.add_post('/editMessage', self._client_edit_message)
+        app.router.add_get('/getCommands', self._client_get_commands)
+        app.router.add_get('/getBotData', self._client_get_bot_data)
+        app.router.add_static('/static', _ROOT / 'static')
+
+        return app
+
+    async def start(self) -> str:
+        """
+        Запускает сервер в текущем цикле событий.
+
+        Returns:
+            str: api_url для бота.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        self.port = self._runner.addresses[0][1]
+
+        return self.api_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, timeout: float=10.0) -> str:
+        """
+        Запускает сервер в отдельном потоке со своим циклом событий (например, для SyncBot в том же процессе).
+
+        Returns:
+            str: api_url для бота.
+        """
+        started = threading.Event()
+        errors = []
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:
+                errors.append(e)
+                started.set()
+                return
+
+            started.set()
+
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self.stop())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name='EasyGram-emulator', daemon=True)
+        self._thread.start()
+
+        if not started.wait(timeout):
+            raise TimeoutError('Эмулятор не запустился.')
+
+        if errors:
+            raise errors[0]
+
+        return self.api_url
+
+    def stop_thread(self) -> None:
+        """
+        Останавливает сервер, запущенный start_in_thread.
+        """
+        if self._thread is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def serve_forever(self) -> None:
+        """
+        Запускает сервер и блокирует текущий поток.
+        """
+        async def serve() -> None:
+            await self.start()
+
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await self.stop()
+
+        asyncio.run(serve())
@@ -167,269 +167,306 @@ function sendMessage(message){
 		user.id = `${message_id}`
 	});
 
+	user.addEventListener('dblclick', function(){
+		let text = prompt('Изменить сообщение', user.innerText)
+
+		if(text === null || !user.id){
+			return
+		}
+
+		user.innerText = text
+
+		fetch('/editMessage', {
+			method: 'POST',
+			headers: {
+				'Content-Type': 'application/json',
+			},
+			body: JSON.stringify({'message_id': user.id, 'text': text})
+		}).catch(err => console.error('Ошибка при изменении сообщения:', err))
+	})
+
 	history.appendChild(user)
 	userInput.value = ''
 	history.scrollTop = history.scrollHeight
 }
 
-function get_response() {
+function handleUpdate(update) {
 	let history = document.querySelector('.history');
 
-	fetch('/getUpdates', {
-		method: 'GET',
-		headers: {
-			'Content-Type': 'application/json',
-		},
-	}).then(response => {
-		if (response.status === 204) return;
-		return response.json();
-	}).then(data => {
-		if (data && data.updates) {
-			data.updates.forEach(update => {
-				if('message' in update){
-					let bot = document.createElement('div');
-					bot.classList.add('bot');
-					bot.id = `${update.message.message_id}`
-
-					if(update.message.parse_mode == 'html'){
-						bot.textContent = update.message.text;
-					}else if(update.message.parse_mode == 'markdown'){
-						bot.textContent = update.message.text
-					}else{
-						bot.innerText = update.message.text
-					}
-
-                    if (update.message.inline.length !== 0) {
-                        for (let i = 0; i < update.message.inline.length; i++) {
-                            let row = document.createElement('div')
-                            row.style.display = 'flex'
-                            row.style.flexDirection = 'column'
-                            row.style.alignItems = 'center'
-
-                            for (let j = 0; j < update.message.inline[i].length; j++) {
-                                let btn = document.createElement('button')
-                                btn.innerText = update.message.inline[i][j].text
-                                row.appendChild(btn)
-                            }
-
-                            history.appendChild(row)
-                        }
-                    }
-
-					history.appendChild(bot)
-
-					history.scrollTop = history.scrollHeight
-				}else if('set_commands' in update){
-					commands.push(update.set_commands)
-
-					let listCommands = document.querySelector('.listCommands')
-					console.log(commands)
-
-					update.set_commands.forEach(command => {
-						let buttonCommand = document.createElement('button')
-						buttonCommand.onClick = `sendCommand(${command.command})`
-						buttonCommand.innerHTML = `<b>${command.command}</b> - ${command.description}`
-						buttonCommand.classList.add('command')
-						listCommands.appendChild(buttonCommand)
-					})
-				}else if('photo' in update){
-					let bot = document.createElement('div')
-					bot.classList.add('bot')
-					bot.id = `${update.photo.message_id}`
-
-					let img = document.createElement('img')
-					img.src = `data:image/jpeg;base64,${update.photo.photo}`
-					img.alt = 'Фото'
-					img.style.width = '95%'
-					img.style.height = 'auto'
-					img.style.borderRadius = '10px'
-					img.style.margin = '10px'
-					img.style.objectFit = 'cover'
-					img.style.objectPosition = 'center'
-					img.style.boxShadow = '0 0 10px rgba(0, 0, 0, 0.1)'
-					img.style.transition = 'transform 0.3s ease'
-					img.style.cursor = 'pointer'
-					bot.appendChild(img)
-
-					if(update.photo.caption){
-						let caption = document.createElement('div')
-						caption.id = 'caption'
-						caption.textContent = update.photo.caption
-						bot.appendChild(caption)
-					}
-
-                    if (update.message.inline.length !== 0) {
-                        for (let i = 0; i < update.message.inline.length; i++) {
-                            let row = document.createElement('div')
-                            row.style.display = 'flex'
-                            row.style.flexDirection = 'column'
-                            row.style.alignItems = 'center'
-
-                            for (let j = 0; j < update.message.inline[i].length; j++) {
-                                let btn = document.createElement('button')
-                                btn.innerText = update.message.inline[i][j].text
-                                row.appendChild(btn)
-                            }
-
-                            history.appendChild(row)
-                        }
-                    }
-
-					history.appendChild(bot)
-				}else if('delete_message' in update){
-					let message = document.getElementById(update.delete_message.message_id.toString())
-					if(message){
-						message.remove()
-					}
-				}else if('edit_message_text' in update){
-					let message = document.getElementById(update.edit_message_text.message_id.toString())
-					if(message){
-						let parent_msg = message.querySelector('#caption')
-
-						if(parent_msg){
-							parent_msg.textContent = update.edit_message_text.text
-						}else{
-							message.textContent = update.edit_message_text.text
-						}
-
-						let status = document.createElement('div')
-						status.textContent = 'изменено'
-						status.style.color = 'gray'
-						status.style.fontSize = '12px'
-						message.appendChild(status)
-					}
-				}else if('poll' in update){
-					let bot = document.createElement('div')
-					bot.classList.add('bot')
-					bot.id = `${update.poll.message_id}`
-					bot.innerHTML = `<h4>${update.poll.question}</h4>`
-
-					bot.innerHTML += `<br>`
-
-                    console.log(update.poll)
-					
-					if(!update.poll.allows_multiple_answers){
-						update.poll.options.forEach(option => {
-							let input = document.createElement('input')
-							input.innerText = option.text
-							input.type = 'radio'
-							input.name = `poll_${update.poll.message_id}`
-							input.value = option.text
-							input.id = `poll_${update.poll.message_id}_${option.text}`
-							
-							let label = document.createElement('label')
-							label.for = `poll_${update.poll.message_id}_${option.text}`
-							label.textContent = option.text
-							
-							bot.appendChild(input)
-							bot.appendChild(label)
-							bot.innerHTML += `<br>`
-						})
-					}else{
-						for(let i = 0; i < update.poll.options.length; i++){
-							let input = document.createElement('input')
-							input.innerText = update.poll.options[i].text
-							input.type = 'checkbox'
-							input.name = `poll_${update.poll.message_id}_${i}`
-							input.value = update.poll.options[i].text
-							input.id = `poll_${update.poll.message_id}_${i}`
-							
-							let label = document.createElement('label')
-							label.for = `poll_${update.poll.message_id}_${i}`
-							label.textContent = update.poll.options[i].text
-
-							bot.appendChild(input)
-							bot.appendChild(label)
-							bot.innerHTML += `<br>`
-						}
-					}
-
-                    let btns = document.createElement('div')
-                    btns.classList.add('buttons')
-
-                    if (update.poll.inline.length !== 0) {
-                        for (let i = 0; i < update.poll.inline.length; i++) {
-                            let row = document.createElement('div')
-                            row.style.display = 'flex'
-                            row.style.width = '50%'
-                            row.style.gap = '1px'
-                            row.style.marginLeft = '5px'
-
-                            for (let j = 0; j < update.poll.inline[i].length; j++) {
-                                let btn = document.createElement('button')
-                                btn.innerText = update.poll.inline[i][j].text
-                                btn.style.borderRadius = '0px'
-                                btn.style.position = 'relative'
-                                btn.style.flex = '1 1 0'
-                                btn.style.boxSizing = 'border-box'
-                                btn.style.minWidth = '0'
-                                btn.style.background = 'rgba(0, 0, 0, 0.5)'
-                                btn.style.color = 'white'
-                                btn.style.borderColor = 'rgba(255, 255, 255, 0)'
-                                btn.style.transition = 'background 0.2s, color 0.2s'
-
-                                btn.addEventListener('mouseenter', function() {
-                                    btn.style.background = 'rgba(42, 42, 42, 0.2)';
-                                    btn.style.color = 'black';
-                                })
-
-                                btn.addEventListener('mouseleave', function() {
-                                    btn.style.background = 'rgba(0,0,0,0.5)';
-                                    btn.style.color = 'white';
-                                })
-
-                                btn.addEventListener('mousedown', function() {
-                                    btn.style.background = 'rgba(255,255,255,0.3)';
-                                    btn.style.color = 'black';
-                                })
-
-                                btn.addEventListener('mouseup', function() {
-                                    // Можно вернуть к hover-стилю, если мышь всё ещё над кнопкой
-                                    btn.style.background = 'rgba(42, 42, 42, 0.2)';
-                                    btn.style.color = 'black';
-                                })
-
-                                if (update.poll.inline.length === 1 && update.poll.inline[i].length === 1) {
-                                    btn.style.borderTopLeftRadius = '10px'
-                                    btn.style.borderTopRightRadius = '10px'
-                                    console.log('work')
-                                } else if (update.poll.inline[i].length === 1 && i === 0) {
-                                    btn.style.borderTopLeftRadius = '10px'
-                                    btn.style.borderTopRightRadius = '10px'
-                                } else if (update.poll.inline[i].length === 1 && i === update.poll.inline.length - 1) {
-                                    btn.style.borderBottomLeftRadius = '10px'
-                                    btn.style.borderBottomRightRadius = '10px'
-                                } else if (i === 0 && j === 0) {
-                                    btn.style.borderTopLeftRadius = '10px'
-                                } else if (i === 0 && j === update.poll.inline[i].length - 1) {
-                                    btn.style.borderTopRightRadius = '10px'
-                                } else if (i === update.poll.inline.length - 1 && j === 0) {
-                                    btn.style.borderBottomLeftRadius = '10px'
-                                } else if (i === update.poll.inline.length - 1 && j === update.poll.inline[i].length - 1) {
-                                    btn.style.borderBottomRightRadius = '10px'
-                                }
-
-                                btn.style.height = '35px'
-                                btn.style.maxHeight = '35px'
-                                btn.style.overflow = 'hidden'
-                                btn.style.textOverflow = 'ellipsis'
-                                btn.style.fontSize = '16px'
-                                btn.style.fontFamily = 'bold'
-                                row.appendChild(btn)
-                            }
-
-                            btns.appendChild(row)
-                        }
-                    }
-
-					history.appendChild(bot)
-
-                    if (btns.hasChildNodes())
-                        history.appendChild(btns)
+	if('message' in update){
+		let bot = document.createElement('div');
+		bot.classList.add('bot');
+		bot.id = `${update.message.message_id}`
+
+		if(update.message.parse_mode == 'html'){
+			bot.textContent = update.message.text;
+		}else if(update.message.parse_mode == 'markdown'){
+			bot.textContent = update.message.text
+		}else{
+			bot.innerText = update.message.text
+		}
+
+		history.appendChild(bot)
+		renderInline(bot, update.message.message_id, update.message.inline)
+
+		history.scrollTop = history.scrollHeight
+	}else if('set_commands' in update){
+		commands.push(update.set_commands)
+
+		let listCommands = document.querySelector('.listCommands')
+		console.log(commands)
+
+		update.set_commands.forEach(command => {
+			let buttonCommand = document.createElement('button')
+			buttonCommand.onClick = `sendCommand(${command.command})`
+			buttonCommand.innerHTML = `<b>${command.command}</b> - ${command.description}`
+			buttonCommand.classList.add('command')
+			listCommands.appendChild(buttonCommand)
+		})
+	}else if('photo' in update){
+		let bot = document.createElement('div')
+		bot.classList.add('bot')
+		bot.id = `${update.photo.message_id}`
+
+		let img = document.createElement('img')
+		img.src = `data:image/jpeg;base64,${update.photo.photo}`
+		img.alt = 'Фото'
+		img.style.width = '95%'
+		img.style.height = 'auto'
+		img.style.borderRadius = '10px'
+		img.style.margin = '10px'
+		img.style.objectFit = 'cover'
+		img.style.objectPosition = 'center'
+		img.style.boxShadow = '0 0 10px rgba(0, 0, 0, 0.1)'
+		img.style.transition = 'transform 0.3s ease'
+		img.style.cursor = 'pointer'
+		bot.appendChild(img)
+
+		if(update.photo.caption){
+			let caption = document.createElement('div')
+			caption.id = 'caption'
+			caption.textContent = update.photo.caption
+			bot.appendChild(caption)
+		}
+
+		history.appendChild(bot)
+		renderInline(bot, update.photo.message_id, update.photo.inline)
+	}else if('delete_message' in update){
+		let message = document.getElementById(update.delete_message.message_id.toString())
+		if(message){
+			message.remove()
+		}
+
+		renderInline(null, update.delete_message.message_id, [])
+	}else if('edit_message_text' in update){
+		let message = document.getElementById(update.edit_message_text.message_id.toString())
+		if(message){
+			let parent_msg = message.querySelector('#caption')
+
+			if(parent_msg){
+				parent_msg.textContent = update.edit_message_text.text
+			}else{
+				message.textContent = update.edit_message_text.text
+			}
+
+			let status = document.createElement('div')
+			status.textContent = 'изменено'
+			status.style.color = 'gray'
+			status.style.fontSize = '12px'
+			message.appendChild(status)
+
+			if(update.edit_message_text.inline !== undefined){
+				renderInline(message, update.edit_message_text.message_id, update.edit_message_text.inline)
+			}
+		}
+	}else if('edit_reply_markup' in update){
+		let message = document.getElementById(update.edit_reply_markup.message_id.toString())
+		if(message){
+			renderInline(message, update.edit_reply_markup.message_id, update.edit_reply_markup.inline)
+		}
+	}else if('callback_answer' in update){
+		if(update.callback_answer.show_alert){
+			alert(update.callback_answer.text)
+		}else if(update.callback_answer.text){
+			showToast(update.callback_answer.text)
+		}
+	}else if('poll_update' in update){
+		let results = document.getElementById(`poll_results_${update.poll_update.message_id}`)
+		if(results){
+			results.textContent = update.poll_update.options.map(option => `${option.text}: ${option.voter_count}`).join(' · ')
+
+			if(update.poll_update.is_closed){
+				results.textContent += ' (опрос закрыт)'
+			}
+		}
+	}else if('poll' in update){
+		let bot = document.createElement('div')
+		bot.classList.add('bot')
+		bot.id = `${update.poll.message_id}`
+		bot.innerHTML = `<h4>${update.poll.question}</h4>`
+
+		bot.innerHTML += `<br>`
+
+        console.log(update.poll)
+		
+		if(!update.poll.allows_multiple_answers){
+			update.poll.options.forEach((option, index) => {
+				let input = document.createElement('input')
+				input.innerText = option.text
+				input.type = 'radio'
+				input.name = `poll_${update.poll.message_id}`
+				input.value = option.text
+			input.dataset.index = index
+				input.id = `poll_${update.poll.message_id}_${option.text}`
+				
+				let label = document.createElement('label')
+				label.for = `poll_${update.poll.message_id}_${option.text}`
+				label.textContent = option.text
+				
+				bot.appendChild(input)
+				bot.appendChild(label)
+				bot.innerHTML += `<br>`
+			})
+		}else{
+			for(let i = 0; i < update.poll.options.length; i++){
+				let input = document.createElement('input')
+				input.innerText = update.poll.options[i].text
+				input.type = 'checkbox'
+				input.name = `poll_${update.poll.message_id}_${i}`
+				input.value = update.poll.options[i].text
+			input.dataset.index = i
+				input.id = `poll_${update.poll.message_id}_${i}`
+				
+				let label = document.createElement('label')
+				label.for = `poll_${update.poll.message_id}_${i}`
+				label.textContent = update.poll.options[i].text
+
+				bot.appendChild(input)
+				bot.appendChild(label)
+				bot.innerHTML += `<br>`
+			}
+		}
+
+		let vote = document.createElement('button')
+		vote.innerText = 'Голосовать'
+		vote.addEventListener('click', function(){
+			let option_ids = Array.from(bot.querySelectorAll('input:checked')).map(input => Number(input.dataset.index))
+
+			fetch('/pollAnswer', {
+				method: 'POST',
+				headers: {
+					'Content-Type': 'application/json',
+				},
+				body: JSON.stringify({'message_id': update.poll.message_id, 'option_ids': option_ids})
+			}).catch(err => console.error('Ошибка при отправке голоса:', err))
+		})
+		bot.appendChild(vote)
+
+		let results = document.createElement('div')
+		results.id = `poll_results_${update.poll.message_id}`
+		results.style.color = 'gray'
+		results.style.fontSize = '12px'
+		bot.appendChild(results)
+
+		history.appendChild(bot)
+		renderInline(bot, update.poll.message_id, update.poll.inline)
+	}
+}
+
+function renderInline(after, messageId, rows){
+	let history = document.querySelector('.history')
+	let old = document.getElementById(`inline_${messageId}`)
+
+	if(old){
+		old.remove()
+	}
+
+	if(!after || !rows || rows.length === 0){
+		return
+	}
+
+	let btns = document.createElement('div')
+	btns.classList.add('buttons')
+	btns.id = `inline_${messageId}`
+
+	for(let i = 0; i < rows.length; i++){
+		let row = document.createElement('div')
+		row.style.display = 'flex'
+		row.style.width = '50%'
+		row.style.gap = '1px'
+		row.style.marginLeft = '5px'
+
+		for(let j = 0; j < rows[i].length; j++){
+			let button = rows[i][j]
+			let btn = document.createElement('button')
+			btn.innerText = button.text
+			btn.style.borderRadius = '0px'
+			btn.style.flex = '1 1 0'
+			btn.style.boxSizing = 'border-box'
+			btn.style.minWidth = '0'
+			btn.style.background = 'rgba(0, 0, 0, 0.5)'
+			btn.style.color = 'white'
+			btn.style.borderColor = 'rgba(255, 255, 255, 0)'
+			btn.style.height = '35px'
+			btn.style.overflow = 'hidden'
+			btn.style.textOverflow = 'ellipsis'
+			btn.style.fontSize = '16px'
+
+			if(i === 0 && j === 0){
+				btn.style.borderTopLeftRadius = '10px'
+			}
+			if(i === 0 && j === rows[i].length - 1){
+				btn.style.borderTopRightRadius = '10px'
+			}
+			if(i === rows.length - 1 && j === 0){
+				btn.style.borderBottomLeftRadius = '10px'
+			}
+			if(i === rows.length - 1 && j === rows[i].length - 1){
+				btn.style.borderBottomRightRadius = '10px'
+			}
+
+			btn.addEventListener('click', function(){
+				if(button.url){
+					window.open(button.url, '_blank')
+				}else if(button.callback_data !== undefined){
+					fetch('/callbackQuery', {
+						method: 'POST',
+						headers: {
+							'Content-Type': 'application/json',
+						},
+						body: JSON.stringify({'message_id': messageId, 'data': button.callback_data})
+					}).catch(err => console.error('Ошибка при нажатии кнопки:', err))
 				}
-			});
+			})
+
+			row.appendChild(btn)
 		}
-	}).catch(err => console.error('Ошибка при получении обновлений:', err));
+
+		btns.appendChild(row)
+	}
+
+	if(after.nextSibling){
+		history.insertBefore(btns, after.nextSibling)
+	}else{
+		history.appendChild(btns)
+	}
+}
+
+function showToast(text){
+	let toast = document.createElement('div')
+	toast.textContent = text
+	toast.style.position = 'fixed'
+	toast.style.left = '50%'
+	toast.style.top = '20px'
+	toast.style.transform = 'translateX(-50%)'
+	toast.style.padding = '8px 16px'
+	toast.style.borderRadius = '10px'
+	toast.style.background = 'rgba(0, 0, 0, 0.7)'
+	toast.style.color = 'white'
+	toast.style.zIndex = '1000'
+	document.body.appendChild(toast)
+
+	setTimeout(() => toast.remove(), 2000)
 }
 
 function showCommands(){
@@ -458,4 +495,7 @@ function sendCommand(command){
 	butt.innerText = '/ меню'
 }
 
-setInterval(get_response, 1000);
\ No newline at end of file
+// События бота приходят через Server-Sent Events, браузер переподключается сам
+new EventSource('/events').onmessage = function(event){
+	handleUpdate(JSON.parse(event.data))
+};
\ No newline at end of file
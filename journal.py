@@ -0,0 +1,267 @@
+"""
+Журнал полученных обновлений на диске: доставка "хотя бы один раз" и повторный прогон записанного трафика.
+"""
+
+from typing import Any, Iterator, List, Optional
+import threading
+import json
+import time
+import os
+
+from .middleware import BaseMiddleware
+
+__all__ = [
+    'UpdateJournal'
+]
+
+class UpdateJournal(BaseMiddleware):
+    """
+    Append-only журнал обновлений с контрольной точкой подтверждённого offset.
+
+    Бот записывает пачку обновлений в журнал до того, как сдвинуть offset в Telegram, а подтверждает обновление
+    только после завершения его обработчиков.После падения процесса неподтверждённые обновления обрабатываются повторно.
+
+    Использование: `bot.polling(journal=UpdateJournal('journal'))`.AsyncBot записывает пачки в пуле потоков, чтобы fsync не останавливал цикл событий.
+
+    Args:
+        path (str): Директория журнала.
+        fsync (bool): Сбрасывать ли каждую записанную пачку на диск через os.fsync.
+        checkpoint_interval (float): Как часто (в секундах) сохранять подтверждённый offset.
+        max_bytes (int, optional): При превышении размера журнала из него удаляются подтверждённые обновления.None - хранить всё (например, для повторного прогона).
+    """
+    def __init__(self, path: str='journal', fsync: bool=True, checkpoint_interval: float=1.0, max_bytes: Optional[int]=64 * 1024 * 1024):
+        super().__init__()
+
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.fsync = fsync
+        self.checkpoint_interval = checkpoint_interval
+        self.max_bytes = max_bytes
+
+        self._updates_path = os.path.join(path, 'updates.jsonl')
+        self._checkpoint_path = os.path.join(path, 'checkpoint.json')
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._last_checkpoint = time.monotonic()
+
+        self.committed: int = self._load_checkpoint()
+        self.last_update_id: int = self.committed
+
+        for entry in self.read():
+            self.last_update_id = max(self.last_update_id, entry['update']['update_id'])
+
+        self._file = open(self._updates_path, 'ab')
+
+    def _load_checkpoint(self) -> int:
+        try:
+            with open(self._checkpoint_path, 'r', encoding='utf-8') as f:
+                return int(json.load(f)['committed'])
+        except (FileNotFoundError, ValueError, KeyError):
+            return -1
+
+    def read(self, since: Optional[int]=None) -> Iterator[dict]:
+        """
+        Читает записи журнала `{"time": ..., "update": {...}}` по порядку.Оборванная при падении последняя строка пропускается.
+
+        Args:
+            since (int, optional): Вернуть только обновления с update_id больше этого значения.
+        """
+        try:
+            f = open(self._updates_path, 'rb')
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                if since is None or entry['update']['update_id'] > since:
+                    yield entry
+
+    def append(self, updates: List[dict]) -> None:
+        """
+        Записывает пачку обновлений в журнал.Вызывается до сдвига offset.
+        """
+        if not updates:
+            return
+
+        now = time.time()
+        data = b''.join(json.dumps({'time': now, 'update': update}, ensure_ascii=False).encode('utf-8') + b'\n' for update in updates)
+
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+            for update in updates:
+                self._in_flight.add(update['update_id'])
+                self.last_update_id = max(self.last_update_id, update['update_id'])
+
+    def recover(self) -> List[dict]:
+        """
+        Возвращает обновления, которые были записаны, но не подтверждены до остановки бота.
+        """
+        updates = [entry['update'] for entry in self.read(self.committed)]
+
+        with self._lock:
+            self._in_flight.update(update['update_id'] for update in updates)
+
+        return updates
+
+    def ack(self, update_id: int) -> None:
+        """
+        Подтверждает, что обновление обработано.Подтверждённый offset сдвигается только когда обработаны все предыдущие обновления.
+        """
+        with self._lock:
+            self._in_flight.discard(update_id)
+
+            committed = min(self._in_flight) - 1 if self._in_flight else self.last_update_id
+
+            if committed > self.committed:
+                self.committed = committed
+
+                if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+                    self._checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Сохраняет подтверждённый offset на диск.
+        """
+        with self._lock:
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        tmp_path = self._checkpoint_path + '.tmp'
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'committed': self.committed}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self._checkpoint_path)
+        self._last_checkpoint = time.monotonic()
+
+        if self.max_bytes is not None and not self._file.closed and self._file.tell() > self.max_bytes:
+            self._compact()
+
+    def compact(self) -> None:
+        """
+        Удаляет из журнала подтверждённые обновления.
+        """
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp_path = self._updates_path + '.tmp'
+
+        with open(tmp_path, 'wb') as f:
+            for entry in self.read(self.committed):
+                f.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._file.close()
+        os.replace(tmp_path, self._updates_path)
+        self._file = open(self._updates_path, 'ab')
+
+    def close(self) -> None:
+        """
+        Сохраняет offset и закрывает файл журнала.Повторный вызов ничего не делает, attach открывает файл снова.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+
+            self._checkpoint()
+            self._file.close()
+
+    def __enter__(self) -> 'UpdateJournal':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def attach(self, bot: Any) -> List[dict]:
+        """
+        Подключает журнал к боту первым middleware, сдвигает offset бота за последнее записанное обновление
+        и возвращает неподтверждённые обновления, которые нужно обработать повторно.
+        """
+        if self not in bot._middlewares:
+            bot._middlewares.insert(0, self)
+
+        with self._lock:
+            if self._file.closed:
+                self._file = open(self._updates_path, 'ab')
+
+        bot.offset = max(bot.offset, self.last_update_id + 1)
+
+        return self.recover()
+
+    def post_process(self, update: dict, data: dict, exception: Optional[BaseException]) -> None:
+        self.ack(update['update_id'])
+
+    def replay(self, bot: Any, since: Optional[int]=None, realtime: bool=False, speed: float=1.0) -> dict:
+        """
+        Прогоняет записанные обновления через SyncBot, например для нагрузочного теста.
+
+        Args:
+            bot (SyncBot): Бот, обработчики которого вызываются.
+            since (int, optional): Начать после этого update_id.
+            realtime (bool): Соблюдать интервалы между обновлениями, как при записи.Иначе - с максимальной скоростью.
+            speed (float): Ускорение при realtime=True.
+
+        Returns:
+            dict: Количество обновлений, время и скорость прогона.
+        """
+        started = time.monotonic()
+        count = 0
+        first = None
+
+        for entry in self.read(since):
+            if realtime:
+                first = entry['time'] if first is None else first
+                delay = (entry['time'] - first) / speed - (time.monotonic() - started)
+
+                if delay > 0:
+                    time.sleep(delay)
+
+            bot._process_update(entry['update'])
+            count += 1
+
+        return self._replay_stats(count, started)
+
+    async def areplay(self, bot: Any, since: Optional[int]=None, realtime: bool=False, speed: float=1.0) -> dict:
+        """
+        То же, что replay, но для AsyncBot.
+        """
+        started = time.monotonic()
+        count = 0
+        first = None
+
+        for entry in self.read(since):
+            if realtime:
+                first = entry['time'] if first is None else first
+                delay = (entry['time'] - first) / speed - (time.monotonic() - started)
+
+                if delay > 0:
+                    import asyncio
+
+                    await asyncio.sleep(delay)
+
+            await bot._process_update(entry['update'])
+            count += 1
+
+        return self._replay_stats(count, started)
+
+    @staticmethod
+    def _replay_stats(count: int, started: float) -> dict:
+        seconds = time.monotonic() - started
+
+        return {'updates': count, 'seconds': seconds, 'rate': count / seconds if seconds else 0.0}
@@ -0,0 +1,93 @@
+"""
+Ленивое логирование запросов к API Telegram.
+"""
+
+from typing import Any, Optional
+from io import IOBase
+import logging
+import random
+import re
+
+__all__ = [
+    'LazyURL',
+    'LazyPayload',
+    'RequestLogger'
+]
+
+_TOKEN_RE = re.compile(r'/bot(\d+):[\w-]+')
+
+class LazyURL:
+    """
+    Ссылка на метод API, в которой токен бота скрывается только при форматировании записи лога.
+    """
+    __slots__ = ('url',)
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def __str__(self) -> str:
+        return _TOKEN_RE.sub(r'/bot\1:***', self.url)
+
+class LazyPayload:
+    """
+    Параметры запроса, которые превращаются в строку только если запись лога действительно будет выведена.
+    Файлы и байты заменяются кратким описанием, длинные строки и весь результат обрезаются до `max_length`.
+    """
+    __slots__ = ('payload', 'max_length')
+
+    def __init__(self, payload: Any, max_length: int=512):
+        self.payload = payload
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        text = repr(self._redact(self.payload))
+
+        if len(text) > self.max_length:
+            return text[:self.max_length] + f'... (+{len(text) - self.max_length})'
+
+        return text
+
+    def _redact(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: self._redact(_value) for key, _value in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return type(value)(self._redact(_value) for _value in value)
+        elif isinstance(value, IOBase) or hasattr(value, 'read'):
+            return f'<file {getattr(value, "name", type(value).__name__)}>'
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            return f'<bytes {len(value)}>'
+        elif isinstance(value, str) and len(value) > self.max_length:
+            return value[:self.max_length] + f'... (+{len(value) - self.max_length})'
+        elif value is None or isinstance(value, (int, float, bool, str)):
+            return value
+
+        return f'<{type(value).__name__}>'
+
+class RequestLogger:
+    """
+    Логирует запросы к API.
+
+    Args:
+        logger (logging.Logger): Логгер, в который пишутся записи.
+        sample_rate (float): Доля запросов, попадающих в лог (1.0 - все, 0.01 - каждый сотый в среднем).
+        max_length (int): Максимальная длина описания параметров запроса.
+    """
+    def __init__(self, logger: logging.Logger, sample_rate: float=1.0, max_length: int=512):
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.max_length = max_length
+
+    def request(self, method: str, url: str, kwargs: dict, status: Optional[int]=None) -> None:
+        """
+        Записывает запрос на уровне DEBUG.Ничего не форматирует, если DEBUG выключен или запрос не попал в выборку.
+        Ответы с HTTP-статусом 400 и выше (Bot API отвечает так на ok: false) записываются как Error, остальные - как Successfully.
+        """
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        outcome = 'Error' if status is not None and status >= 400 else 'Successfully'
+
+        self.logger.debug('Request (%s) to %s with parameters %s: %s (%s)', method, LazyURL(url), LazyPayload(kwargs, self.max_length), outcome, status)
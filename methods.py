@@ -0,0 +1,276 @@
+"""
+Описания методов Bot API: из аргументов метода бота по заранее составленному плану полей собирается запрос.
+Один и тот же план используется SyncBot и AsyncBot.
+"""
+
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+from contextlib import ExitStack
+from pathlib import Path
+import mimetypes
+import json
+
+from .types import InputFile
+from .utils import handle_reply_markup
+
+__all__ = [
+    'API_URL',
+    'method_url',
+    'file_url',
+    'Field',
+    'MethodSpec',
+    'Payload',
+    'VALUE',
+    'MARKUP',
+    'FILE'
+]
+
+API_URL = 'https://api.telegram.org'
+
+VALUE = 'value'
+MARKUP = 'markup'
+FILE = 'file'
+
+def method_url(api_url: str, token: str, method: str) -> str:
+    """
+    Адрес метода Bot API: `https://api.telegram.org/bot<token>/<method>`.
+    """
+    return f'{api_url}/bot{token}/{method}'
+
+def file_url(api_url: str, token: str, file_path: str) -> str:
+    """
+    Адрес для скачивания файла по `file_path` из getFile.
+    """
+    return f'{api_url}/file/bot{token}/{file_path}'
+
+class Field:
+    """
+    Поле метода.
+
+    Args:
+        name (str): Имя аргумента метода бота.
+        wire (str, optional): Имя параметра в Bot API, по умолчанию совпадает с name.
+        kind (str): VALUE - значение как есть, MARKUP - reply_markup (через handle_reply_markup), FILE - файл (InputFile, файл или file_id/URL).
+        convert (Callable, optional): Преобразование значения перед отправкой.
+        keep_empty (bool): Для MARKUP - отправлять и пустую клавиатуру (чтобы убрать кнопки).
+    """
+    __slots__ = ('name', 'wire', 'kind', 'convert', 'keep_empty')
+
+    def __init__(self, name: str, wire: str=None, kind: str=VALUE, convert: Callable[[Any], Any]=None, keep_empty: bool=False):
+        if kind not in (VALUE, MARKUP, FILE):
+            raise ValueError(f'Неизвестный тип поля: {kind!r}.')
+
+        self.name = name
+        self.wire = name if wire is None else wire
+        self.kind = kind
+        self.convert = convert
+        self.keep_empty = keep_empty
+
+    def __repr__(self) -> str:
+        return f'Field({self.name!r}, {self.wire!r}, {self.kind!r})'
+
+class Payload:
+    """
+    Собранный запрос: метод, параметры и файлы.Не привязан к боту, поэтому его можно отложить или отправить вместе с другими.
+    """
+    __slots__ = ('method', 'parameters', 'files')
+
+    def __init__(self, method: str, parameters: Dict[str, Any], files: Optional[Dict[str, Tuple[str, Any, Optional[str]]]]=None):
+        self.method = method
+        self.parameters = parameters
+        self.files = files
+
+    def __repr__(self) -> str:
+        return f'Payload({self.method!r}, {self.parameters!r}, files={list(self.files or ())})'
+
+    def form_fields(self) -> Dict[str, str]:
+        """
+        Параметры для multipart/form-data: вложенные объекты сериализуются в JSON, bool - в true/false.
+        """
+        fields = {}
+
+        for key, value in self.parameters.items():
+            if isinstance(value, str):
+                fields[key] = value
+            elif isinstance(value, bool):
+                fields[key] = 'true' if value else 'false'
+            elif isinstance(value, (dict, list, tuple)):
+                fields[key] = json.dumps(value, ensure_ascii=False)
+            else:
+                fields[key] = str(value)
+
+        return fields
+
+    def open_files(self, stack: ExitStack) -> Dict[str, Tuple[str, Any, Optional[str]]]:
+        """
+        Открывает файлы запроса в `stack`: файлы с диска передаются потоком и закрываются при выходе из `stack`.
+
+        Returns:
+            dict: `{параметр: (имя файла, файл, content_type)}` - формат `files=` библиотеки requests.
+        """
+        opened = {}
+
+        for wire, (filename, file, content_type) in self.files.items():
+            if isinstance(file, InputFile):
+                file = stack.enter_context(file.stream())
+
+            opened[wire] = (filename, file, content_type)
+
+        return opened
+
+    def form_data(self, stack: ExitStack) -> Any:
+        """
+        Тело запроса для aiohttp (aiohttp.FormData), файлы открываются в `stack`.
+        """
+        import aiohttp
+
+        data = aiohttp.FormData()
+
+        for key, value in self.form_fields().items():
+            data.add_field(key, value)
+
+        for wire, (filename, file, content_type) in self.open_files(stack).items():
+            data.add_field(wire, file, filename=filename, content_type=content_type)
+
+        return data
+
+def _file_part(name: str, wire: str, value: Any, values: Mapping[str, Any]) -> Tuple[str, Any, Optional[str]]:
+    """
+    Часть multipart для файла.Имя файла берётся из аргумента `<name>_name` (например photo_name), из самого файла или имени параметра.
+    """
+    filename = values.get(f'{name}_name', None)
+
+    if filename is None:
+        if isinstance(value, InputFile):
+            filename = value.name
+        else:
+            file_name = getattr(value, 'name', None)
+            filename = Path(file_name).name if isinstance(file_name, str) else None
+
+    if filename is None:
+        filename = wire
+
+    return (filename, value, mimetypes.guess_type(filename)[0])
+
+class MethodSpec:
+    """
+    Описание метода Bot API.План полей составляется один раз, а build только проходит по нему.
+
+    Использование:
+        SEND_DICE = MethodSpec('sendDice', 'chat_id', 'emoji', 'reply_to_message_id', Field('reply_markup', kind=MARKUP))
+
+        payload = SEND_DICE.build(locals())
+
+    Args:
+        method (str): Имя метода Bot API.
+        *fields (Union[str, Field]): Поля метода, строка - поле VALUE с тем же именем.
+    """
+    __slots__ = ('method', 'fields', 'plan')
+
+    def __init__(self, method: str, *fields: Union[str, Field]):
+        self.method = method
+        self.fields: Tuple[Field, ...] = tuple(Field(field) if isinstance(field, str) else field for field in fields)
+        self.plan: Tuple[Tuple[str, str, str, Optional[Callable[[Any], Any]], bool], ...] = tuple(
+            (field.name, field.wire, field.kind, field.convert, field.keep_empty) for field in self.fields
+        )
+
+    def __repr__(self) -> str:
+        return f'MethodSpec({self.method!r}, {", ".join(field.name for field in self.fields)})'
+
+    def build(self, values: Mapping[str, Any]) -> Payload:
+        """
+        Собирает запрос из значений аргументов (обычно `locals()` метода бота).Аргументы со значением None не отправляются.
+        """
+        parameters = {}
+        files = None
+        get = values.get
+
+        for name, wire, kind, convert, keep_empty in self.plan:
+            value = get(name, None)
+
+            if value is None:
+                continue
+
+            if kind == MARKUP:
+                value = handle_reply_markup(value)
+
+                if value is None or not (value.rows or keep_empty):
+                    continue
+
+                value = value.to_json()
+            elif kind == FILE and not isinstance(value, str):
+                if files is None:
+                    files = {}
+
+                files[wire] = _file_part(name, wire, value, values)
+                continue
+
+            parameters[wire] = value if convert is None else convert(value)
+
+        return Payload(self.method, parameters, files)
+
+
+def _link_preview(disable_web_page_preview: bool) -> dict:
+    return {'is_disabled': disable_web_page_preview}
+
+def _poll_options(options: list) -> list:
+    result = []
+
+    for option in options:
+        if isinstance(option, str):
+            result.append({'text': option})
+            continue
+
+        _opt = {'text': option.text}
+
+        if option.text_parse_mode is not None:
+            _opt['text_parse_mode'] = option.text_parse_mode
+
+        result.append(_opt)
+
+    return result
+
+def _bot_commands(commands: list) -> list:
+    return [{'command': cmd.command, 'description': cmd.description} for cmd in commands]
+
+def _command_scope(scope: Any) -> dict:
+    result = {'type': scope.type}
+
+    if hasattr(scope, 'chat_id'):
+        result['chat_id'] = scope.chat_id
+    if hasattr(scope, 'user_id'):
+        result['user_id'] = scope.user_id
+
+    return result
+
+_REPLY = (Field('reply_to_message_id'), Field('reply_markup', kind=MARKUP))
+_CAPTION = (Field('caption'), Field('parse_mode'))
+
+GET_ME = MethodSpec('getMe')
+SET_MY_COMMANDS = MethodSpec('setMyCommands', Field('commands', convert=_bot_commands), Field('scope', convert=_command_scope), 'language_code')
+GET_FILE = MethodSpec('getFile', 'file_id')
+GET_CHAT = MethodSpec('getChat', 'chat_id')
+GET_CHAT_MEMBER = MethodSpec('getChatMember', 'chat_id', 'user_id')
+
+SEND_MESSAGE = MethodSpec('sendMessage', 'chat_id', Field('text', convert=str), 'parse_mode', Field('disable_web_page_preview', 'link_preview_options', convert=_link_preview), *_REPLY)
+SEND_PHOTO = MethodSpec('sendPhoto', 'chat_id', Field('photo', kind=FILE), *_CAPTION, *_REPLY)
+SEND_AUDIO = MethodSpec('sendAudio', 'chat_id', Field('audio', kind=FILE), 'title', *_CAPTION, *_REPLY)
+SEND_DOCUMENT = MethodSpec('sendDocument', 'chat_id', Field('document', kind=FILE), *_CAPTION, *_REPLY)
+SEND_ANIMATION = MethodSpec('sendAnimation', 'chat_id', Field('animation', kind=FILE), *_CAPTION, *_REPLY)
+SEND_VOICE = MethodSpec('sendVoice', 'chat_id', Field('voice', kind=FILE), *_CAPTION, *_REPLY)
+SEND_VIDEO = MethodSpec('sendVideo', 'chat_id', Field('video', kind=FILE), *_CAPTION, *_REPLY)
+SEND_VIDEO_NOTE = MethodSpec('sendVideoNote', 'chat_id', Field('video_note', kind=FILE), *_REPLY)
+SEND_POLL = MethodSpec(
+    'sendPoll', 'chat_id', Field('question', convert=str), Field('options', convert=_poll_options), 'question_parse_mode', 'is_anonymous', 'type',
+    'allows_multiple_answers', 'correct_option_id', 'explanation', 'explanation_parse_mode', 'open_period', 'is_closed', *_REPLY
+)
+SEND_CONTACT = MethodSpec('sendContact', 'chat_id', Field('number', 'phone_number'), 'first_name', 'last_name', *_REPLY)
+SEND_DICE = MethodSpec('sendDice', 'chat_id', 'emoji', *_REPLY)
+SEND_CHAT_ACTION = MethodSpec('sendChatAction', 'chat_id', 'action')
+
+ANSWER_CALLBACK_QUERY = MethodSpec('answerCallbackQuery', Field('query_id', 'callback_query_id'), Field('text', convert=str), 'show_alert')
+DELETE_MESSAGE = MethodSpec('deleteMessage', 'chat_id', 'message_id')
+EDIT_MESSAGE_TEXT = MethodSpec(
+    'editMessageText', 'chat_id', 'message_id', Field('text', convert=str), 'parse_mode',
+    Field('disable_web_page_preview', 'link_preview_options', convert=_link_preview), Field('reply_markup', kind=MARKUP)
+)
+EDIT_MESSAGE_REPLY_MARKUP = MethodSpec('editMessageReplyMarkup', 'chat_id', 'message_id', 'inline_message_id', Field('reply_markup', kind=MARKUP, keep_empty=True))
\ No newline at end of file
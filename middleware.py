@@ -0,0 +1,72 @@
+"""
+Middleware - общая логика (авторизация, ограничения, локализация, метрики), которая выполняется один раз на обновление.
+"""
+
+from typing import Any, Callable, List, Optional, Union
+
+from .dispatcher import get_update_type
+
+__all__ = [
+    'BaseMiddleware',
+    'FunctionMiddleware'
+]
+
+class BaseMiddleware:
+    """
+    Базовый класс middleware.
+
+    `pre_process` вызывается до поиска обработчика, `post_process` - после его завершения.
+    В SyncBot методы обычные, в AsyncBot они могут быть `async def`.
+
+    Args:
+        update_types (Union[str, List[str]], optional): Типы обновлений ('message', 'callback_query', 'poll', 'poll_answer'),
+            для которых вызывается middleware.None - для всех.
+    """
+    update_types: Optional[List[str]] = None
+
+    def __init__(self, update_types: Union[str, List[str], None]=None):
+        if isinstance(update_types, str):
+            update_types = [update_types]
+
+        self.update_types = update_types
+
+    def check(self, update: dict) -> bool:
+        """
+        Нужно ли вызывать middleware для этого обновления.
+        """
+        return self.update_types is None or get_update_type(update) in self.update_types
+
+    def pre_process(self, update: dict, data: dict) -> Any:
+        """
+        Вызывается один раз на обновление до поиска обработчика.
+
+        Args:
+            update (dict): Необработанное обновление.
+            data (dict): Общие данные обновления.Значения передаются в обработчик, если у него есть параметр с таким же именем.
+
+        Returns:
+            False - обновление пропускается и обработчики не вызываются.
+        """
+        return None
+
+    def post_process(self, update: dict, data: dict, exception: Optional[BaseException]) -> Any:
+        """
+        Вызывается после завершения обработчиков, либо сразу, если обработчик не найден или обновление пропущено.
+
+        Args:
+            update (dict): Необработанное обновление.
+            data (dict): Общие данные обновления.
+            exception (BaseException, optional): Исключение из обработчика, если оно было.
+        """
+        return None
+
+class FunctionMiddleware(BaseMiddleware):
+    """
+    Middleware из обычной функции `func(update, data)`, которая вызывается до поиска обработчика.
+    """
+    def __init__(self, func: Callable[[dict, dict], Any], update_types: Union[str, List[str], None]=None):
+        super().__init__(update_types)
+        self.func = func
+
+    def pre_process(self, update: dict, data: dict) -> Any:
+        return self.func(update, data)
@@ -0,0 +1,173 @@
+"""
+Роутеры - наборы обработчиков, которые можно подключать к ботам и другим роутерам.
+"""
+
+from typing import Any, Callable, List, Pattern, Tuple, Union
+
+from .state import State
+from .dispatcher import compile_pattern
+from .callback_data import CallbackData, CallbackDataFilter, as_filter
+
+__all__ = [
+    'Router',
+    'include_router'
+]
+
+HANDLER_KINDS = ('message', 'callback_query', 'poll', 'poll_answer')
+
+def _add_handler(target: Any, kind: str, handler: dict) -> None:
+    getattr(target, f'_{kind}_handlers').append(handler)
+
+    for parent in getattr(target, '_parents', ()):
+        _add_handler(parent, kind, handler)
+
+def _includes(router: 'Router', target: Any) -> bool:
+    if router is target:
+        return True
+
+    return any(_includes(child, target) for child in router._routers)
+
+def include_router(target: Any, router: 'Router') -> None:
+    """
+    Подключает роутер к боту (SyncBot/AsyncBot) или другому роутеру.
+
+    Обработчики роутера добавляются в конец списков `target` в порядке регистрации.Обработчики,
+    зарегистрированные в роутере позже, тоже попадают в `target` и во всех, к кому `target` подключён.
+    """
+    if router in getattr(target, '_routers', ()):
+        return
+
+    if isinstance(target, Router) and _includes(router, target):
+        raise ValueError('Роутер не может быть подключён сам к себе.')
+
+    for kind in HANDLER_KINDS:
+        for handler in getattr(router, f'_{kind}_handlers'):
+            _add_handler(target, kind, handler)
+
+    router._parents.append(target)
+    target._routers.append(router)
+
+class Router:
+    """
+    Набор обработчиков, не привязанный к боту.Декораторы те же, что у SyncBot/AsyncBot.
+
+    Использование:
+        router = Router('admin')
+
+        @router.message(commands='ban')
+        def ban(message): ...
+
+        bot.include_router(router)
+
+    Роутер можно подключить к нескольким ботам (например, к ботам разных клиентов в MultiBotRunner),
+    обработчики при этом не копируются, а у каждого бота остаются свои списки.
+
+    Args:
+        name (str, optional): Имя роутера для логов и отладки.
+    """
+    def __init__(self, name: str=None):
+        self.name = name
+
+        self._message_handlers: List[dict] = []
+        self._callback_query_handlers: List[dict] = []
+        self._poll_handlers: List[dict] = []
+        self._poll_answer_handlers: List[dict] = []
+
+        self._parents: List[Any] = []
+        self._routers: List['Router'] = []
+
+    def __repr__(self) -> str:
+        return f'Router({self.name!r})'
+
+    def include_router(self, router: 'Router') -> None:
+        """
+        Подключает вложенный роутер.
+        """
+        include_router(self, router)
+
+    def _register(self, kind: str, handler: dict) -> Callable:
+        def wrapper(func):
+            _add_handler(self, kind, dict(handler, func=func))
+
+            return func
+        return wrapper
+
+    def message(self, _filters: Callable[[Any], Any]=None, content_types: Union[str, List[str]]=None, commands: Union[str, List[str]]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, regexp: Union[str, Pattern]=None, text_pattern: str=None) -> Callable:
+        """
+        Декоратор для обработки входящих сообщений.
+
+        Args:
+            _filters (Callable[[Message], any], optional): Функция фильтрации сообщений.
+            content_types (Union[str, List[str]], optional): Типы контента, которые должен обрабатывать обработчик.
+            commands (Union[str, List[str]], optional): Команды, на которые должен реагировать обработчик.
+            allowed_chat_type (Union[List[str], Tuple[str], str], optional): Типы чатов, в которых активен обработчик.
+            state (StateRegExp, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority), обновления с большим приоритетом обрабатываются раньше.
+            regexp (Union[str, Pattern], optional): Регулярное выражение для текста (или подписи) сообщения, проверяется с начала текста.
+                Совпадение передаётся в обработчик параметром `match`, именованные группы - параметрами с их именами.
+            text_pattern (str, optional): Шаблон всего текста в стиле fnmatch ('привет*'), вместо regexp.
+        """
+        return self._register('message', {
+            'filters': _filters,
+            'content_types': content_types,
+            'commands': commands,
+            'allowed_chat_type': allowed_chat_type,
+            'state': state,
+            'priority': priority,
+            'regexp': compile_pattern(regexp, text_pattern)
+        })
+
+    message_handler = message
+
+    def callback_query(self, _filters: Callable[[Any], Any]=None, allowed_chat_type: Union[str, List[str], Tuple[str]]=None, state: State=None, priority: int=None, callback_data: Union[CallbackData, CallbackDataFilter]=None) -> Callable:
+        """
+        Декоратор для обработки вызовов InlineKeyboardMarkup кнопки.
+
+        Args:
+            _filters (Callable[[CallbackQuery], any], optional): Функция фильтрации.
+            allowed_chat_type (Union[List[str], Tuple[str], str], optional): Типы чатов, в которых активен обработчик.
+            state (StateRegExp, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority).
+            callback_data (Union[CallbackData, CallbackDataFilter], optional): Фабрика callback_data или `factory.filter(...)`.
+        """
+        return self._register('callback_query', {
+            'filters': _filters,
+            'allowed_chat_type': allowed_chat_type,
+            'state': state,
+            'priority': priority,
+            'callback_data': as_filter(callback_data)
+        })
+
+    callback_query_handler = callback_query
+
+    def poll(self, _filters: Callable[[Any], Any]=None, priority: int=None) -> Callable:
+        """
+        Декоратор для обработки обновления данных опросов.
+
+        Args:
+            _filters (Callable[[Poll], any], optional): Функция фильтрации.
+            priority (int, optional): Приоритет обработки (Priority).
+        """
+        return self._register('poll', {
+            'filters': _filters,
+            'priority': priority
+        })
+
+    poll_handler = poll
+
+    def poll_answer(self, _filters: Callable[[Any], Any]=None, state: State=None, priority: int=None) -> Callable:
+        """
+        Декоратор для обработки ответов на опросы.
+
+        Args:
+            _filters (Callable[[PollAnswer], any], optional): Функция фильтрации.
+            state (StateRegExp, optional): Состояние в контексте машины состояний.
+            priority (int, optional): Приоритет обработки (Priority).
+        """
+        return self._register('poll_answer', {
+            'filters': _filters,
+            'state': state,
+            'priority': priority
+        })
+
+    poll_answer_handler = poll_answer
@@ -0,0 +1,151 @@
+"""
+Запуск множества ботов (токенов) в одном процессе.
+"""
+
+from typing import Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import traceback
+import asyncio
+import logging
+import json
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from .methods import method_url
+
+__all__ = [
+    'MultiBotRunner'
+]
+
+ALLOWED_UPDATES = json.dumps(['message', 'callback_query', 'poll', 'poll_answer'])
+
+class MultiBotRunner:
+    """
+    Обслуживает много ботов одним циклом событий.
+
+    - AsyncBot: polling всех ботов работает в одном цикле с общей сессией aiohttp (общий пул соединений).
+    - SyncBot: getUpdates всех ботов тоже выполняется в этом цикле, а обработчики - в общем пуле потоков.
+      Запросы из обработчиков идут через общую requests.Session.
+
+    Использование:
+        runner = MultiBotRunner([SyncBot(token1), AsyncBot(token2)])
+        runner.run()
+
+    Args:
+        bots (List[SyncBot | AsyncBot], optional): Боты.
+        threads (int): Размер общего пула потоков для обработчиков SyncBot.
+        workers (int): Сколько обновлений одного AsyncBot обрабатывается одновременно.
+        pool_size (int): Размер пула соединений.Каждый бот держит одно соединение для getUpdates.
+        poll_timeout (int): Таймаут long polling в секундах.
+    """
+    def __init__(self, bots: List[Any]=None, threads: int=10, workers: int=10, pool_size: int=100, poll_timeout: int=30):
+        self.bots: List[Any] = []
+        self.threads = threads
+        self.workers = workers
+        self.pool_size = pool_size
+        self.poll_timeout = poll_timeout
+
+        self.logger = logging.getLogger(__name__)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        for bot in bots or []:
+            self.add(bot)
+
+    def add(self, bot: Any) -> None:
+        """
+        Добавляет бота.Должно вызываться до run.
+        """
+        self.bots.append(bot)
+
+    @staticmethod
+    def _is_async(bot: Any) -> bool:
+        return asyncio.iscoroutinefunction(bot.get_me)
+
+    def run(self) -> None:
+        """
+        Запускает всех ботов и блокирует поток до остановки (Ctrl+C).
+        """
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            pass
+
+    async def run_async(self) -> None:
+        """
+        Запускает всех ботов в текущем цикле событий.
+        """
+        from .types import Request
+        from .Async.types import Request as AsyncRequest
+
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max(self.pool_size, len(self.bots) * 2), keepalive_timeout=30))
+
+        sync_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.threads)
+        sync_session.mount('https://', adapter)
+        sync_session.mount('http://', adapter)
+
+        self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='EasyGram-bot')
+        self._semaphore = asyncio.Semaphore(self.threads * 10)
+
+        tasks = []
+
+        try:
+            for bot in self.bots:
+                if self._is_async(bot):
+                    bot.__request__ = AsyncRequest(bot.__request__.logger.level, timeout=bot.__request__.timeout, log_sample_rate=bot.__request__.request_logger.sample_rate, session=session, cache=bot.__request__.cache)
+                    tasks.append(asyncio.ensure_future(bot.polling(workers=self.workers)))
+                else:
+                    bot._request = Request(bot._request.logger.level, timeout=bot._request.timeout, log_sample_rate=bot._request.request_logger.sample_rate, session=sync_session, cache=bot._request.cache)
+                    tasks.append(asyncio.ensure_future(self._poll_sync(bot, session)))
+
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            for bot in self.bots:
+                if self._is_async(bot):
+                    await bot.close()
+
+            self._executor.shutdown(wait=True)
+            sync_session.close()
+            await session.close()
+
+    async def _poll_sync(self, bot: Any, session: aiohttp.ClientSession) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                async with session.get(method_url(bot.api_url, bot.token, 'getUpdates'), params={'offset': bot.offset, 'timeout': self.poll_timeout, 'allowed_updates': ALLOWED_UPDATES}, timeout=aiohttp.ClientTimeout(total=self.poll_timeout + 10)) as response:
+                    if response.status != 200:
+                        await asyncio.sleep(1)
+                        continue
+
+                    updates = (await response.json())['result']
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.error(traceback.format_exc())
+                await asyncio.sleep(1)
+                continue
+
+            for update in updates:
+                bot.offset = update['update_id'] + 1
+
+                await self._semaphore.acquire()
+
+                future = loop.run_in_executor(self._executor, self._process_sync_update, bot, update)
+                future.add_done_callback(lambda _: self._semaphore.release())
+
+    @staticmethod
+    def _process_sync_update(bot: Any, update: dict) -> None:
+        try:
+            bot._process_update(update)
+        except Exception:
+            bot.logger.error(traceback.format_exc())
@@ -0,0 +1,207 @@
+"""
+Ограничение частоты обновлений от одного пользователя или чата (антиспам).
+"""
+
+from typing import Any, Callable, Optional, Union, List
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+import threading
+import inspect
+import sqlite3
+import time
+import sys
+
+from .middleware import BaseMiddleware
+from .dispatcher import get_chat_id, get_user_id
+
+__all__ = [
+    'BaseThrottleStorage',
+    'MemoryThrottleStorage',
+    'SQLiteThrottleStorage',
+    'ThrottlingMiddleware'
+]
+
+class BaseThrottleStorage(ABC):
+    """
+    Хранилище счётчиков для ThrottlingMiddleware.Наследник должен реализовать hit.
+
+    Если hit блокирует (диск, сеть), у хранилища `blocking = True`: в AsyncBot он вызывается в пуле потоков, а не в цикле событий.
+    """
+    blocking: bool = False
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, period: float) -> float:
+        """
+        Учитывает одно обновление по ключу (алгоритм token bucket: `limit` обновлений за `period` секунд).
+
+        Returns:
+            float: 0, если обновление разрешено, иначе через сколько секунд можно повторить.
+        """
+
+    @staticmethod
+    def _take(tokens: float, updated: float, now: float, limit: int, period: float):
+        rate = limit / period
+        tokens = min(float(limit), tokens + (now - updated) * rate)
+
+        if tokens >= 1:
+            return tokens - 1, 0.0
+
+        return tokens, (1 - tokens) / rate
+
+class MemoryThrottleStorage(BaseThrottleStorage):
+    """
+    Счётчики в памяти процесса.Хранится не больше `max_keys` ключей, давно не активные вытесняются первыми.
+
+    Args:
+        max_keys (int): Максимальное количество отслеживаемых пользователей/чатов.
+    """
+    def __init__(self, max_keys: int=100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, period: float) -> float:
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(limit), now))
+            tokens, retry_after = self._take(tokens, updated, now, limit, period)
+            self._buckets[key] = (tokens, now)
+
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return retry_after
+
+class SQLiteThrottleStorage(BaseThrottleStorage):
+    """
+    Счётчики в файле SQLite, общие для нескольких процессов-воркеров на одной машине.
+
+    Args:
+        path (str): Путь к файлу базы.
+        cleanup_every (int): Через сколько обращений удалять давно не активные ключи.
+    """
+    blocking = True
+
+    def __init__(self, path: str='throttling.sqlite3', cleanup_every: int=10_000):
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self._local = threading.local()
+        self._hits = 0
+
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+
+        return connection
+
+    def hit(self, key: str, limit: int, period: float) -> float:
+        now = time.time()
+        connection = self._connection()
+
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            row = connection.execute('SELECT tokens, updated FROM throttle WHERE key = ?', (key,)).fetchone()
+            tokens, retry_after = self._take(*(row or (float(limit), now)), now, limit, period)
+            connection.execute('INSERT OR REPLACE INTO throttle (key, tokens, updated) VALUES (?, ?, ?)', (key, tokens, now))
+
+            self._hits += 1
+
+            if self._hits % self.cleanup_every == 0:
+                connection.execute('DELETE FROM throttle WHERE updated < ?', (now - period,))
+
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return retry_after
+
+def _in_event_loop() -> bool:
+    # asyncio не импортирован - значит, и цикла событий нет
+    asyncio = sys.modules.get('asyncio', None)
+
+    if asyncio is None:
+        return False
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Пропускает не больше `limit` обновлений за `period` секунд от одного пользователя (или чата).
+    Лишние обновления отбрасываются до создания Message и поиска обработчика.
+
+    Args:
+        limit (int): Количество обновлений за период.
+        period (float): Период в секундах.
+        key (Union[str, Callable[[dict], Any]]): 'user', 'chat' или функция, которая возвращает ключ по необработанному обновлению.
+        storage (BaseThrottleStorage, optional): Хранилище счётчиков, по умолчанию MemoryThrottleStorage.
+        on_throttled (Callable[[dict, float], Any], optional): Вызывается для отброшенного обновления с временем до следующей попытки.
+            В AsyncBot может быть корутиной.
+        update_types (Union[str, List[str]], optional): Типы обновлений, которые ограничиваются.
+    """
+    def __init__(self, limit: int=5, period: float=1.0, key: Union[str, Callable[[dict], Any]]='user', storage: BaseThrottleStorage=None, on_throttled: Callable[[dict, float], Any]=None, update_types: Union[str, List[str], None]=None):
+        super().__init__(update_types)
+
+        if key == 'user':
+            self.key = get_user_id
+        elif key == 'chat':
+            self.key = get_chat_id
+        elif callable(key):
+            self.key = key
+        else:
+            raise ValueError('key должен быть "user", "chat" или функцией.')
+
+        self.limit = limit
+        self.period = period
+        self.storage = MemoryThrottleStorage() if storage is None else storage
+        self.on_throttled = on_throttled
+
+    def pre_process(self, update: dict, data: dict) -> Any:
+        key = self.key(update)
+
+        if key is None:
+            return None
+
+        if self.storage.blocking and _in_event_loop():
+            return self._apre_process(update, str(key))
+
+        return self._throttled(update, self.storage.hit(str(key), self.limit, self.period))
+
+    async def _apre_process(self, update: dict, key: str) -> Any:
+        import asyncio
+
+        retry_after = await asyncio.get_running_loop().run_in_executor(None, self.storage.hit, key, self.limit, self.period)
+        result = self._throttled(update, retry_after)
+
+        return await result if inspect.isawaitable(result) else result
+
+    def _throttled(self, update: dict, retry_after: float) -> Any:
+        if not retry_after:
+            return None
+
+        if self.on_throttled is not None:
+            result = self.on_throttled(update, retry_after)
+
+            if inspect.isawaitable(result):
+                return self._drop_after(result)
+
+        return False
+
+    @staticmethod
+    async def _drop_after(result: Any) -> bool:
+        await result
+        return False
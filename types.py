@@ -1,12 +1,19 @@
-from typing import Optional, Union, List, BinaryIO, Callable, Any
-import requests
+from typing import Optional, Union, List, BinaryIO, Callable, Any, TYPE_CHECKING
 from .exception import ButtonParameterErorr, Telegram
 import traceback
 from io import BytesIO, IOBase
 from pathlib import Path
 import json
 import logging
-from copy import deepcopy
+from copy import copy
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+
+from .log import RequestLogger
+from .cache import ResponseCache
+
+if TYPE_CHECKING:
+    import requests
 
 from .exception import (
     ButtonParameterErorr,
@@ -23,8 +30,112 @@ class GetMe:
     :param bot: Объект бота.
     """
     def __init__(self, bot):
-        self.id: int = requests.get(f'https://api.telegram.org/bot{bot.token}/getMe').json()['result']['id']
-        self.other = requests.get(f'https://api.telegram.org/bot{bot.token}/getMe').json()['result']
+        me = getattr(bot, '_me', None)
+
+        if me is not None:
+            self.other: dict = dict(vars(me))
+        else:
+            import requests
+            from .methods import API_URL, method_url
+
+            # Один запрос getMe на оба поля
+            self.other: dict = requests.get(method_url(getattr(bot, 'api_url', API_URL), bot.token, 'getMe')).json()['result']
+
+        self.id: int = self.other['id']
+
+class RawJSON(str):
+    """
+    Строка, которая уже является JSON.В JSON-тело запроса вставляется как есть, в form-data передаётся обычной строкой.
+    """
+    __slots__ = ()
+
+def raise_for_result(result: dict) -> None:
+    """
+    Поднимает исключение, если Bot API вернул ошибку (`ok` = false).
+    """
+    if result['ok']:
+        return
+
+    error_description = result['description'].lower()
+
+    if error_description == 'unauthorized':
+        raise Unauthorized(error_description)
+    elif error_description.startswith('bad request'):
+        raise BadRequest(error_description)
+    elif error_description.startswith('forbidden'):
+        raise Forbidden(error_description)
+    elif error_description.startswith('too many requests'):
+        raise TooManyRequests(error_description, value=result['parameters']['retry_after'])
+    else:
+        raise Telegram(error_description)
+
+def encode_json_body(kwargs: dict) -> dict:
+    """
+    Если в `json=` запроса есть значения RawJSON, собирает тело запроса сама: остальные параметры сериализуются
+    одним json.dumps, а RawJSON вставляются без повторной сериализации.
+    """
+    parameters = kwargs.get('json', None)
+
+    if not isinstance(parameters, dict):
+        return kwargs
+
+    raw = [f'{json.dumps(key)}:{value}' for key, value in parameters.items() if isinstance(value, RawJSON)]
+
+    if not raw:
+        return kwargs
+
+    body = json.dumps({key: value for key, value in parameters.items() if not isinstance(value, RawJSON)}, ensure_ascii=False)
+    body = '{' + ','.join(raw) + '}' if body == '{}' else body[:-1] + ',' + ','.join(raw) + '}'
+
+    kwargs = {key: value for key, value in kwargs.items() if key != 'json'}
+    kwargs['data'] = body.encode('utf-8')
+    kwargs['headers'] = {**kwargs.get('headers', {}), 'Content-Type': 'application/json'}
+
+    return kwargs
+
+class _Markup(ABC):
+    """
+    Общая часть клавиатур: сериализация в JSON и заморозка.Клавиатура описывает себя в to_dict.
+    """
+    frozen: bool = False
+    _json: Optional[RawJSON] = None
+
+    @abstractmethod
+    def to_dict(self) -> dict:
+        """
+        Клавиатура в виде словаря для параметра reply_markup.
+        """
+
+    def to_json(self) -> RawJSON:
+        """
+        Клавиатура в виде JSON для параметра reply_markup.У замороженной клавиатуры сериализуется один раз.
+        """
+        if self._json is not None:
+            return self._json
+
+        data = RawJSON(json.dumps(self.to_dict(), ensure_ascii=False))
+
+        if self.frozen:
+            self._json = data
+
+        return data
+
+    def freeze(self) -> '_Markup':
+        """
+        Замораживает клавиатуру: её больше нельзя изменять, а JSON считается один раз и переиспользуется при каждой отправке.
+        Удобно для статичных меню, которые создаются один раз и отправляются много раз.
+
+        :return: Эта же клавиатура
+        """
+        if not self.frozen:
+            self.rows = tuple(tuple(row) for row in self.rows)
+            self.frozen = True
+
+        return self
+
+    def __check_frozen__(self) -> None:
+        if self.frozen:
+            raise TypeError('Клавиатура заморожена (freeze), её нельзя изменять.')
 
 class KeyboardButton:
     """
@@ -35,7 +146,7 @@ class KeyboardButton:
     def __init__(self, text: Union[int, float, str]):
         self.keyboard = {'text': str(text)}
 
-class ReplyKeyboardMarkup:
+class ReplyKeyboardMarkup(_Markup):
     """
     Этот класс используется для создания клавиатуры ответа.
     :param row_width: Количество кнопок в каждом ряду.
@@ -55,6 +166,8 @@ class ReplyKeyboardMarkup:
         :param args: Кнопки для добавления.
         :return: None
         """
+        self.__check_frozen__()
+
         _butt = []
 
         for butt in args:
@@ -70,6 +183,9 @@ class ReplyKeyboardMarkup:
             if _butt:
                 self.rows.append(_butt)
     
+    def to_dict(self) -> dict:
+        return {'keyboard': self.rows, 'resize_keyboard': self.resize_keyboard}
+
     def __str__(self):
         return f"ReplyKeyboardMarkup(rows={json.dumps(self.rows, ensure_ascii=False)}, row_width={self.row_width}, resize_keyboard={self.resize_keyboard})"
     
@@ -99,15 +215,18 @@ class InlineKeyboardButton:
         if url is not None:
             self.keyboard.update({'url': str(url)})
         elif callback_data is not None:
+            if len(str(callback_data).encode('utf-8')) > 64:
+                raise ButtonParameterErorr('"callback_data" не может быть длиннее 64 байт.')
+
             self.keyboard.update({'callback_data': str(callback_data)})
 
-class InlineKeyboardMarkup:
+class InlineKeyboardMarkup(_Markup):
     """
     Этот класс используется для создания встроенной клавиатуры.
     :param row_with: Количество рядов в клавиатуре.
     """
     def __init__(self, row_width: int=3, builder: list[list[InlineKeyboardButton]]=None):
-        self.rows = [] if builder is None else deepcopy(builder)
+        self.rows = [] if builder is None else [[butt.keyboard if isinstance(butt, InlineKeyboardButton) else butt for butt in row] for row in builder]
         self.row_width = row_width
         self.storage: List = []
 
@@ -122,6 +241,8 @@ class InlineKeyboardMarkup:
         :param args: Кнопки для добавления.
         :return: None
         """
+        self.__check_frozen__()
+
         _butt = []
 
         for butt in args:
@@ -141,6 +262,7 @@ class InlineKeyboardMarkup:
         :return: None
         """
         if not args: return None
+        self.__check_frozen__()
         self.storage.extend(args)
     def add_keyboards(self) -> None:
         """
@@ -150,6 +272,9 @@ class InlineKeyboardMarkup:
         self.add(*self.storage)
         self.storage = []
     
+    def to_dict(self) -> dict:
+        return {'inline_keyboard': self.rows}
+
     def __str__(self):
         return f"InlineKeyboardMarkup(rows={json.dumps(self.rows, ensure_ascii=False)}, row_width={self.row_width}, storage={json.dumps(self.storage, ensure_ascii=False, indent=4)})"
 
@@ -221,20 +346,137 @@ class PollOption:
 class InputFile:
     """
     Этот класс используется для безопасной вставки файла.
-    :param file: Байт или объект класса Path.
+    :param file: Байт или объект класса Path.Файл с диска читается только при отправке.
     """
-    def __init__(self, file: Union[IOBase, BinaryIO, BytesIO, Path]):
+    def __init__(self, file: Union[IOBase, BinaryIO, BytesIO, Path, str]):
+        self.path: Optional[Path] = None
+        self._file = None
+
         if isinstance(file, (IOBase, BinaryIO, BytesIO)):
-            self.file = file
-        elif isinstance(file, Path):
-            with open(file, 'rb') as f:
-                self.file = BytesIO(f.read())
-        elif isinstance(file, str):
-            with open(file, 'rb') as f:
-                self.file = BytesIO(f.read())
+            self._file = file
+        elif isinstance(file, (Path, str)):
+            self.path = Path(file)
+
+            if not self.path.is_file():
+                raise FileNotFoundError(f'No such file: {self.path}')
         else:
             raise TypeError('Unknow file type')
 
+    @property
+    def file(self) -> Union[IOBase, BinaryIO, BytesIO]:
+        """
+        Файл целиком.Файл с диска читается в память при первом обращении.
+        """
+        if self._file is None:
+            with open(self.path, 'rb') as f:
+                self._file = BytesIO(f.read())
+
+        return self._file
+
+    @property
+    def name(self) -> Optional[str]:
+        """
+        Имя файла, если оно известно.
+        """
+        if self.path is not None:
+            return self.path.name
+
+        name = getattr(self._file, 'name', None)
+
+        return Path(name).name if isinstance(name, str) else None
+
+    @contextmanager
+    def stream(self):
+        """
+        Поток для отправки файла.Файл с диска открывается заново и не читается в память целиком.
+        """
+        if self.path is None or self._file is not None:
+            if self.file.seekable():
+                self.file.seek(0)
+
+            yield self.file
+            return
+
+        with open(self.path, 'rb') as f:
+            yield f
+
+class InputMedia:
+    """
+    Файл для альбома (send_media_group).
+    :param media: InputFile, file_id или URL.
+    :param caption: Подпись
+    :param parse_mode: Форматирование подписи
+    """
+    type: str = None
+
+    def __init__(self, media: Union[InputFile, str], caption: Union[int, float, str]=None, parse_mode: Union[str, 'ParseMode']=None, **kwargs):
+        self.media = media
+        self.caption = caption
+        self.parse_mode = parse_mode
+        self.extra = {key: value for key, value in kwargs.items() if value is not None}
+
+    def to_dict(self, attach: str=None) -> dict:
+        """
+        Объект InputMedia для Bot API.
+        :param attach: Имя файла в multipart-запросе, если media - InputFile.
+        """
+        result = {'type': self.type, 'media': self.media if isinstance(self.media, str) else f'attach://{attach}'}
+
+        if self.caption is not None:
+            result['caption'] = str(self.caption)
+
+        if self.parse_mode is not None:
+            result['parse_mode'] = self.parse_mode
+
+        result.update(self.extra)
+
+        return result
+
+    def with_media(self, media: Union[InputFile, str]) -> 'InputMedia':
+        """
+        Копия с другим файлом, например с file_id после загрузки.
+        """
+        result = copy(self)
+        result.media = media
+
+        return result
+
+class InputMediaPhoto(InputMedia):
+    """
+    Фото для альбома.
+    """
+    type = 'photo'
+
+    def __init__(self, media: Union[InputFile, str], caption: Union[int, float, str]=None, parse_mode: Union[str, 'ParseMode']=None, has_spoiler: bool=None):
+        super().__init__(media, caption, parse_mode, has_spoiler=has_spoiler)
+
+class InputMediaVideo(InputMedia):
+    """
+    Видео для альбома.
+    """
+    type = 'video'
+
+    def __init__(self, media: Union[InputFile, str], caption: Union[int, float, str]=None, parse_mode: Union[str, 'ParseMode']=None, width: int=None, height: int=None, duration: int=None, supports_streaming: bool=None, has_spoiler: bool=None):
+        super().__init__(media, caption, parse_mode, width=width, height=height, duration=duration, supports_streaming=supports_streaming, has_spoiler=has_spoiler)
+
+class InputMediaAudio(InputMedia):
+    """
+    Аудио для альбома.Альбом из аудио не может содержать файлы других типов.
+    """
+    type = 'audio'
+
+    def __init__(self, media: Union[InputFile, str], caption: Union[int, float, str]=None, parse_mode: Union[str, 'ParseMode']=None, duration: int=None, performer: str=None, title: str=None):
+        super().__init__(media, caption, parse_mode, duration=duration, performer=performer, title=title)
+
+class InputMediaDocument(InputMedia):
+    """
+    Документ для альбома.Альбом из документов не может содержать файлы других типов.
+    """
+    type = 'document'
+
+    def __init__(self, media: Union[InputFile, str], caption: Union[int, float, str]=None, parse_mode: Union[str, 'ParseMode']=None, disable_content_type_detection: bool=None):
+        super().__init__(media, caption, parse_mode, disable_content_type_detection=disable_content_type_detection)
+
 class ChatAction:
     """
     Этот класс используется для выполнения действий в чате.
@@ -303,14 +545,14 @@ class Poll:
 
 class PollAnswer:
     def __init__(self, poll_answer: dict):
-        id: Optional[int] = poll_answer.get('poll_id', None)
-        from_user: Optional[User] = User(poll_answer['user']) if poll_answer.get('user', False) else None
-        option_ids: Optional[list[int]] = poll_answer.get('option_ids', None)
+        self.id: Optional[int] = poll_answer.get('poll_id', None)
+        self.from_user: Optional[User] = User(poll_answer['user']) if poll_answer.get('user', False) else None
+        self.option_ids: Optional[list[int]] = poll_answer.get('option_ids', None)
     
     def __str__(self):
         return json.dumps({
             'id': self.id,
-            'from_user': self.from_user,
+            'from_user': str(self.from_user),
             'option_ids': self.option_ids
         }, ensure_ascii=False)
 
@@ -455,7 +697,7 @@ class Chat:
     def __init__(self, chat: dict):
         self.id: Optional[int] = chat.get('id', None)
         self.first_name: Optional[str] = chat.get('first_name', None)
-        self.title: Optional[str] = self.first_name
+        self.title: Optional[str] = chat.get('title', self.first_name)
         self.username: Optional[str] = chat.get('username', None)
         self.type: Optional[str] = chat.get('type', None)
         
@@ -468,6 +710,26 @@ class Chat:
             'type': self.type
         }, ensure_ascii=False)
 
+class ChatMember:
+    """
+    ChatMember object (getChatMember).
+    """
+    def __init__(self, member: dict):
+        self.user: User = User(member.get('user', {}))
+        self.status: Optional[str] = member.get('status', None)
+        self.custom_title: Optional[str] = member.get('custom_title', None)
+        self.is_anonymous: Optional[bool] = member.get('is_anonymous', None)
+        self.until_date: Optional[int] = member.get('until_date', None)
+
+    def __str__(self):
+        return json.dumps({
+            'user': json.loads(str(self.user)),
+            'status': self.status,
+            'custom_title': self.custom_title,
+            'is_anonymous': self.is_anonymous,
+            'until_date': self.until_date
+        }, ensure_ascii=False)
+
 class ChatType:
     def __init__(self):
         self.private = 'private'
@@ -560,74 +822,88 @@ class BotCommandScopeChatMember:
         self.user_id = user_id
 
 class Request:
-    def __init__(self, log_level: int=logging.INFO, timeout: int=None):
+    def __init__(self, log_level: int=logging.INFO, timeout: int=None, log_sample_rate: float=1.0, log_max_length: int=512, session: 'requests.Session'=None, cache: ResponseCache=None):
         """
         Args:
             log_level (int): Logging level
             timeout (int, optional): The maximum waiting time
+            log_sample_rate (float, optional): Share of requests written to the DEBUG log
+            log_max_length (int, optional): Maximum length of the logged request parameters
+            session (requests.Session, optional): Shared session (connection pool)
+            cache (ResponseCache, optional): Response cache for read-mostly methods (getMe, getFile, getChat, ...), disabled by default
         
         Raises:
             Unauthorized
         """
-        self.__session__: requests.Session = requests.Session()
+        if session is None:
+            # requests импортируется при создании первого синхронного бота, а не при `import EasyGram`
+            import requests
+
+            session = requests.Session()
+
+        self.__session__: 'requests.Session' = session
 
         self.timeout = timeout
+        self.cache = cache
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(log_level)
 
-    def get(self, url: str, **kwargs: Any) -> Union[requests.Response, bytes]:
-        with self.__session__.get(url, **kwargs, timeout=self.timeout) as response:
+        self.request_logger = RequestLogger(self.logger, log_sample_rate, log_max_length)
+
+    def get(self, url: str, **kwargs: Any) -> Union['requests.Response', bytes]:
+        with self.__session__.get(url, **encode_json_body(kwargs), timeout=self.timeout) as response:
             content_type = response.headers.get('Content-Type', '').lower()
-            self.logger.debug(f'Request (get) to {url} with parameters {kwargs}: Successfully')
+            self.request_logger.request('get', url, kwargs, response.status_code)
 
             if 'application/json' in content_type:
                 _result = response.json()
 
-                if not _result['ok']:
-                    error_description = _result['description'].lower()
-                    
-                    if error_description == 'unauthorized':
-                        raise Unauthorized(error_description)
-                    elif error_description.startswith('bad request'):
-                        raise BadRequest(error_description)
-                    elif error_description.startswith('forbidden'):
-                        raise Forbidden(error_description)
-                    elif error_description.startswith('too many requests'):
-                        raise TooManyRequests(error_description, value=_result['parameters']['retry_after'])
-                    else:
-                        raise Telegram(error_description)
+                raise_for_result(_result)
 
                 return response
             else:
                 return response.content
     
-    def post(self, url: str, **kwargs: Any) -> requests.Response:
-        with self.__session__.post(url, **kwargs, timeout=self.timeout) as response:
+    def post(self, url: str, **kwargs: Any) -> 'requests.Response':
+        with self.__session__.post(url, **encode_json_body(kwargs), timeout=self.timeout) as response:
             content_type = response.headers.get('Content-Type', '').lower()
-            self.logger.debug(f'Request (post) to {url} with parameters {kwargs}: Successfully')
+            self.request_logger.request('post', url, kwargs, response.status_code)
 
             if 'application/json' in content_type:
                 _result = response.json()
 
-                if not _result['ok']:
-                    error_description = _result['description'].lower()
-                    
-                    if error_description == 'unauthorized':
-                        raise Unauthorized(error_description)
-                    elif error_description.startswith('bad request'):
-                        raise BadRequest(error_description)
-                    elif error_description.startswith('forbidden'):
-                        raise Forbidden(error_description)
-                    elif error_description.startswith('too many requests'):
-                        raise TooManyRequests(error_description, value=_result['parameters']['retry_after'])
-                    else:
-                        raise Telegram(error_description)
+                raise_for_result(_result)
 
                 return response
             else:
                 return response.content
 
+    def call(self, url: str, **kwargs: Any) -> dict:
+        """
+        POST request to a Bot API method.The response is decoded once and returned as a dict.
+        Methods listed in the response cache are answered from it (see ResponseCache).
+
+        Raises:
+            Unauthorized, BadRequest, Forbidden, TooManyRequests, Telegram
+        """
+        if self.cache is not None and 'files' not in kwargs and self.cache.cacheable(url):
+            return self.cache.call(url, kwargs.get('json', None), lambda: self._call(url, **kwargs))
+
+        return self._call(url, **kwargs)
+
+    def _call(self, url: str, **kwargs: Any) -> dict:
+        with self.__session__.post(url, **encode_json_body(kwargs), timeout=self.timeout) as response:
+            self.request_logger.request('post', url, kwargs, response.status_code)
+
+            if 'application/json' not in response.headers.get('Content-Type', '').lower():
+                raise Telegram(f'Unexpected response from the Bot API: HTTP {response.status_code}')
+
+            _result = response.json()
+            raise_for_result(_result)
+
+            return _result
+
 class File:
     def __init__(self, file_id: str, file_unique_id: str, file_size: str, file_path: str):
         """
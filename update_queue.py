@@ -0,0 +1,424 @@
+"""
+Ограниченная очередь между получением обновлений и их обработкой.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING
+from collections import deque
+import threading
+import tempfile
+import json
+import os
+
+if TYPE_CHECKING:
+    import asyncio
+
+from .dispatcher import get_update_type, get_chat_id, get_user_id
+
+__all__ = [
+    'QUEUE_POLICIES',
+    'UpdateQueue',
+    'AsyncUpdateQueue'
+]
+
+QUEUE_POLICIES = ('block', 'drop_oldest', 'drop_type', 'spill')
+
+class _BaseUpdateQueue:
+    """
+    Общая часть UpdateQueue и AsyncUpdateQueue.Сама по себе не потокобезопасна.
+
+    Args:
+        maxsize (int): Сколько обновлений держать в памяти.
+        policy (str): Что делать, когда очередь заполнена:
+            - 'block' - получение обновлений ждёт, пока обработчики освободят место;
+            - 'drop_oldest' - отбрасывается самое старое обновление с наименьшим приоритетом;
+            - 'drop_type' - отбрасывается самое старое обновление наименее важного типа (см. `shed_order`);
+            - 'spill' - лишние обновления записываются во временный файл и читаются из него по порядку.
+        shed_order (Sequence[str]): Типы обновлений для 'drop_type', от отбрасываемых первыми к самым важным.
+            Типы, которых нет в списке, не отбрасываются раньше перечисленных.
+        spill_path (str, optional): Файл для 'spill', по умолчанию временный.
+        on_drop (Callable[[dict], Any], optional): Вызывается для каждого отброшенного обновления.
+        priority (Callable[[dict], int], optional): Приоритет обновления (см. Priority).Обновления с большим приоритетом выдаются раньше,
+            внутри одного приоритета - по порядку.Бот при запуске polling подставляет приоритеты своих обработчиков.
+            Приоритет меняет порядок только между разными чатами: внутри чата обновления выдаются в порядке получения
+            (команда не обгоняет сообщение, отправленное в том же чате раньше неё, поэтому FSM видит шаги по порядку).
+            Для этого обновление, пришедшее после менее приоритетного из того же чата, получает его приоритет.
+            Кроме того, следующее обновление чата выдаётся только после `task_done` для предыдущего, поэтому при нескольких
+            обработчиках (threaded_run, workers) обновления одного чата обрабатываются по одному, а разных чатов - параллельно.
+    """
+    def __init__(self, maxsize: int=1000, policy: str='block', shed_order: Sequence[str]=('poll', 'poll_answer', 'message', 'callback_query'), spill_path: Optional[str]=None, on_drop: Callable[[dict], Any]=None, priority: Callable[[dict], int]=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f'policy должен быть одним из: {", ".join(QUEUE_POLICIES)}.')
+
+        if maxsize < 1:
+            raise ValueError('maxsize должен быть больше 0.')
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.shed_order = list(shed_order)
+        self.spill_path = spill_path
+        self.priority = priority
+
+        self._drop_callbacks: List[Callable[[dict], Any]] = [] if on_drop is None else [on_drop]
+        self._queues: Dict[int, deque] = {}
+        # Чат -> [приоритет последнего обновления чата в очереди, сколько обновлений чата в очереди]
+        self._chats: Dict[Any, list] = {}
+        # Чаты, обновление которых выдано и ещё обрабатывается
+        self._active: set = set()
+        self._size = 0
+        self._type_counts: Dict[Optional[str], int] = {}
+
+        self._spill_file = None
+        self._spill_read = 0
+        self._spill_count = 0
+
+        self._put = 0
+        self._got = 0
+        self._dropped: Dict[Optional[str], int] = {}
+        self._spilled = 0
+        self._blocked = 0
+        self._max_depth = 0
+
+    def add_drop_callback(self, callback: Callable[[dict], Any]) -> None:
+        """
+        Добавляет функцию, которая вызывается для каждого отброшенного обновления.
+        """
+        self._drop_callbacks.append(callback)
+
+    def qsize(self) -> int:
+        """
+        Количество обновлений в очереди, включая записанные на диск.
+        """
+        return self._size + self._spill_count
+
+    def stats(self) -> dict:
+        """
+        Метрики очереди.
+
+        Returns:
+            dict: depth - текущая глубина, max_depth - максимальная, put/processed - сколько принято/выдано,
+                dropped - отброшено по типам, spilled/spill_depth - сколько записано на диск всего и сейчас, blocked - сколько раз получение ждало.
+        """
+        return {
+            'depth': self.qsize(),
+            'max_depth': self._max_depth,
+            'maxsize': self.maxsize,
+            'policy': self.policy,
+            'put': self._put,
+            'processed': self._got,
+            'dropped': dict(self._dropped),
+            'spilled': self._spilled,
+            'spill_depth': self._spill_count,
+            'blocked': self._blocked
+        }
+
+    def _rank(self, update_type: Optional[str]) -> int:
+        try:
+            return self.shed_order.index(update_type)
+        except ValueError:
+            return len(self.shed_order)
+
+    def _get_priority(self, update: dict) -> int:
+        return 0 if self.priority is None else self.priority(update)
+
+    @staticmethod
+    def _chat_key(update: dict) -> Any:
+        key = get_chat_id(update)
+
+        return get_user_id(update) if key is None else key
+
+    def _append(self, update: dict, priority: int=None) -> None:
+        update_type = get_update_type(update)
+
+        if priority is None:
+            priority = self._get_priority(update)
+
+        key = self._chat_key(update)
+
+        if key is not None:
+            chat = self._chats.get(key, None)
+
+            if chat is None:
+                self._chats[key] = [priority, 1]
+            else:
+                # Не обгоняем более раннее обновление того же чата
+                priority = chat[0] = min(chat[0], priority)
+                chat[1] += 1
+
+        if priority not in self._queues:
+            self._queues[priority] = deque()
+
+        self._queues[priority].append(update)
+        self._size += 1
+        self._type_counts[update_type] = self._type_counts.get(update_type, 0) + 1
+
+    def _priorities(self) -> List[int]:
+        return sorted(priority for priority, queue in self._queues.items() if queue)
+
+    def _removed(self, update: dict) -> None:
+        self._size -= 1
+        self._type_counts[get_update_type(update)] -= 1
+
+        key = self._chat_key(update)
+        chat = self._chats.get(key, None)
+
+        if chat is not None:
+            chat[1] -= 1
+
+            if not chat[1]:
+                del self._chats[key]
+
+    def _ready(self) -> Optional[tuple]:
+        """
+        Приоритет и индекс первого обновления, чат которого сейчас не обрабатывается, или None.
+        """
+        for priority in reversed(self._priorities()):
+            queue = self._queues[priority]
+
+            for indx, update in enumerate(queue):
+                if not self._active or self._chat_key(update) not in self._active:
+                    return priority, indx
+
+        return None
+
+    def _popleft(self, highest: bool=True) -> dict:
+        priorities = self._priorities()
+        update = self._queues[priorities[-1] if highest else priorities[0]].popleft()
+        self._removed(update)
+
+        return update
+
+    def _remove_oldest_of(self, update_type: Optional[str]) -> dict:
+        for priority in self._priorities():
+            queue = self._queues[priority]
+
+            for indx, update in enumerate(queue):
+                if get_update_type(update) == update_type:
+                    del queue[indx]
+                    self._removed(update)
+
+                    return update
+
+    def _drop(self, update: dict) -> None:
+        update_type = get_update_type(update)
+        self._dropped[update_type] = self._dropped.get(update_type, 0) + 1
+
+        for callback in self._drop_callbacks:
+            callback(update)
+
+    def _offer(self, update: dict, priority: int) -> bool:
+        """
+        Кладёт обновление в очередь по правилу `policy`.
+
+        Returns:
+            bool: False, если очередь заполнена и нужно ждать (policy='block').
+        """
+        if self.policy == 'spill' and self._spill_count:
+            self._spill(update)
+        elif self._size < self.maxsize:
+            self._append(update, priority)
+        elif self.policy == 'block':
+            return False
+        elif self.policy == 'drop_oldest':
+            self._drop(self._popleft(highest=False))
+            self._append(update, priority)
+        elif self.policy == 'drop_type':
+            present = [_type for _type, count in self._type_counts.items() if count]
+            victim = min(present, key=self._rank)
+
+            if self._rank(victim) > self._rank(get_update_type(update)):
+                self._drop(update)
+            else:
+                self._drop(self._remove_oldest_of(victim))
+                self._append(update, priority)
+        else:
+            self._spill(update)
+
+        self._put += 1
+        self._max_depth = max(self._max_depth, self.qsize())
+
+        return True
+
+    def _take(self) -> dict:
+        priority, indx = self._ready()
+        queue = self._queues[priority]
+        update = queue[indx]
+        del queue[indx]
+        self._removed(update)
+        self._got += 1
+
+        key = self._chat_key(update)
+
+        if key is not None:
+            self._active.add(key)
+
+        while self._spill_count and self._size < self.maxsize:
+            self._append(self._unspill())
+
+        return update
+
+    def _spill(self, update: dict) -> None:
+        if self._spill_file is None:
+            if self.spill_path is None:
+                fd, self.spill_path = tempfile.mkstemp(prefix='easygram-spill-', suffix='.jsonl')
+                os.close(fd)
+
+            self._spill_file = open(self.spill_path, 'w+b')
+
+        self._spill_file.seek(0, os.SEEK_END)
+        self._spill_file.write(json.dumps(update, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        self._spill_count += 1
+        self._spilled += 1
+
+    def _unspill(self) -> dict:
+        self._spill_file.flush()
+        self._spill_file.seek(self._spill_read)
+
+        update = json.loads(self._spill_file.readline())
+
+        self._spill_read = self._spill_file.tell()
+        self._spill_count -= 1
+
+        if not self._spill_count:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+            self._spill_read = 0
+
+        return update
+
+    def _close_spill(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+
+class UpdateQueue(_BaseUpdateQueue):
+    """
+    Потокобезопасная ограниченная очередь обновлений для SyncBot.Параметры описаны в `_BaseUpdateQueue`.
+
+    Использование: `bot.polling(threaded_run=True, update_queue=UpdateQueue(1000, 'drop_type'))`.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = threading.Condition()
+
+    def put(self, update: dict, timeout: float=None) -> bool:
+        """
+        Кладёт обновление в очередь.При policy='block' ждёт свободного места.
+
+        Returns:
+            bool: False, если место не освободилось за `timeout`.
+        """
+        priority = self._get_priority(update)
+
+        with self._condition:
+            if not self._offer(update, priority):
+                self._blocked += 1
+
+                if not self._condition.wait_for(lambda: self._offer(update, priority), timeout):
+                    return False
+
+            self._condition.notify_all()
+
+        return True
+
+    def get(self, timeout: float=None) -> Optional[dict]:
+        """
+        Забирает следующее обновление.
+
+        Returns:
+            dict: Обновление или None, если очередь пуста дольше `timeout`.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._size and self._ready() is not None, timeout):
+                return None
+
+            update = self._take()
+            self._condition.notify_all()
+
+        return update
+
+    def task_done(self, update: dict) -> None:
+        """
+        Сообщает, что обновление обработано: следующее обновление его чата можно выдавать.
+        """
+        with self._condition:
+            self._active.discard(self._chat_key(update))
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return super().stats()
+
+    def close(self) -> None:
+        """
+        Удаляет файл для 'spill'.
+        """
+        with self._condition:
+            self._close_spill()
+
+class AsyncUpdateQueue(_BaseUpdateQueue):
+    """
+    Ограниченная очередь обновлений для AsyncBot, используется внутри одного цикла событий.Параметры описаны в `_BaseUpdateQueue`.
+
+    Использование: `await bot.polling(update_queue=AsyncUpdateQueue(1000, 'drop_type'), workers=100)`.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition: Optional['asyncio.Condition'] = None
+
+    def _get_condition(self) -> 'asyncio.Condition':
+        if self._condition is None:
+            import asyncio
+
+            self._condition = asyncio.Condition()
+
+        return self._condition
+
+    async def put(self, update: dict) -> None:
+        """
+        Кладёт обновление в очередь.При policy='block' ждёт свободного места.
+        """
+        condition = self._get_condition()
+        priority = self._get_priority(update)
+
+        async with condition:
+            if not self._offer(update, priority):
+                self._blocked += 1
+                await condition.wait_for(lambda: self._offer(update, priority))
+
+            condition.notify_all()
+
+    async def get(self) -> dict:
+        """
+        Ждёт и забирает следующее обновление.
+        """
+        condition = self._get_condition()
+
+        async with condition:
+            await condition.wait_for(lambda: self._size and self._ready() is not None)
+
+            update = self._take()
+            condition.notify_all()
+
+        return update
+
+    async def task_done(self, update: dict) -> None:
+        """
+        Сообщает, что обновление обработано: следующее обновление его чата можно выдавать.
+        """
+        condition = self._get_condition()
+
+        async with condition:
+            self._active.discard(self._chat_key(update))
+            condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Удаляет файл для 'spill'.
+        """
+        self._close_spill()
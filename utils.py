@@ -1,108 +1,123 @@
-from typing import Union
-from .Async.types import InlineKeyboardButton as asyncInlineKeyboardButton, KeyboardButton as asyncKeyboardButton, InlineKeyboardMarkup as asyncInlineKeyboardMarkup, ReplyKeyboardMarkup as asyncReplyKeyboardMarkup
-from .types import InlineKeyboardButton as syncInlineKeyboardButton, KeyboardButton as syncKeyboardButton, InlineKeyboardMarkup as syncInlineKeyboardMarkup, ReplyKeyboardMarkup as syncReplyKeyboardMarkup
+from typing import Any, Dict, Optional, Tuple, Union
+from functools import lru_cache
+import sys
 
-def handle_reply_markup(reply_markup: Union[asyncInlineKeyboardButton, syncInlineKeyboardButton, asyncKeyboardButton, syncKeyboardButton, str, list[list[Union[asyncInlineKeyboardButton, syncInlineKeyboardButton, asyncKeyboardButton, syncKeyboardButton, str]]]], async_mode: bool=False) -> Union[asyncInlineKeyboardMarkup, asyncReplyKeyboardMarkup, syncInlineKeyboardMarkup, syncReplyKeyboardMarkup, None]:
+from .types import InlineKeyboardButton, KeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+
+_MARKUP_CLASSES: Dict[Tuple[type, bool], type] = {}
+
+def _markup_class(button_type: type, inline: bool) -> type:
+    """
+    Клавиатура того же модуля, что и кнопка: для EasyGram.Async.types.InlineKeyboardButton - EasyGram.Async.types.InlineKeyboardMarkup.
+    Модуль кнопки уже импортирован, поэтому EasyGram.Async (и aiohttp) не импортируются ради синхронного бота.
+    """
+    markup_class = _MARKUP_CLASSES.get((button_type, inline), None)
+
+    if markup_class is None:
+        base = InlineKeyboardMarkup if inline else ReplyKeyboardMarkup
+        markup_class = getattr(sys.modules.get(button_type.__module__, None), base.__name__, None)
+
+        if not (isinstance(markup_class, type) and issubclass(markup_class, base)):
+            markup_class = base
+
+        _MARKUP_CLASSES[(button_type, inline)] = markup_class
+
+    return markup_class
+
+def _reply_markup_class(async_mode: bool) -> type:
+    if async_mode:
+        from .Async.types import ReplyKeyboardMarkup as AsyncReplyKeyboardMarkup
+
+        return AsyncReplyKeyboardMarkup
+
+    return ReplyKeyboardMarkup
+
+_BUTTONS = (InlineKeyboardButton, KeyboardButton)
+
+def _cell_key(cell: Any) -> Any:
+    if isinstance(cell, str):
+        return cell
+
+    if isinstance(cell, _BUTTONS):
+        return (type(cell), tuple(cell.keyboard.items()))
+
+    return None
+
+@lru_cache(maxsize=1024)
+def _build_markup(key: Tuple[Tuple[Any, ...], ...], async_mode: bool) -> Union[InlineKeyboardMarkup, ReplyKeyboardMarkup, None]:
+    markup_class = None
+    rows = []
+
+    for row in key:
+        buttons = []
+
+        for cell in row:
+            if isinstance(cell, str):
+                cell_class = _reply_markup_class(async_mode)
+                buttons.append({'text': cell})
+            else:
+                button_type, items = cell
+                cell_class = _markup_class(button_type, issubclass(button_type, InlineKeyboardButton))
+                buttons.append(dict(items))
+
+            if markup_class is None:
+                markup_class = cell_class
+            elif markup_class is not cell_class:
+                return None
+
+        rows.append(buttons)
+
+    if markup_class is None:
+        return None
+
+    markup = markup_class()
+
+    # Как и markup.add(*row): длинные ряды разбиваются по row_width
+    for buttons in rows:
+        markup.rows.extend(buttons[indx:indx + markup.row_width] for indx in range(0, len(buttons), markup.row_width))
+
+    return markup.freeze()
+
+def handle_reply_markup(reply_markup: Union[InlineKeyboardButton, KeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, str, list[list[Union[InlineKeyboardButton, KeyboardButton, str]]], None], async_mode: bool=False) -> Union[InlineKeyboardMarkup, ReplyKeyboardMarkup, None]:
     """
+    Приводит reply_markup к клавиатуре за один проход.Готовые клавиатуры возвращаются как есть, кнопки, строки и списки рядов
+    превращаются в замороженную клавиатуру (см. freeze), которая кэшируется: одинаковый reply_markup не собирается
+    и не сериализуется заново.
+
     Args:
-        reply_markup (Union[asyncInlineKeyboardButton, syncInlineKeyboardButton, asyncKeyboardButton, syncKeyboardButton, str, list[list[asyncInlineKeyboardButton, syncInlineKeyboardButton, asyncKeyboardButton, syncKeyboardButton, str]]]): Передаваеммая кнопка.str = KeyboardButton
+        reply_markup (Union[InlineKeyboardButton, KeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, str, list[list[InlineKeyboardButton, KeyboardButton, str]]]): Передаваеммая кнопка.str = KeyboardButton
         async_mode (bool): Чтобы определиться, EasyGram.Async.types.KeyboardButton или EasyGram.types.KeyboardButton
     Return:
-        Union[asyncInlineKeyboardMarkup, asyncReplyKeyboardMarkup, syncInlineKeyboardMarkup, syncReplyKeyboardMarkup, None]
+        Union[InlineKeyboardMarkup, ReplyKeyboardMarkup, None]: Клавиатура из того же модуля (EasyGram.types или EasyGram.Async.types), что и кнопки.
     """
-
-    if isinstance(reply_markup, (asyncInlineKeyboardButton, syncInlineKeyboardButton)):
-        if isinstance(reply_markup, asyncInlineKeyboardButton):
-            _btn = asyncInlineKeyboardMarkup()
-            _btn.add(reply_markup)
-
-            return _btn
-        else:
-            _btn = syncInlineKeyboardMarkup()
-            _btn.add(reply_markup)
-
-            return _btn
-    elif isinstance(reply_markup, (asyncKeyboardButton, syncKeyboardButton)):
-        if isinstance(reply_markup, asyncKeyboardButton):
-            _btn = asyncReplyKeyboardMarkup()
-            _btn.add(reply_markup)
-
-            return _btn
-        else:
-            _btn = syncReplyKeyboardMarkup()
-            _btn.add(reply_markup)
-
-            return _btn
-    elif isinstance(reply_markup, (asyncInlineKeyboardMarkup, syncInlineKeyboardMarkup, asyncReplyKeyboardMarkup, syncReplyKeyboardMarkup)):
+    if reply_markup is None or isinstance(reply_markup, (InlineKeyboardMarkup, ReplyKeyboardMarkup)):
         return reply_markup
-    elif isinstance(reply_markup, str):
-        if async_mode:
-            _btn = asyncReplyKeyboardMarkup()
-        else:
-            _btn = syncReplyKeyboardMarkup()
-
-        _btn.add(reply_markup)
-
-        return _btn
-    elif isinstance(reply_markup, list):
-        btns = []
-        _type: Union[asyncInlineKeyboardButton, syncInlineKeyboardButton, asyncKeyboardButton, syncKeyboardButton, None] = None
-        _kb_type: Union[asyncInlineKeyboardMarkup, syncInlineKeyboardMarkup, asyncReplyKeyboardMarkup, syncReplyKeyboardMarkup, None] = None
-        kb = None
-
-        for column in reply_markup:
-            _btns = []
-            __type = None
-
-            for row in column:
-                if handle_reply_markup(row) is None:
-                    return None
-                
-                if isinstance(row, str):
-                    if async_mode:
-                        _btns.append(asyncKeyboardButton(row))
-
-                        _kb_type = asyncReplyKeyboardMarkup
-                        __type = asyncKeyboardButton
-                    else:
-                        _btns.append(syncKeyboardButton(row))
-
-                        _kb_type = syncReplyKeyboardMarkup
-                        __type = syncKeyboardButton
-                elif isinstance(row, list):
-                    return None
-                elif isinstance(row, (asyncInlineKeyboardButton, syncInlineKeyboardButton, asyncKeyboardButton, syncKeyboardButton)):
-                    _btns.append(row)
-
-                    if isinstance(row, asyncInlineKeyboardButton):
-                        _kb_type = asyncInlineKeyboardMarkup
-                        __type = asyncInlineKeyboardButton
-                    elif isinstance(row, syncInlineKeyboardButton):
-                        _kb_type = syncInlineKeyboardMarkup
-                        __type = syncInlineKeyboardButton
-                    elif isinstance(row, asyncKeyboardButton):
-                        _kb_type = asyncReplyKeyboardMarkup
-                        __type = asyncKeyboardButton
-                    elif isinstance(row, syncKeyboardButton):
-                        _kb_type = syncReplyKeyboardMarkup
-                        __type = syncKeyboardButton
-                else:
-                    return None
-                
-                if _type is None:
-                    _type = __type
-            
-            if _type != None and _type != __type:
+
+    if isinstance(reply_markup, list):
+        key = []
+
+        for row in reply_markup:
+            if not isinstance(row, (list, tuple)):
                 return None
-            
-            btns.append(_btns.copy())
-
-        kb = _kb_type()
-        
-        if _type is not None:
-            for btn in btns:
-                kb.add(*btn)
-        
-        return kb
+
+            cells = tuple([cell if type(cell) is str else (type(cell), tuple(cell.keyboard.items())) if isinstance(cell, _BUTTONS) else _cell_key(cell) for cell in row])
+
+            if None in cells:
+                return None
+
+            key.append(cells)
+
+        key = tuple(key)
     else:
-        return None
\ No newline at end of file
+        cell = _cell_key(reply_markup)
+
+        if cell is None:
+            return None
+
+        key = ((cell,),)
+
+    try:
+        return _build_markup(key, async_mode)
+    except TypeError:
+        # В кнопке есть нехэшируемые значения - собираем без кэша
+        return _build_markup.__wrapped__(key, async_mode)
@@ -0,0 +1,147 @@
+"""
+Многопроцессный режим: один процесс получает обновления, остальные их обрабатывают.
+"""
+
+from typing import Any, Callable, List, Optional
+import multiprocessing
+import traceback
+import zlib
+import os
+
+from .dispatcher import get_chat_id, get_user_id
+
+__all__ = [
+    'ShardedPolling',
+    'get_shard_key'
+]
+
+def get_shard_key(update: dict) -> int:
+    """
+    Ключ шардирования: айди чата, для обновлений без чата - айди пользователя или опроса.
+    Все обновления одного чата попадают в один и тот же процесс, поэтому их порядок сохраняется.
+    """
+    key = get_chat_id(update)
+
+    if key is None:
+        key = get_user_id(update)
+
+    if key is None:
+        key = (update.get('poll') or {}).get('id', update.get('update_id', 0))
+
+    if isinstance(key, int):
+        return key
+
+    return zlib.crc32(str(key).encode())
+
+def _worker(bot: Any, queue: multiprocessing.Queue, shard: int) -> None:
+    from .types import Request
+
+    # Сессия requests и блокировки кэша ответов не должны делиться между процессами после fork
+    cache = bot._request.cache
+    bot._request = Request(log_level=bot._request.logger.level, timeout=bot._request.timeout, log_sample_rate=bot._request.request_logger.sample_rate, cache=None if cache is None else cache.clone())
+    bot.download_cache = bot.download_cache.clone()
+
+    # Фоновый getMe родителя в этот процесс не перешёл: его Future никто не завершит, поэтому me запросится заново
+    if bot._me is None:
+        bot._me_future = None
+
+    bot.logger.debug('Worker %s started (pid %s)', shard, os.getpid())
+
+    while True:
+        update = queue.get()
+
+        if update is None:
+            break
+
+        try:
+            bot._process_update(update)
+        except Exception:
+            bot.logger.error(traceback.format_exc())
+
+class ShardedPolling:
+    """
+    Получает обновления в текущем процессе и распределяет их по `processes` процессам-воркерам по айди чата.
+
+    - Обновления одного чата всегда обрабатываются одним воркером и по порядку.
+    - Состояния FSM хранятся в памяти воркера, поэтому закреплены за его шардом (в личных чатах chat_id совпадает с user_id).
+    - Воркеры создаются через fork и наследуют зарегистрированные обработчики.На платформах без fork бот и обработчики должны сериализоваться через pickle.
+
+    Args:
+        bot (SyncBot): Бот с зарегистрированными обработчиками.
+        processes (int, optional): Количество воркеров, по умолчанию количество ядер.
+        queue_size (int): Размер очереди каждого воркера.Когда очередь заполнена, получение обновлений ждёт.
+    """
+    def __init__(self, bot: Any, processes: Optional[int]=None, queue_size: int=1000):
+        self.bot = bot
+        self.processes = processes or os.cpu_count() or 1
+        self.queue_size = queue_size
+
+        try:
+            self._context = multiprocessing.get_context('fork')
+        except ValueError:
+            self._context = multiprocessing.get_context()
+
+        self._queues: List[multiprocessing.Queue] = []
+        self._workers: List[Any] = []
+
+    def _start_worker(self, shard: int) -> None:
+        process = self._context.Process(target=_worker, args=(self.bot, self._queues[shard], shard), daemon=True, name=f'EasyGram-worker-{shard}')
+        process.start()
+
+        if shard < len(self._workers):
+            self._workers[shard] = process
+        else:
+            self._workers.append(process)
+
+    def start(self) -> None:
+        """
+        Запускает процессы-воркеры.
+        """
+        self._queues = [self._context.Queue(self.queue_size) for _ in range(self.processes)]
+
+        for shard in range(self.processes):
+            self._start_worker(shard)
+
+    def dispatch(self, update: dict) -> None:
+        """
+        Отправляет обновление воркеру, который владеет его чатом.Упавший воркер перезапускается.
+        """
+        shard = get_shard_key(update) % self.processes
+
+        if not self._workers[shard].is_alive():
+            self.bot.logger.error('Worker %s died (exit code %s), restarting', shard, self._workers[shard].exitcode)
+            self._start_worker(shard)
+
+        self._queues[shard].put(update)
+
+    def stop(self, timeout: float=None) -> None:
+        """
+        Останавливает воркеров после того, как они обработают свои очереди.
+        """
+        for queue in self._queues:
+            queue.put(None)
+
+        for process in self._workers:
+            process.join(timeout)
+
+    def run(self, on_startup: Callable=None, *args) -> None:
+        """
+        Запускает воркеров и цикл получения обновлений.
+        """
+        if on_startup is not None: on_startup(*args)
+
+        self.start()
+
+        try:
+            while True:
+                try:
+                    updates = self.bot._get_updates()
+                except Exception:
+                    self.bot.logger.error(traceback.format_exc())
+                    continue
+
+                for update in updates:
+                    self.bot.offset = update['update_id'] + 1
+                    self.dispatch(update)
+        finally:
+            self.stop(5)